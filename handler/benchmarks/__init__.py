@@ -0,0 +1 @@
+"""Offline benchmarks for the tiers handler (not packaged into the Lambda)."""
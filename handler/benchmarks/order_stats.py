@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark RollingOrderStats against the per-call tier helpers in handler.py.
+
+Replays an expanding history of N values (as the tier builder does per model) and,
+at every step, asks for robust_z, norm_conf, percentile_rank and assign_tier both
+ways. Every answer is checked for exact equality before timings are printed.
+
+    cd handler && python -m benchmarks.order_stats --n 500
+"""
+
+import argparse, os, sys, time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import handler as h  # noqa: E402
+
+LABELS = ["SSS","SS","S","A+","A","B+","B","C+","C","D"]
+CUTS   = [1,3,7,14,24,52,69,82,93,100]
+
+
+def _same(a, b):
+    return a == b or (np.isnan(a) and np.isnan(b))
+
+
+def run(n, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(size=n)
+    values[rng.random(n) < 0.02] = np.nan
+    probes = rng.normal(size=n)
+
+    t0 = time.perf_counter()
+    ref = []
+    for i in range(n):
+        past, v = values[:i], probes[i]
+        ref.append((h.robust_z(past, v), h.norm_conf(v * 50, past), h.percentile_rank(past, v),
+                    h.assign_tier(v, past, CUTS, LABELS)))
+    t_ref = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    got, stats = [], h.RollingOrderStats()
+    for i in range(n):
+        v = probes[i]
+        got.append((stats.robust_z(v), stats.norm_conf(v * 50), stats.rank_pct(v),
+                    stats.tier(v, CUTS, LABELS)))
+        stats.push(values[i])
+    t_new = time.perf_counter() - t0
+
+    for i, (r, g) in enumerate(zip(ref, got)):
+        if not all(_same(a, b) if isinstance(a, float) else a == b for a, b in zip(r, g)):
+            raise AssertionError(f"mismatch at step {i}: {r} != {g}")
+    return t_ref, t_new
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, nargs="+", default=[100, 250, 500, 1000])
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    print(f"{'n':>6} {'helpers (s)':>12} {'streaming (s)':>14} {'speedup':>8}")
+    for n in args.n:
+        t_ref, t_new = run(n, args.seed)
+        print(f"{n:>6} {t_ref:>12.3f} {t_new:>14.3f} {t_ref / max(t_new, 1e-9):>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
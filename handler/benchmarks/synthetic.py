@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Synthetic inputs for the tier builder, shaped like the production writers' output:
+model_eval_summary rows (models × trading days × tickers) in a SQLite file, the
+ml_out/<date>/<model>.json payloads for the as-of date, and price_history rows.
+
+Values are random but plausibly scaled (per-model prediction spread, RMSE % around
+50, accuracy around 55) with a few NaN metrics and missing (date, model) rows, so
+the engine's fallback and skip paths get exercised too.
+"""
+
+import json, sqlite3
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+BASE_MODELS = [
+    "Model1_Random_forest_OldFeature4",
+    "Model5_TabNet",
+    "Model3_RandomForest_Oldfeature4_treeandNNBlend",
+]
+
+PRICE_HISTORY_DDL = """
+    CREATE TABLE IF NOT EXISTS price_history (
+        ticker TEXT, date TEXT,
+        open_price REAL, close_price REAL, high_price REAL, low_price REAL
+    )
+"""
+
+
+def model_names(n_models, ticker="SPY"):
+    """The production model names first, then Model<k>_Synthetic; prefixed per ticker except SPY."""
+    names = (BASE_MODELS + [f"Model{k}_Synthetic" for k in range(len(BASE_MODELS) + 1, n_models + 1)])[:n_models]
+    return names if ticker == "SPY" else [f"{ticker}_{m}" for m in names]
+
+
+def models_prefix(ticker):
+    return "ml_out" if ticker == "SPY" else f"ml_out/{ticker}"
+
+
+def trading_days(n_days, end="2025-12-31"):
+    return pd.bdate_range(end=end, periods=n_days).strftime("%Y-%m-%d").tolist()
+
+
+def eval_frame(dates, models, rng, nan_rate=0.03, missing_rate=0.02):
+    """model_eval_summary rows for every (date, model), minus ~missing_rate of them."""
+    grid = pd.MultiIndex.from_product([dates, models], names=["as_of_date_today", "model_name"])
+    df = grid.to_frame(index=False)
+    df = df[rng.random(len(df)) >= missing_rate].reset_index(drop=True)
+    n = len(df)
+    spread = 1.0 + df["model_name"].map({m: i for i, m in enumerate(models)}).to_numpy() % 4
+    cols = {}
+    for i in range(1, 9):
+        cols[f"y{i}_pred"] = rng.normal(0.0, 1.0, n) * spread
+        cols[f"y{i}_rmse"] = np.abs(rng.normal(1.0, 0.2, n))
+        cols[f"y{i}_rmse_pct"] = np.abs(rng.normal(50.0, 15.0, n))
+        cols[f"y{i}_acc"] = np.clip(rng.normal(55.0, 10.0, n), 0.0, 100.0)
+        for c in (f"y{i}_pred", f"y{i}_rmse_pct", f"y{i}_acc"):
+            cols[c][rng.random(n) < nan_rate] = np.nan
+    for i in range(1, 21):
+        cols[f"top_feature_{i}_name"] = np.full(n, f"feature_{i}")
+        cols[f"top_feature_{i}_importance"] = rng.random(n)
+    return pd.concat([df, pd.DataFrame(cols)], axis=1)
+
+
+def payload(row):
+    """The ml_out JSON a model writer would PUT for one model_eval_summary row."""
+    def present(col):
+        v = row.get(col)
+        return v is not None and not (isinstance(v, float) and np.isnan(v))
+    return {
+        "predictions": {f"y{i}": float(row[f"y{i}_pred"]) for i in range(1, 9) if present(f"y{i}_pred")},
+        "metrics": {
+            "rmse_pct": {f"y{i}": float(row[f"y{i}_rmse_pct"]) for i in range(1, 9) if present(f"y{i}_rmse_pct")},
+            "acc_pct": {f"y{i}": float(row[f"y{i}_acc"]) for i in range(1, 9) if present(f"y{i}_acc")},
+        },
+        "rmse": {f"y{i}": float(row[f"y{i}_rmse"]) for i in range(1, 9)},
+        "top_features": [{"name": row[f"top_feature_{i}_name"],
+                          "importance": float(row[f"top_feature_{i}_importance"])} for i in range(1, 21)],
+    }
+
+
+def price_frame(ticker, dates, rng):
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, len(dates))))
+    open_ = close * (1.0 + rng.normal(0.0, 0.003, len(dates)))
+    return pd.DataFrame({
+        "ticker": ticker, "date": dates, "open_price": open_, "close_price": close,
+        "high_price": np.maximum(open_, close) * (1.0 + np.abs(rng.normal(0.0, 0.004, len(dates)))),
+        "low_price": np.minimum(open_, close) * (1.0 - np.abs(rng.normal(0.0, 0.004, len(dates)))),
+    })
+
+
+def build(db_path, s3, bucket, db_key, eval_ddl, tickers=("SPY",), n_models=3, n_days=400, seed=0):
+    """
+    Write the DB (history before the last day) to `db_path` and upload it to
+    s3://bucket/db_key, and PUT the last day's payloads under each ticker's
+    models prefix. Returns {ticker: {"models", "models_prefix", "as_of", "rows"}}.
+    """
+    rng = np.random.default_rng(seed)
+    dates = trading_days(n_days)
+    as_of = dates[-1]
+    out = {}
+    with closing(sqlite3.connect(db_path)) as conn:
+        conn.execute(eval_ddl)
+        conn.execute(PRICE_HISTORY_DDL)
+        for ticker in tickers:
+            models = model_names(n_models, ticker)
+            df = eval_frame(dates, models, rng)
+            hist = df[df["as_of_date_today"] < as_of]
+            hist.to_sql("model_eval_summary", conn, if_exists="append", index=False, chunksize=5000)
+            price_frame(ticker, dates[:-1], rng).to_sql("price_history", conn, if_exists="append", index=False)
+
+            prefix = models_prefix(ticker)
+            for row in df[df["as_of_date_today"] == as_of].to_dict("records"):
+                s3.put_object(Bucket=bucket, Key=f"{prefix}/{as_of}/{row['model_name']}.json",
+                              Body=json.dumps(payload(row)).encode("utf-8"))
+            out[ticker] = {"models": models, "models_prefix": prefix, "as_of": as_of, "rows": len(df)}
+        conn.commit()
+    s3.upload_file(db_path, bucket, db_key)
+    return out
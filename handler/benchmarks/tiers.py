@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+End-to-end benchmark of compute_result on synthetic data.
+
+Builds a model_eval_summary DB (models × days × tickers) and the as-of day's
+ml_out payloads in an in-process S3 stand-in (moto), then runs compute_result
+for every ticker --repeat times and reports per-stage wall time (median), row
+counts, peak RSS and throughput from the handler's own stage marks.
+
+    cd handler && python -m benchmarks.tiers --models 3 --days 500 --tickers 4 --repeat 5
+    python -m benchmarks.tiers ... --save-baseline /tmp/tiers-base.json   # before a change
+    python -m benchmarks.tiers ... --baseline /tmp/tiers-base.json        # after it
+
+--cold drops the local DB and caches before every run (a fresh container);
+otherwise runs after the first reuse them like a warm Lambda. Requires moto.
+"""
+
+import argparse, contextlib, io, json, os, statistics, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from moto import mock_aws
+except ImportError:  # pragma: no cover - optional benchmark dependency
+    mock_aws = None
+
+from benchmarks import synthetic  # noqa: E402
+
+
+def _point_handler_at(h, ticker, info, tmpdir):
+    """Module settings for one ticker's run, with /tmp state under `tmpdir`."""
+    h.TICKER = ticker
+    h.SUMMARY_PREFIX = "summary_json" if ticker == "SPY" else f"summary_json/{ticker}"
+    h.MODELS_PREFIX = info["models_prefix"]
+    h.MODEL_NAMES_ENV = ",".join(info["models"])
+    h.DB_LOCAL = os.path.join(tmpdir, "tradespark.db")
+    h.DB_EXTRACT_LOCAL = os.path.join(tmpdir, "tradespark.tiers.db")
+
+
+def _drop_warm_state(h):
+    h._cleanup_tmp([h.DB_LOCAL, h.DB_EXTRACT_LOCAL])
+    h._db_etag = None
+    h._extract_etag = None
+    h._cfg_cache.clear()
+    h._models_index_cache.clear()
+
+
+def run(args):
+    import handler as h  # imported under mock_aws so its S3 client is the stand-in
+
+    s3 = h.s3
+    s3.create_bucket(Bucket=h.DB_BUCKET)
+    tickers = ["SPY"] + [f"T{k:03d}" for k in range(1, args.tickers)]
+    runs = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        t0 = time.perf_counter()
+        data = synthetic.build(os.path.join(tmpdir, "source.db"), s3, h.DB_BUCKET, h.DB_KEY,
+                               h.MODEL_EVAL_SUMMARY_DDL, tickers, args.models, args.days, args.seed)
+        print(f"Generated {sum(d['rows'] for d in data.values())} model_eval_summary row(s) "
+              f"for {len(tickers)} ticker(s) in {time.perf_counter() - t0:.1f}s")
+
+        for ticker in tickers:
+            _point_handler_at(h, ticker, data[ticker], tmpdir)
+            _drop_warm_state(h)
+            for r in range(args.repeat):
+                if args.cold:
+                    _drop_warm_state(h)
+                log = io.StringIO()
+                t0 = time.perf_counter()
+                with contextlib.redirect_stdout(sys.stdout if args.verbose else log):
+                    h.compute_result({"as_of": data[ticker]["as_of"]})
+                runs.append({"ticker": ticker, "repeat": r,
+                             "total_ms": (time.perf_counter() - t0) * 1000.0,
+                             "stages": [dict(s) for s in h._stages]})
+            _drop_warm_state(h)
+    return summarize(runs)
+
+
+def summarize(runs):
+    stages = {}
+    for run_ in runs:
+        for s in run_["stages"]:
+            st = stages.setdefault(s["stage"], {"ms": [], "rows": [], "peak_rss_mb": 0.0})
+            st["ms"].append(s["ms"])
+            if "rows" in s:
+                st["rows"].append(s["rows"])
+            st["peak_rss_mb"] = max(st["peak_rss_mb"], s.get("peak_rss_mb") or 0.0)
+    totals = [r["total_ms"] for r in runs]
+    hist_rows = sum(s.get("rows", 0) for r in runs for s in r["stages"] if s["stage"] == "history_query")
+    return {
+        "runs": len(runs),
+        "total_ms": round(statistics.median(totals), 1),
+        "total_p90_ms": round(sorted(totals)[int(0.9 * (len(totals) - 1))], 1),
+        "runs_per_s": round(len(runs) / (sum(totals) / 1000.0), 2),
+        "history_rows_per_s": round(hist_rows / (sum(totals) / 1000.0), 1),
+        "peak_rss_mb": max((st["peak_rss_mb"] for st in stages.values()), default=0.0),
+        "stages": {name: {"ms": round(statistics.median(st["ms"]), 1),
+                          "rows": int(statistics.median(st["rows"])) if st["rows"] else None,
+                          "peak_rss_mb": st["peak_rss_mb"]}
+                   for name, st in stages.items()},
+    }
+
+
+def report(result, baseline=None):
+    base_stages = (baseline or {}).get("stages", {})
+
+    def delta(cur, old):
+        if not old:
+            return ""
+        return f"{old:>10.1f} {100.0 * (cur - old) / old:>+7.1f}%"
+
+    head = f"{'stage':<20} {'median ms':>10} {'rows':>8} {'rss MB':>8}"
+    print(head + (f" {'base ms':>10} {'change':>8}" if baseline else ""))
+    for name, st in result["stages"].items():
+        rows = "" if st["rows"] is None else st["rows"]
+        print((f"{name:<20} {st['ms']:>10.1f} {rows:>8} {st['peak_rss_mb']:>8.1f} "
+               + delta(st["ms"], base_stages.get(name, {}).get("ms"))).rstrip())
+    print((f"{'total':<20} {result['total_ms']:>10.1f} {'':>8} {result['peak_rss_mb']:>8.1f} "
+           + delta(result["total_ms"], (baseline or {}).get("total_ms"))).rstrip())
+    print(f"{result['runs']} run(s): p90 {result['total_p90_ms']} ms, {result['runs_per_s']} runs/s, "
+          f"{result['history_rows_per_s']} history rows/s")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--models", type=int, default=3, help="models per ticker")
+    ap.add_argument("--days", type=int, default=400, help="trading days of history (incl. the as-of day)")
+    ap.add_argument("--tickers", type=int, default=1, help="tickers sharing the DB (SPY, T001, ...)")
+    ap.add_argument("--repeat", type=int, default=3, help="compute_result runs per ticker")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--cold", action="store_true", help="drop local DB/caches before every run")
+    ap.add_argument("--store-db", action="store_true", help="STORE_IN_DB=1 (upserts + DB upload)")
+    ap.add_argument("--write-s3", action="store_true", help="WRITE_TIER_TO_S3=1")
+    ap.add_argument("--baseline", help="compare against a JSON written by --save-baseline")
+    ap.add_argument("--save-baseline", help="write this run's summary as JSON")
+    ap.add_argument("--verbose", action="store_true", help="show the handler's own log lines")
+    args = ap.parse_args()
+    if mock_aws is None:
+        sys.exit("benchmarks.tiers needs moto for its local S3 stand-in: pip install 'moto[s3]'")
+
+    # Settings the handler reads at import time
+    for k, v in (("AWS_ACCESS_KEY_ID", "bench"), ("AWS_SECRET_ACCESS_KEY", "bench"),
+                 ("AWS_DEFAULT_REGION", "us-east-1")):
+        os.environ.setdefault(k, v)
+    os.environ.update(SOURCE="s3_json", EMIT_METRICS="0",
+                      STORE_IN_DB="1" if args.store_db else "0",
+                      WRITE_TIER_TO_S3="1" if args.write_s3 else "0")
+
+    params = {k: getattr(args, k) for k in ("models", "days", "tickers", "repeat", "seed",
+                                            "cold", "store_db", "write_s3")}
+    with mock_aws():
+        result = run(args)
+    result["params"] = params
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("params") != params:
+            print(f"⚠️ Baseline params differ: {baseline.get('params')}")
+    report(result, baseline)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Saved baseline to {args.save_baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,31 +9,95 @@ OptiSpark: Enhanced Daily LONG/SHORT Tier Builder with Market Explanation System
 - Generates summary JSON similar to local.ipynb but saves to AWS S3 bucket.
 """
 
-import os, json, sqlite3, boto3, re, shutil
-import numpy as np
-import pandas as pd
+from __future__ import annotations
+
+import time
+_INIT_T0 = time.perf_counter()
+
+import os, json, sqlite3, boto3, re, shutil, hashlib, bisect, math, random, importlib, itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import closing
+from botocore import __version__ as botocore_version
+from botocore.config import Config
 from botocore.exceptions import ClientError
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Tuple, Optional
 
+
+# ---------- lazy heavy imports ----------
+class _LazyModule:
+    """
+    Stand-in for a heavy module (numpy/pandas) that imports it on first attribute
+    access and then replaces itself in this module's globals, so container init
+    only pays for what an invocation actually touches.
+    """
+    def __init__(self, name, alias):
+        self._name, self._alias = name, alias
+
+    def __getattr__(self, attr):
+        t0 = time.perf_counter()
+        mod = importlib.import_module(self._name)
+        globals()[self._alias] = mod
+        _timings[f"import_{self._alias}_ms"] = round((time.perf_counter() - t0) * 1000.0, 1)
+        return getattr(mod, attr)
+
+np = _LazyModule("numpy", "np")
+pd = _LazyModule("pandas", "pd")
+
+# Per-invocation stage timings (ms) and cache outcomes; reset by lambda_handler
+_timings = {}
+_cold_start = True
+
+# compute_result stages: [{"stage", "ms", "peak_rss_mb", "rows"?}], in first-seen order.
+# _stage(name) charges the wall time since the previous mark to `name`; repeated
+# names accumulate (e.g. "writes" before and after scoring).
+_stages = []
+_stage_t = [0.0]
+
+def _peak_rss_mb():
+    try:
+        import resource
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1)  # KiB on Linux
+    except Exception:
+        return None
+
+def _stage_start():
+    _stages.clear()
+    _stage_t[0] = time.perf_counter()
+
+def _stage(name, rows=None):
+    now = time.perf_counter()
+    ms, _stage_t[0] = (now - _stage_t[0]) * 1000.0, now
+    rec = next((r for r in _stages if r["stage"] == name), None)
+    if rec is None:
+        rec = {"stage": name, "ms": 0.0}
+        _stages.append(rec)
+    rec["ms"] = round(rec["ms"] + ms, 1)
+    rec["peak_rss_mb"] = _peak_rss_mb()
+    if rows is not None:
+        rec["rows"] = rec.get("rows", 0) + int(rows)
+
 # ---------- /tmp helpers ----------
 def _tmp_free_mb(path="/tmp"):
     total, used, free = shutil.disk_usage(path)
     return free // (1024 * 1024)
 
-def _download_db_once(s3, bucket, key, local):
+def _download_db_once(s3, bucket, key, local, etag=None):
     """
     Head the object to estimate size, ensure we have space, then download.
-    Skip download if file already exists (warm Lambda).
+    Skip the download when `local` already holds the object's current ETag
+    `etag` (warm Lambda). Returns the object's ETag.
     """
-    if os.path.exists(local):
-        return
     try:
         head = s3.head_object(Bucket=bucket, Key=key)
         size_mb = head["ContentLength"] // (1024 * 1024)
     except ClientError as e:
         raise RuntimeError(f"S3 head failed for s3://{bucket}/{key}: {e}")
+    if etag and head.get("ETag") == etag and os.path.exists(local):
+        return etag
+    if os.path.exists(local):
+        os.remove(local)  # stale copy from an earlier invocation; also frees its space
 
     free_mb = _tmp_free_mb()
     # Require file size + 256 MB safety margin
@@ -41,7 +105,10 @@ def _download_db_once(s3, bucket, key, local):
         raise OSError(f"Insufficient /tmp space: need ~{size_mb+256}MB, have {free_mb}MB")
 
     os.makedirs(os.path.dirname(local), exist_ok=True)
-    s3.download_file(bucket, key, local)
+    # Download beside the target and rename, so a failed transfer never looks warm
+    s3.download_file(bucket, key, local + ".part")
+    os.replace(local + ".part", local)
+    return head.get("ETag")
 
 def _cleanup_tmp(paths):
     for p in paths:
@@ -54,8 +121,20 @@ def _cleanup_tmp(paths):
 
 
 MODELS_PREFIX   = os.getenv("MODELS_PREFIX", "ml_out")
+# Dates manifest for MODELS_PREFIX (default <MODELS_INDEX_PREFIX>/<MODELS_PREFIX>.json,
+# outside MODELS_PREFIX/ so PreSyncDb only ever sees dated folders there). With
+# MODELS_INDEX_TRUST=1 the writers are known to keep it current and "latest" is one
+# GET; otherwise a LIST of only the prefixes after the newest indexed date backs it up.
+MODELS_INDEX_KEY    = os.getenv("MODELS_INDEX_KEY")
+MODELS_INDEX_PREFIX = os.getenv("MODELS_INDEX_PREFIX", "tiers/models_index")
+MODELS_INDEX_TRUST = os.getenv("MODELS_INDEX_TRUST", "0") == "1"
 SOURCE          = os.getenv("SOURCE", "s3_json")   # 's3_json' or 'sqlite'
 MODEL_NAMES_ENV = os.getenv("MODEL_NAMES")         # optional CSV override
+DEFAULT_MODEL_NAMES = [
+    "Model1_Random_forest_OldFeature4",
+    "Model5_TabNet",
+    "Model3_RandomForest_Oldfeature4_treeandNNBlend",
+]
 
 # =========================
 # Env / S3 Paths
@@ -77,39 +156,444 @@ DB_KEY     = (
 CONFIG_BUCKET = os.getenv("CONFIG_BUCKET", DB_BUCKET)
 CONFIG_KEY    = os.getenv("CONFIG_KEY",    "tiers/config.json")
 
+# Ticker this function rates; SPY keeps the flat summary_json/<date>.json layout,
+# equities use summary_json/<TICKER>/<date>.json
+TICKER         = os.getenv("TICKER", "SPY").upper()
+SUMMARY_PREFIX = os.getenv("SUMMARY_PREFIX") or ("summary_json" if TICKER == "SPY" else f"summary_json/{TICKER}")
+
 # Optional flags (must be exactly "1" to enable)
 WRITE_TIER_TO_S3 = os.getenv("WRITE_TIER_TO_S3", "0") == "1"
 STORE_IN_DB      = os.getenv("STORE_IN_DB", "0") == "1"
 
+# Optional delta shipping (must be exactly "1" to enable): STORE_IN_DB runs write the
+# rows they touched as a small JSON object under DB_DELTA_PREFIX instead of
+# re-uploading the whole DB; merge_db_deltas() (event {"merge_db_deltas": true},
+# e.g. from PreSync) applies them in one batch.
+SHIP_DB_DELTAS  = os.getenv("SHIP_DB_DELTAS", "0") == "1"
+DB_DELTA_PREFIX = os.getenv("DB_DELTA_PREFIX", "db/deltas/")
+
+# DB uploads are conditional on the ETag we downloaded; on conflict the run
+# re-downloads, re-applies its rows and retries up to DB_WRITE_RETRIES times
+DB_WRITE_RETRIES = int(os.getenv("DB_WRITE_RETRIES", "4"))
+# DBs larger than one part go up as an If-Match multipart upload (no 5 GB PUT limit)
+DB_PART_MB         = int(os.getenv("DB_PART_MB", "32"))
+DB_UPLOAD_WORKERS  = int(os.getenv("DB_UPLOAD_WORKERS", "4"))
+
 # Optional backfill/test override: "YYYY-MM-DD"
 AS_OF_OVERRIDE   = os.getenv("AS_OF_OVERRIDE")
 
 # Historical lookback for percentile histograms (cap for runtime)
 HIST_MAX_DAYS    = int(os.getenv("HIST_MAX_DAYS", "180"))  # typical: 90–270
 
-# Local temp path on Lambda
-DB_LOCAL = "/tmp/tradespark.db"
+# Optional incremental score-history cache (must be exactly "1" to enable).
+# Per-date long/short history scores are kept in S3 under TIER_HISTORY_PREFIX,
+# keyed by a hash of MODEL_NAMES + tiers config; each run only scores new dates.
+TIER_HISTORY_CACHE  = os.getenv("TIER_HISTORY_CACHE", "0") == "1"
+TIER_HISTORY_PREFIX = os.getenv("TIER_HISTORY_PREFIX", "tiers/score_history")
+
+# Rolled-up tiers timeline per ticker. Kept out of summary_json/: PreSyncDb merges
+# that prefix into the DB and expects only <date>.json there.
+TIMELINE_PREFIX = os.getenv("TIMELINE_PREFIX", "tiers/timeline")
+# Newest-summary pointer + manifest per ticker (see "Latest summary pointer")
+LATEST_SUMMARY_PREFIX = os.getenv("LATEST_SUMMARY_PREFIX", "tiers/latest")
+
+# Concurrent per-model JSON fetches (ml_out/<date>/<model>.json)
+S3_FETCH_WORKERS = int(os.getenv("S3_FETCH_WORKERS", "16"))
+S3_FETCH_RETRIES = int(os.getenv("S3_FETCH_RETRIES", "3"))
+
+# Optional slim read path (must be exactly "1" to enable): read-only runs use a
+# per-ticker extract of the DB published next to it (db/tradespark.<TICKER>.tiers.db),
+# when it matches the DB's ETag.
+USE_DB_EXTRACT = os.getenv("USE_DB_EXTRACT", "0") == "1"
+
+def _tier_extract_key(db_key, ticker):
+    return re.sub(r"(\.db)?$", f".{ticker}.tiers.db", db_key, count=1)
+
+DB_EXTRACT_KEY = os.getenv("DB_EXTRACT_KEY") or _tier_extract_key(DB_KEY, TICKER)
+
+# Optional columnar history (must be exactly "1" to enable): read model_eval_summary
+# history from a Parquet snapshot (one file per model and month) under COLUMNAR_PREFIX
+# when it matches the DB's ETag. Needs pyarrow in the Lambda layer.
+USE_COLUMNAR_HISTORY = os.getenv("USE_COLUMNAR_HISTORY", "0") == "1"
+COLUMNAR_PREFIX      = os.getenv("COLUMNAR_PREFIX", "db/columnar/model_eval_summary")
+
+# Warm-container reuse (on unless set to "0"): keep the downloaded DB/extract in
+# /tmp and the parsed config in memory across invocations, revalidated by ETag.
+# Runs that write the DB (STORE_IN_DB=1) still drop their local copy.
+WARM_CACHE = os.getenv("WARM_CACHE", "1") == "1"
+
+# Compact history frame: the tier path keeps only the engine's columns with
+# categorical model names. HISTORY_MAX_MB caps the frame; over it, metrics drop
+# to float32 and then the oldest dates go. Both can move scores slightly, so both
+# are logged and reported in the invocation's timing (history_float32,
+# history_dates_dropped). On Lambda the default is a quarter of the function's
+# memory: far above a normal frame (a few MB), so only a runaway history is cut
+# instead of the invocation running out of memory. "0" (the default elsewhere)
+# turns it off. HISTORY_FLOAT32=1 downcasts up front.
+def _default_history_max_mb():
+    memory_mb = os.getenv("AWS_LAMBDA_FUNCTION_MEMORY_SIZE", "")
+    return int(memory_mb) / 4 if memory_mb.isdigit() else 0.0
+
+HISTORY_MAX_MB  = float(os.getenv("HISTORY_MAX_MB") or _default_history_max_mb())
+HISTORY_FLOAT32 = os.getenv("HISTORY_FLOAT32", "0") == "1"
+
+# Per-invocation stage metrics (on unless set to "0"): one structured JSON log line
+# that is also a CloudWatch Embedded Metric Format document (namespace below,
+# dimension Ticker). PROFILE_RUN=1 (or event {"profile": true}) additionally runs
+# the invocation under cProfile + tracemalloc and uploads the dump to PROFILE_PREFIX.
+EMIT_METRICS      = os.getenv("EMIT_METRICS", "1") == "1"
+METRICS_NAMESPACE = os.getenv("METRICS_NAMESPACE", "Tradespark/Tiers")
+PROFILE_RUN       = os.getenv("PROFILE_RUN", "0") == "1"
+PROFILE_PREFIX    = os.getenv("PROFILE_PREFIX", "tiers/profiles")
+
+# Local temp paths on Lambda
+DB_LOCAL         = "/tmp/tradespark.db"
+DB_EXTRACT_LOCAL = f"/tmp/tradespark.{TICKER}.tiers.db"
 
 
 # =========================
 # S3 client
 # =========================
-s3 = boto3.client("s3", region_name=AWS_REGION)
+# One client (thread-safe) with a connection pool sized for the fetch workers.
+# Clients are not fork-safe: forked batch workers build their own.
+def _new_s3_client():
+    return boto3.client("s3", region_name=AWS_REGION,
+                        config=Config(max_pool_connections=max(10, S3_FETCH_WORKERS)))
+
+s3 = _new_s3_client()
+
+def _supports_conditional_put():
+    """True when this botocore can send If-Match/If-None-Match on PutObject."""
+    return "IfMatch" in s3.meta.service_model.operation_model("PutObject").input_shape.members
+
+def _guarded_put_kwargs(key, etag):
+    """
+    PutObject kwargs replacing only the version we read (If-Match `etag`; If-None-Match
+    when there was none). Raises rather than fall back to an unguarded PUT.
+    """
+    if not _supports_conditional_put():
+        raise RuntimeError(f"botocore {botocore_version} cannot send If-Match; refusing an unguarded "
+                           f"write of s3://{DB_BUCKET}/{key} (upgrade boto3/botocore)")
+    return {"IfMatch": etag} if etag else {"IfNoneMatch": "*"}
+
+def _is_precondition_conflict(e):
+    return e.response.get("Error", {}).get("Code") in ("PreconditionFailed", "412",
+                                                       "ConditionalRequestConflict", "409")
+
+_db_etag = None  # ETag of DB_KEY held at DB_LOCAL (None until downloaded)
+_batch_db_etags = {}  # DB path → ETag a batch parent downloaded for its read-only workers
 
 def download_db():
-    _download_db_once(s3, DB_BUCKET, DB_KEY, DB_LOCAL)
-    print(f"✅ DB ready at {DB_LOCAL}")
+    global _db_etag
+    if DB_LOCAL in _batch_db_etags and os.path.exists(DB_LOCAL):
+        # Batch worker: sibling workers read the same file, so never replace it mid-batch
+        _db_etag = _batch_db_etags[DB_LOCAL]
+        _timings["db_cache"] = "shared"
+        print(f"✅ DB ready at {DB_LOCAL} (downloaded once for the batch)")
+        return
+    t0 = time.perf_counter()
+    had_local = WARM_CACHE and os.path.exists(DB_LOCAL)
+    etag = _download_db_once(s3, DB_BUCKET, DB_KEY, DB_LOCAL, _db_etag if WARM_CACHE else None)
+    hit = had_local and etag is not None and etag == _db_etag
+    _db_etag = etag
+    _timings["db_ms"] = round(_timings.get("db_ms", 0.0) + (time.perf_counter() - t0) * 1000.0, 1)
+    _timings["db_cache"] = "hit" if hit else "miss"
+    print(f"✅ DB ready at {DB_LOCAL}" + (" (warm, ETag unchanged)" if hit else ""))
+
+
+# =========================
+# Slim read-only DB extract
+# =========================
+# The tier builder only reads model_eval_summary (a few metric columns of its own
+# models), daily_tiers and the TICKER rows of price_history. A full-DB reader can
+# publish exactly that as DB_EXTRACT_KEY (one per ticker, so tickers sharing a DB
+# don't overwrite each other's), stamped with the source DB's ETag, so later
+# read-only runs download a few MB instead of the whole multi-ticker file.
+EXTRACT_METRIC_COLS = [f"y{k}_{m}" for k in (1, 2, 3, 7, 8) for m in ("pred", "rmse_pct", "acc")]
+
+def ensure_tier_indexes(conn):
+    """
+    Create the indexes behind the tier reads (no-op once present; SQLite keeps
+    them current on every upsert):
+      model_eval_summary(model_name, as_of_date_today, <metric cols>) covers the history window,
+      price_history(ticker, date) and daily_tiers(as_of_date_today) serve get_yesterday_data.
+    """
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    if "model_eval_summary" in tables:
+        cols = {r[1] for r in conn.execute("PRAGMA table_info(model_eval_summary)")}
+        covered = ["model_name", "as_of_date_today"] + [c for c in EXTRACT_METRIC_COLS if c in cols]
+        conn.execute(f"CREATE INDEX IF NOT EXISTS ix_model_eval_summary_history "
+                     f"ON model_eval_summary ({', '.join(covered)})")
+    if "price_history" in tables:
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_price_history_ticker_date ON price_history (ticker, date)")
+    if "daily_tiers" in tables:
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_daily_tiers_date ON daily_tiers (as_of_date_today)")
+    conn.commit()
+
+def build_tier_extract(src_path, dst_path, model_names, source_etag):
+    """Write the tiers-only subset of `src_path` into a fresh SQLite file at `dst_path`."""
+    if os.path.exists(dst_path):
+        os.remove(dst_path)
+    with closing(sqlite3.connect(dst_path)) as out:
+        out.execute("ATTACH DATABASE ? AS src", (src_path,))
+        src_cols = {r[1] for r in out.execute("PRAGMA src.table_info(model_eval_summary)")}
+        metric_cols = [c for c in EXTRACT_METRIC_COLS if c in src_cols]
+        cols = ["as_of_date_today", "model_name"] + metric_cols
+        out.execute(f"""
+            CREATE TABLE model_eval_summary (
+                as_of_date_today TEXT, model_name TEXT,
+                {", ".join(f"{c} REAL" for c in metric_cols)},
+                PRIMARY KEY (as_of_date_today, model_name)
+            )""")
+        out.execute(
+            f"""INSERT INTO model_eval_summary ({",".join(cols)})
+                SELECT {",".join(cols)} FROM src.model_eval_summary
+                WHERE model_name IN ({",".join(["?"]*len(model_names))})""",
+            list(model_names))
+
+        # Copy the small side tables with their original DDL
+        for table, where, params in (("daily_tiers", "", []),
+                                     ("price_history", "WHERE ticker = ?", [TICKER])):
+            row = out.execute("SELECT sql FROM src.sqlite_master WHERE type='table' AND name=?",
+                              (table,)).fetchone()
+            if row and row[0]:
+                out.execute(row[0])
+                out.execute(f"INSERT INTO main.{table} SELECT * FROM src.{table} {where}", params)
+
+        ensure_tier_indexes(out)
+        out.execute("CREATE TABLE _extract_meta (key TEXT PRIMARY KEY, value TEXT)")
+        out.executemany("INSERT INTO _extract_meta VALUES (?, ?)", [
+            ("source_key", DB_KEY),
+            ("source_etag", source_etag or ""),
+            ("ticker", TICKER),
+            ("models", ",".join(model_names)),
+            ("created_at", datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")),
+        ])
+        out.commit()
+        out.execute("DETACH DATABASE src")
+
+_extract_etag = None  # ETag of DB_EXTRACT_KEY held at DB_EXTRACT_LOCAL
+
+def publish_tier_extract(model_names):
+    """Build the extract from the downloaded DB and upload it next to DB_KEY."""
+    global _extract_etag
+    _extract_etag = None  # DB_EXTRACT_LOCAL is about to be rebuilt
+    download_db()
+    build_tier_extract(DB_LOCAL, DB_EXTRACT_LOCAL, model_names, _db_etag)
+    s3.upload_file(DB_EXTRACT_LOCAL, DB_BUCKET, DB_EXTRACT_KEY, ExtraArgs={
+        "Metadata": {"source-etag": (_db_etag or "").strip('"'), "ticker": TICKER,
+                     "models": ",".join(model_names)},
+        "ContentType": "application/x-sqlite3",
+    })
+    size_mb = os.path.getsize(DB_EXTRACT_LOCAL) / (1024 * 1024)
+    print(f"📤 Published {size_mb:.1f}MB tiers extract to s3://{DB_BUCKET}/{DB_EXTRACT_KEY}")
+    return DB_EXTRACT_LOCAL
+
+def _download_fresh_extract(model_names):
+    """Download DB_EXTRACT_KEY if it was built from the current DB object; else None."""
+    global _extract_etag
+    try:
+        db_head = s3.head_object(Bucket=DB_BUCKET, Key=DB_KEY)
+        ex_head = s3.head_object(Bucket=DB_BUCKET, Key=DB_EXTRACT_KEY)
+    except ClientError as e:
+        print(f"ℹ️ No usable tiers extract ({e.response.get('Error', {}).get('Code')}); using full DB.")
+        return None
+    meta = ex_head.get("Metadata") or {}
+    if meta.get("source-etag") != db_head.get("ETag", "").strip('"'):
+        print("ℹ️ Tiers extract is stale (source ETag changed); using full DB.")
+        return None
+    if meta.get("ticker") != TICKER:
+        print(f"ℹ️ Tiers extract was built for {meta.get('ticker') or 'another ticker'}, not {TICKER}; using full DB.")
+        return None
+    if not set(model_names) <= set((meta.get("models") or "").split(",")):
+        print("ℹ️ Tiers extract lacks requested models; using full DB.")
+        return None
+    if WARM_CACHE and _extract_etag == ex_head.get("ETag") and os.path.exists(DB_EXTRACT_LOCAL):
+        _timings["extract_cache"] = "hit"
+        print(f"✅ Tiers extract ready at {DB_EXTRACT_LOCAL} (warm, ETag unchanged)")
+        return DB_EXTRACT_LOCAL
+    _cleanup_tmp([DB_EXTRACT_LOCAL])  # stale copy; also frees its space
+    # Same headroom as _download_db_once (size + 256 MB); short of it, the full-DB path decides
+    size_mb = ex_head["ContentLength"] // (1024 * 1024)
+    free_mb = _tmp_free_mb()
+    if free_mb < size_mb + 256:
+        print(f"⚠️ Insufficient /tmp space for tiers extract: need ~{size_mb+256}MB, have {free_mb}MB; using full DB.")
+        return None
+    try:
+        s3.download_file(DB_BUCKET, DB_EXTRACT_KEY, DB_EXTRACT_LOCAL + ".part")
+    except OSError as e:
+        _cleanup_tmp([DB_EXTRACT_LOCAL + ".part"])
+        print(f"⚠️ Tiers extract download failed ({e}); using full DB.")
+        return None
+    os.replace(DB_EXTRACT_LOCAL + ".part", DB_EXTRACT_LOCAL)
+    _extract_etag = ex_head.get("ETag")
+    _timings["extract_cache"] = "miss"
+    print(f"✅ Tiers extract ready at {DB_EXTRACT_LOCAL} ({ex_head['ContentLength'] // 1024}KB)")
+    return DB_EXTRACT_LOCAL
+
+def download_read_db(model_names):
+    """
+    Local SQLite path for read-only queries: the fresh tiers extract when
+    USE_DB_EXTRACT=1 (and one exists), otherwise the full DB download.
+    """
+    if USE_DB_EXTRACT:
+        path = _download_fresh_extract(model_names)
+        if path:
+            return path
+    download_db()
+    return DB_LOCAL
 
 
-def load_config_from_s3():
+# =========================
+# Columnar history snapshot
+# =========================
+# model_eval_summary is wide (~100 columns) but the tiers only read the
+# EXTRACT_METRIC_COLS. The snapshot stores just those, as one Parquet file per
+# model and month, for every model in the table, plus a _manifest.json (written
+# last) stamped with the DB ETag, so tickers sharing the DB share one snapshot:
+#   <COLUMNAR_PREFIX>/model_name=<model>/month=YYYY-MM/part-0.parquet
+def _pyarrow():
+    """(pyarrow, pyarrow.parquet) or (None, None) when the layer does not ship it."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        return pa, pq
+    except ImportError:
+        return None, None
+
+def _columnar_part_key(model_name, month):
+    return f"{COLUMNAR_PREFIX.rstrip('/')}/model_name={model_name}/month={month}/part-0.parquet"
+
+def _columnar_manifest_key():
+    return f"{COLUMNAR_PREFIX.rstrip('/')}/_manifest.json"
+
+def publish_columnar_snapshot():
+    """
+    Write the per-model/month Parquet snapshot of model_eval_summary from the downloaded DB.
+    Every model in the table is included, so one manifest serves every ticker reading the DB.
+    """
+    pa, pq = _pyarrow()
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed; cannot publish columnar snapshot")
+    download_db()
+    with closing(sqlite3.connect(DB_LOCAL)) as conn:
+        src_cols = {r[1] for r in conn.execute("PRAGMA table_info(model_eval_summary)")}
+        metric_cols = [c for c in EXTRACT_METRIC_COLS if c in src_cols]
+        snap = pd.read_sql_query(
+            f"""SELECT as_of_date_today, model_name, {", ".join(metric_cols)}
+                FROM model_eval_summary
+                ORDER BY model_name, as_of_date_today ASC""",
+            conn)
+    for c in metric_cols:
+        snap[c] = pd.to_numeric(snap[c], errors="coerce").astype("float64")
+    months = pd.to_datetime(snap["as_of_date_today"], errors="coerce").dt.strftime("%Y-%m")
+
+    partitions = {m: [] for m in snap["model_name"].unique()}
+    for (model_name, month), part in snap.groupby([snap["model_name"], months], sort=True):
+        sink = pa.BufferOutputStream()
+        pq.write_table(pa.Table.from_pandas(part, preserve_index=False), sink)
+        s3.put_object(Bucket=DB_BUCKET, Key=_columnar_part_key(model_name, month),
+                      Body=sink.getvalue().to_pybytes(),
+                      ContentType="application/vnd.apache.parquet")
+        partitions[model_name].append(month)
+
+    manifest = {
+        "source_key": DB_KEY,
+        "source_etag": (_db_etag or "").strip('"'),
+        "columns": ["as_of_date_today", "model_name"] + metric_cols,
+        "partitions": partitions,
+        "rows": int(len(snap)),
+        "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+    s3.put_object(Bucket=DB_BUCKET, Key=_columnar_manifest_key(),
+                  Body=json.dumps(manifest, separators=(",", ":")).encode("utf-8"),
+                  ContentType="application/json")
+    n_parts = sum(len(v) for v in partitions.values())
+    print(f"📤 Published columnar snapshot: {n_parts} partition(s), {len(snap)} row(s) "
+          f"under s3://{DB_BUCKET}/{COLUMNAR_PREFIX}/")
+    return manifest
+
+def load_history_from_columnar(model_names, asof_str, lookback_days):
+    """
+    model_eval_summary rows for `model_names` dated in [asof - lookback_days, asof),
+    read from the columnar snapshot with only the needed columns. Returns None when
+    pyarrow is missing or the snapshot is absent/stale, so callers fall back to SQLite.
+    """
+    pa, pq = _pyarrow()
+    if pa is None:
+        print("ℹ️ pyarrow not available; reading history from SQLite.")
+        return None
     try:
-        obj = s3.get_object(Bucket=CONFIG_BUCKET, Key=CONFIG_KEY)
-        cfg = json.loads(obj["Body"].read())
-        print(f"✅ Loaded config from s3://{CONFIG_BUCKET}/{CONFIG_KEY}")
-        return cfg
+        db_head = s3.head_object(Bucket=DB_BUCKET, Key=DB_KEY)
+        manifest = json.loads(s3.get_object(Bucket=DB_BUCKET, Key=_columnar_manifest_key())["Body"].read())
+    except ClientError as e:
+        print(f"ℹ️ No usable columnar snapshot ({e.response.get('Error', {}).get('Code')}); reading SQLite.")
+        return None
+    if manifest.get("source_etag") != db_head.get("ETag", "").strip('"'):
+        print("ℹ️ Columnar snapshot is stale (source ETag changed); reading SQLite.")
+        return None
+    partitions = manifest.get("partitions") or {}
+    if not set(model_names) <= set(partitions):
+        print("ℹ️ Columnar snapshot lacks requested models; reading SQLite.")
+        return None
+
+    asof = pd.to_datetime(asof_str)
+    lo = asof - pd.Timedelta(days=lookback_days)
+    lo_str, hi_str = lo.strftime("%Y-%m-%d"), asof.strftime("%Y-%m-%d")
+    months = set(pd.period_range(lo, asof, freq="M").strftime("%Y-%m"))
+    keys = [_columnar_part_key(m, ym) for m in model_names
+            for ym in sorted(months & set(partitions[m]))]
+    if not keys:
+        return pd.DataFrame(columns=manifest.get("columns") or ["as_of_date_today", "model_name"])
+
+    columns = manifest["columns"]
+    # Month partitions prune files; row filters prune row groups inside them.
+    # The ISO date strings compare like dates; the exact window is re-applied below.
+    filters = [("as_of_date_today", ">=", lo_str), ("as_of_date_today", "<", hi_str)]
+
+    def read_part(body):
+        return pq.read_table(pa.BufferReader(body), columns=columns, filters=filters)
+
+    tables, _ = fetch_s3_json_many(keys, parse=read_part)
+    failed = [k for k, t in zip(keys, tables) if isinstance(t, Exception)]
+    if failed:
+        print(f"⚠️ Columnar snapshot read failed for {len(failed)} partition(s) "
+              f"(e.g. {failed[0]}: {tables[keys.index(failed[0])]}); reading SQLite.")
+        return None
+    hist_df = pa.concat_tables(tables).to_pandas()
+    hist_df = hist_df.sort_values("as_of_date_today", kind="mergesort").reset_index(drop=True)
+    hist_df["as_of_date_today"] = pd.to_datetime(hist_df["as_of_date_today"])
+    hist_df = hist_df[(hist_df["as_of_date_today"] >= lo) & (hist_df["as_of_date_today"] < asof)]
+    print(f"✅ Loaded {len(hist_df)} history row(s) from {len(keys)} columnar partition(s)")
+    return hist_df
+
+
+_cfg_cache = {}  # config key → (ETag, raw bytes), revalidated with If-None-Match
+
+def load_config_from_s3(key=None):
+    key = key or CONFIG_KEY
+    t0 = time.perf_counter()
+    cached = _cfg_cache.get(key) if WARM_CACHE else None
+    try:
+        try:
+            kw = {"IfNoneMatch": cached[0]} if cached and cached[0] else {}
+            obj = s3.get_object(Bucket=CONFIG_BUCKET, Key=key, **kw)
+            body = obj["Body"].read()
+            _cfg_cache[key] = (obj.get("ETag"), body)
+            _timings["config_cache"] = "miss"
+            print(f"✅ Loaded config from s3://{CONFIG_BUCKET}/{key}")
+        except ClientError as e:
+            if not cached or e.response.get("Error", {}).get("Code") not in ("304", "NotModified"):
+                raise
+            body = cached[1]
+            _timings["config_cache"] = "hit"
+            print(f"✅ Config s3://{CONFIG_BUCKET}/{key} unchanged (ETag match); reusing")
+        return json.loads(body)  # fresh dict per call; callers may mutate it
     except Exception as e:
-        print(f"⚠️ Could not load config s3://{CONFIG_BUCKET}/{CONFIG_KEY}: {e}")
+        print(f"⚠️ Could not load config s3://{CONFIG_BUCKET}/{key}: {e}")
         return {}
+    finally:
+        _timings["config_ms"] = round(_timings.get("config_ms", 0.0) + (time.perf_counter() - t0) * 1000.0, 1)
 
 _cfg = {}
 def _cfg_get(path, default):
@@ -152,70 +636,170 @@ def list_available_dates_from_s3(bucket: str, base_prefix: str) -> list[str]:
             break
     return sorted(set(dates))
 
+def _fetch_json_with_retry(bucket, key, retries, parse=json.loads):
+    """GET + parse one object (JSON by default); retry transient errors with jittered backoff."""
+    for attempt in range(retries + 1):
+        try:
+            obj = s3.get_object(Bucket=bucket, Key=key)
+            return parse(obj["Body"].read())
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code")
+            if code in ("NoSuchKey", "404", "AccessDenied", "403") or attempt == retries:
+                raise
+        except ValueError:
+            raise  # corrupt payload will not fix itself
+        except Exception:
+            if attempt == retries:
+                raise
+        time.sleep(min(2.0, 0.1 * (2 ** attempt)) * (0.5 + random.random()))
+
+def fetch_s3_json_many(keys, bucket=None, workers=None, retries=None, parse=json.loads):
+    """
+    Fetch many JSON objects concurrently on the shared S3 client.
+    Returns (results, stats): results[i] is the parsed object for keys[i], or the
+    exception that key failed with; stats holds counts and latency percentiles (ms).
+    `parse` turns the raw bytes into the result (e.g. a Parquet reader).
+    """
+    bucket = bucket or DB_BUCKET
+    workers = S3_FETCH_WORKERS if workers is None else workers
+    retries = S3_FETCH_RETRIES if retries is None else retries
+    latencies = [0.0] * len(keys)
+
+    def one(i):
+        t0 = time.perf_counter()
+        try:
+            return _fetch_json_with_retry(bucket, keys[i], retries, parse)
+        except Exception as e:
+            return e
+        finally:
+            latencies[i] = (time.perf_counter() - t0) * 1000.0
+
+    t0 = time.perf_counter()
+    if len(keys) <= 1 or workers <= 1:
+        results = [one(i) for i in range(len(keys))]
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(keys))) as pool:
+            results = list(pool.map(one, range(len(keys))))   # map preserves key order
+    wall_ms = (time.perf_counter() - t0) * 1000.0
+
+    stats = {"keys": len(keys), "failed": sum(isinstance(r, Exception) for r in results),
+             "wall_ms": round(wall_ms, 1)}
+    if latencies:
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        stats.update(p50_ms=round(float(p50), 1), p90_ms=round(float(p90), 1),
+                     p99_ms=round(float(p99), 1), max_ms=round(max(latencies), 1))
+    print(f"📊 S3 fetch: {stats['keys']} key(s), {stats['failed']} missing/failed, "
+          f"{stats['wall_ms']:.0f}ms wall, p50={stats.get('p50_ms')}ms p90={stats.get('p90_ms')}ms "
+          f"p99={stats.get('p99_ms')}ms")
+    return results, stats
+
+def _eval_row_from_json(as_of_date, model_name, data):
+    """One model_eval_summary-shaped row from a per-model ml_out JSON payload."""
+    preds = data.get("predictions", {}) or {}
+    # v1 schema has metrics.rmse_pct & metrics.acc_pct
+    metrics = data.get("metrics", {}) or {}
+    rmse_pct = metrics.get("rmse_pct", {}) or {}
+    acc_pct  = metrics.get("acc_pct",  {}) or {}
+    # legacy absolute RMSE fallback under top-level "rmse"
+    rmse_abs = data.get("rmse", {}) or {}
+
+    row = {"as_of_date_today": as_of_date, "model_name": model_name}
+
+    # predictions
+    for i in range(1, 9):
+        yk = f"y{i}"
+        if yk in preds:
+            row[f"{yk}_pred"] = float(preds[yk])
+
+    # rmse absolute + pct + acc (prefer explicit metrics; fallback from legacy rmse)
+    for i in range(1, 9):
+        yk = f"y{i}"
+        # absolute RMSE
+        if yk in rmse_abs:
+            row[f"{yk}_rmse"] = float(rmse_abs[yk])
+        # pct RMSE
+        if yk in rmse_pct:
+            row[f"{yk}_rmse_pct"] = float(rmse_pct[yk])
+        elif yk in rmse_abs:
+            # heuristic fallback if only absolute RMSE provided
+            row[f"{yk}_rmse_pct"] = float(rmse_abs[yk]) * 100.0
+        # acc
+        if yk in acc_pct:
+            row[f"{yk}_acc"] = float(acc_pct[yk])
+        elif yk in rmse_abs:
+            # simple fallback consistent with your older code path
+            r = float(rmse_abs[yk])
+            row[f"{yk}_acc"] = max(0.0, 100.0 - r * 10.0)
+
+    # top_features can be list([{name,importance},...]) OR dict(feature_1={...}, ...)
+    tf = data.get("top_features", None)
+    top_pairs = []
+    if isinstance(tf, list):
+        top_pairs = [(str(item.get("name")), float(item.get("importance", 0.0))) for item in tf]
+    elif isinstance(tf, dict):
+        # sort keys like feature_1, feature_2, ...
+        for k in sorted(tf.keys(), key=lambda x: int(re.sub(r"\D+", "", x) or "9999")):
+            item = tf[k] or {}
+            top_pairs.append((str(item.get("name")), float(item.get("importance", 0.0))))
+
+    # pad/trim to 20
+    top_pairs = (top_pairs + [("_pad_", 0.0)]*20)[:20]
+    for i, (nm, imp) in enumerate(top_pairs, start=1):
+        row[f"top_feature_{i}_name"] = nm
+        row[f"top_feature_{i}_importance"] = imp
+    return row
+
 def load_eval_from_s3_for_dates(as_of_dates: list[str], model_names: list[str]) -> pd.DataFrame:
     """
     Bulk loader: same schema as load_eval_from_s3 but across many dates.
+    All (date, model) objects are fetched concurrently; row order is date-major as before.
     """
-    rows = []
-    for as_of_date in as_of_dates:
-        base = f"{MODELS_PREFIX.rstrip('/')}/{as_of_date}/"
-        for m in model_names:
-            key = f"{base}{m}.json"
-            try:
-                obj = s3.get_object(Bucket=DB_BUCKET, Key=key)
-                data = json.loads(obj["Body"].read())
-            except Exception as e:
-                # Skip silently if missing for this date/model
-                continue
+    pairs = [(d, m) for d in as_of_dates for m in model_names]
+    keys = [f"{MODELS_PREFIX.rstrip('/')}/{d}/{m}.json" for d, m in pairs]
+    results, _ = fetch_s3_json_many(keys)
 
-            preds   = data.get("predictions", {}) or {}
-            metrics = data.get("metrics", {}) or {}
-            rmse_pct = metrics.get("rmse_pct", {}) or {}
-            acc_pct  = metrics.get("acc_pct",  {}) or {}
-            rmse_abs = data.get("rmse", {}) or {}
-
-            row = {"as_of_date_today": as_of_date, "model_name": m}
-
-            for i in range(1, 9):
-                yk = f"y{i}"
-                if yk in preds:
-                    row[f"{yk}_pred"] = float(preds[yk])
-
-            for i in range(1, 9):
-                yk = f"y{i}"
-                if yk in rmse_abs:
-                    row[f"{yk}_rmse"] = float(rmse_abs[yk])
-                if yk in rmse_pct:
-                    row[f"{yk}_rmse_pct"] = float(rmse_pct[yk])
-                elif yk in rmse_abs:
-                    row[f"{yk}_rmse_pct"] = float(rmse_abs[yk]) * 100.0
-                if yk in acc_pct:
-                    row[f"{yk}_acc"] = float(acc_pct[yk])
-                elif yk in rmse_abs:
-                    r = float(rmse_abs[yk])
-                    row[f"{yk}_acc"] = max(0.0, 100.0 - r * 10.0)
-
-            tf = data.get("top_features", None)
-            top_pairs = []
-            if isinstance(tf, list):
-                top_pairs = [(str(item.get("name")), float(item.get("importance", 0.0))) for item in tf]
-            elif isinstance(tf, dict):
-                for k in sorted(tf.keys(), key=lambda x: int(re.sub(r"\D+", "", x) or "9999")):
-                    item = tf[k] or {}
-                    top_pairs.append((str(item.get("name")), float(item.get("importance", 0.0))))
-
-            top_pairs = (top_pairs + [("_pad_", 0.0)]*20)[:20]
-            for i, (nm, imp) in enumerate(top_pairs, start=1):
-                row[f"top_feature_{i}_name"] = nm
-                row[f"top_feature_{i}_importance"] = imp
-
-            rows.append(row)
+    rows = []
+    for (as_of_date, m), data in zip(pairs, results):
+        if isinstance(data, Exception):
+            # Skip silently if missing for this date/model
+            continue
+        rows.append(_eval_row_from_json(as_of_date, m, data))
 
     df = pd.DataFrame(rows)
     if not df.empty:
         df["as_of_date_today"] = pd.to_datetime(df["as_of_date_today"])
     return df
 
+def _engine_columns(conn):
+    """model_eval_summary columns the engine reads, in table order."""
+    need = {"as_of_date_today", "model_name", *EXTRACT_METRIC_COLS}
+    return [r[1] for r in conn.execute("PRAGMA table_info(model_eval_summary)") if r[1] in need]
+
+def read_history_window(conn, model_names, as_of_str, lookback_days):
+    """
+    model_eval_summary rows for `model_names` in [as_of - lookback_days, as_of),
+    only the columns the engine reads. Dates are stored as ISO text, so bare range
+    predicates (no DATE() around the column) let SQLite seek
+    ix_model_eval_summary_history instead of scanning the table.
+    """
+    cols = _engine_columns(conn)
+    asof = pd.to_datetime(as_of_str)
+    lo = (asof - pd.Timedelta(days=lookback_days)).strftime("%Y-%m-%d")
+    df = pd.read_sql_query(
+        f"""
+        SELECT {", ".join(cols) or "*"}
+        FROM model_eval_summary
+        WHERE model_name IN ({",".join(["?"]*len(model_names))})
+          AND as_of_date_today >= ? AND as_of_date_today < ?
+        ORDER BY as_of_date_today ASC
+        """,
+        conn,
+        params=list(model_names) + [lo, asof.strftime("%Y-%m-%d")]
+    )
+    df["as_of_date_today"] = pd.to_datetime(df["as_of_date_today"])
+    # 'YYYY-MM-DD HH:MM:SS' rows on the as-of day sort after the bare date string
+    return df[df["as_of_date_today"] < asof]
+
 def load_history_from_db(model_names, as_of_str, lookback_days):
     """
     Read historical rows (< as_of_str) for the given models from SQLite DB in S3.
@@ -223,47 +807,46 @@ def load_history_from_db(model_names, as_of_str, lookback_days):
     """
     # Ensure local DB copy exists
     download_db()
-    conn = sqlite3.connect(DB_LOCAL)
-
-    try:
-        df = pd.read_sql_query(
-            f"""
-            SELECT *
-            FROM model_eval_summary
-            WHERE model_name IN ({",".join(["?"]*len(model_names))})
-              AND DATE(as_of_date_today) < DATE(?)
-            ORDER BY as_of_date_today ASC
-            """,
-            conn,
-            params=model_names + [as_of_str]
-        )
-    finally:
-        conn.close()
+    with closing(sqlite3.connect(DB_LOCAL)) as conn:
+        return read_history_window(conn, model_names, as_of_str, lookback_days)
 
-    if df.empty:
-        return df
-
-    df["as_of_date_today"] = pd.to_datetime(df["as_of_date_today"])
-
-    # Keep only the trailing `lookback_days` worth of distinct dates (like your local script)
-    min_keep_date = pd.to_datetime(as_of_str) - pd.Timedelta(days=lookback_days)
-    df = df[df["as_of_date_today"] >= min_keep_date]
-
-    # Keep just the columns you rely on later (safe if others are present)
-    need = {"as_of_date_today","model_name"}
-    for k in [1,2,3,7,8]:
-        need.update({f"y{k}_pred", f"y{k}_rmse_pct", f"y{k}_acc"})
-    cols = [c for c in df.columns if c in need]
-    if cols:
-        df = df[cols].copy()
-
-    return df
+def compact_history_frame(df, max_mb=None, float32=None):
+    """
+    The engine's view of `df`: as_of_date_today, model_name (categorical) and the
+    EXTRACT_METRIC_COLS, nothing else. Float metric columns stay float64 (object
+    columns are left alone, their None/NaN defaults differ) unless `float32` or the
+    frame is over `max_mb`; if float32 is not enough, the oldest dates are dropped.
+    Either is recorded in _timings so the invocation's result shows it.
+    """
+    max_mb = HISTORY_MAX_MB if max_mb is None else max_mb
+    float32 = HISTORY_FLOAT32 if float32 is None else float32
+    keep = {"as_of_date_today", "model_name", *EXTRACT_METRIC_COLS}
+    df = df[[c for c in df.columns if c in keep]].copy()
+    df["model_name"] = df["model_name"].astype("category")
+    floats = [c for c in df.columns if df[c].dtype == "float64"]
+
+    def size_mb():
+        return df.memory_usage(index=True, deep=True).sum() / 2**20
+
+    if max_mb and size_mb() > max_mb and not float32:
+        print(f"⚠️ History frame {size_mb():.1f}MB > HISTORY_MAX_MB={max_mb:g}; metrics → float32")
+        float32 = True
+    if float32 and floats:
+        df[floats] = df[floats].astype("float32")
+        _timings["history_float32"] = True
+    if max_mb and size_mb() > max_mb:
+        dates = df["as_of_date_today"].drop_duplicates().sort_values()
+        keep_n = max(1, int(len(dates) * max_mb / size_mb()))
+        print(f"⚠️ History frame still {size_mb():.1f}MB; keeping the latest {keep_n} of {len(dates)} date(s)")
+        df = df[df["as_of_date_today"] >= dates.iloc[-keep_n]]
+        _timings["history_dates_dropped"] = _timings.get("history_dates_dropped", 0) + len(dates) - keep_n
+    return df.reset_index(drop=True)
 
 
 # =========================
 # Math / helpers
 # =========================
-def _to_float(x, default=np.nan):
+def _to_float(x, default=float("nan")):
     try: return float(x)
     except Exception: return default
 
@@ -391,6 +974,284 @@ def tier_thresholds(hist, top_cum_pcts):
     if len(h) == 0: return [np.nan]*len(top_cum_pcts)
     return [float(np.nanpercentile(h, 100 - p)) for p in top_cum_pcts]
 
+# =========================
+# Rolling order statistics
+# =========================
+class RollingOrderStats:
+    """
+    Sorted-array window over a numeric stream for the tier helpers above.
+
+    push() finds its slot with a binary search (and evicts the oldest value
+    once `maxlen` is reached), but the list insert/delete shifts the tail, so
+    an update is O(n): one memmove, cheap at tier-window sizes. Median and
+    percentile queries are O(1), MAD and rank O(log n); all return the same
+    floats as robust_z / norm_conf / percentile_rank / assign_tier /
+    tier_thresholds on the same window.
+    NaN values occupy a window slot but are ignored by the statistics.
+    """
+
+    def __init__(self, values=(), maxlen=None):
+        self.maxlen = maxlen
+        self._raw = deque()      # insertion order (for eviction + mean/std fallback)
+        self._sorted = []        # non-NaN values, ascending
+        for v in values:
+            self.push(v)
+
+    def __len__(self):
+        return len(self._sorted)
+
+    def push(self, value):
+        value = _to_float(value)
+        if self.maxlen is not None and len(self._raw) >= self.maxlen:
+            old = self._raw.popleft()
+            if not math.isnan(old):
+                del self._sorted[bisect.bisect_left(self._sorted, old)]
+        self._raw.append(value)
+        if not math.isnan(value):
+            bisect.insort(self._sorted, value)
+
+    def values(self):
+        """Non-NaN values in insertion order."""
+        return [v for v in self._raw if not math.isnan(v)]
+
+    def median(self):
+        s = self._sorted
+        n = len(s)
+        if n == 0: return np.nan
+        return (s[(n - 1) // 2] + s[n // 2]) / 2.0
+
+    def _abs_dev_kth(self, center, k):
+        """k-th smallest |x - center| (0-based): merge-select over both sides of center."""
+        s = self._sorted
+        p = bisect.bisect_right(s, center)
+        n_left, n_right = p, len(s) - p
+        left  = lambda j: abs(s[p - 1 - j] - center)   # ascending in j
+        right = lambda j: abs(s[p + j] - center)       # ascending in j
+        take = k + 1
+        lo, hi = max(0, take - n_right), min(take, n_left)
+        while lo < hi:
+            i = (lo + hi) // 2
+            if left(i) < right(take - i - 1):
+                lo = i + 1
+            else:
+                hi = i
+        i, j = lo, take - lo
+        best = -np.inf
+        if i > 0: best = max(best, left(i - 1))
+        if j > 0: best = max(best, right(j - 1))
+        return best
+
+    def mad(self):
+        n = len(self._sorted)
+        if n == 0: return np.nan
+        med = self.median()
+        return (self._abs_dev_kth(med, (n - 1) // 2) + self._abs_dev_kth(med, n // 2)) / 2.0
+
+    def percentile(self, pct):
+        """np.nanpercentile(window, pct) with the default 'linear' method."""
+        s = self._sorted
+        n = len(s)
+        if n == 0: return np.nan
+        virtual = (n - 1) * (pct / 100)
+        if virtual >= n - 1:
+            prev, nxt = -1, -1
+        elif virtual < 0:
+            prev, nxt = 0, 0
+        else:
+            prev = int(math.floor(virtual))
+            nxt = prev + 1
+        gamma = virtual - prev
+        a, b = s[prev], s[nxt]
+        diff = b - a
+        if gamma >= 0.5:
+            return b - diff * (1 - gamma)
+        return a + diff * gamma
+
+    def rank_pct(self, value):
+        """percentile_rank(window, value): share of values <= value, in percent."""
+        n = len(self._sorted)
+        if n == 0: return np.nan
+        if math.isnan(value): return 0.0
+        return float(bisect.bisect_right(self._sorted, value) / n * 100.0)
+
+    def robust_z(self, value):
+        n = len(self._sorted)
+        if n >= 10:
+            mad = self.mad()
+            if mad >= 1e-9:
+                return 0.6745 * (value - self.median()) / mad
+        # Mean/std fallback sums in insertion order; reuse the reference helper
+        return robust_z(self.values(), value)
+
+    def norm_conf(self, today_val, invert=False):
+        if len(self._sorted) < 10 or not np.isfinite(today_val):
+            return norm_conf(today_val, [], invert=invert)
+        q10, q90 = self.percentile(10), self.percentile(90)
+        span = max(q90 - q10, 1e-6)
+        if invert:
+            return float(np.clip((q90 - today_val)/span, 0, 1))
+        return float(np.clip((today_val - q10)/span, 0, 1))
+
+    def thresholds(self, top_cum_pcts):
+        if not self._sorted: return [np.nan]*len(top_cum_pcts)
+        return [float(self.percentile(100 - p)) for p in top_cum_pcts]
+
+    def tier(self, value, top_cum_pcts, labels):
+        if not self._sorted: return labels[len(labels)//2]
+        for label, thr in zip(labels, self.thresholds(top_cum_pcts)):
+            if value >= thr: return label
+        return labels[-1]
+
+# =========================
+# Vectorized history engine
+# =========================
+# Pivots each model's rows into date-sorted NumPy arrays once and streams them
+# through RollingOrderStats, evaluating every requested date against its
+# expanding "past" window in one pass. Results match
+# robust_z / make_conf / side_skill called date-by-date (same order statistics,
+# same summation order), so tiers are unchanged.
+LONG_CONF_COLS  = (["y1_acc", "y8_acc"], ["y1_rmse_pct", "y8_rmse_pct"])
+SHORT_CONF_COLS = (["y2_acc", "y7_acc"], ["y2_rmse_pct", "y7_rmse_pct"])
+
+def _today_values(sub, col, default):
+    """Per-row scalar exactly as `_to_float(row.get(col), default)` would read it."""
+    if col not in sub:
+        return np.full(len(sub), default, dtype=float)
+    s = sub[col]
+    if s.dtype.kind == "f":
+        return s.to_numpy(dtype=float)
+    return np.array([_to_float(v, default) for v in s], dtype=float)
+
+def _row_nanmean(sub, cols):
+    """Row-wise NaN-skipping mean over present `cols` (DataFrame.mean(axis=1))."""
+    cols = [c for c in cols if c in sub]
+    if not cols:
+        return np.full(len(sub), np.nan)
+    tot = cnt = None
+    for c in cols:
+        v = pd.to_numeric(sub[c], errors="coerce").to_numpy(dtype=float)
+        ok = ~np.isnan(v)
+        part = np.where(ok, v, 0.0)
+        tot = part if tot is None else tot + part
+        cnt = ok.astype(float) if cnt is None else cnt + ok
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return tot / cnt
+
+def expanding_robust_z(values, lengths, today):
+    """robust_z(values[:lengths[i]], today[i]) for every row i, streaming once through values."""
+    z = np.empty(len(lengths))
+    stats, pos = RollingOrderStats(), 0
+    for i in np.argsort(lengths, kind="stable"):
+        while pos < lengths[i]:
+            stats.push(values[pos]); pos += 1
+        z[i] = stats.robust_z(today[i])
+    return z
+
+def expanding_norm_conf(values, lengths, today, invert=False):
+    """norm_conf(today[i], values[:lengths[i]], invert) for every row i, streaming once."""
+    out = np.empty(len(lengths))
+    stats, pos = RollingOrderStats(), 0
+    for i in np.argsort(lengths, kind="stable"):
+        while pos < lengths[i]:
+            stats.push(values[pos]); pos += 1
+        out[i] = stats.norm_conf(today[i], invert=invert)
+    return out
+
+def expanding_side_skill(acc, rmse, lengths, roll_primary, roll_fallback, min_hist):
+    """side_skill() for every row: trailing window of the first `lengths[i]` rows."""
+    out = np.zeros(len(lengths))
+    for i, n in enumerate(lengths):
+        n = int(n)
+        size = min(n, roll_primary)
+        if size < min_hist:
+            size = min(n, roll_fallback)
+        if size < min_hist:
+            size = n
+        if size == 0:
+            continue
+        means = []
+        for arr in (acc, rmse):
+            w = arr[n - size:n]
+            w = w[~np.isnan(w)]
+            means.append(w.sum() / len(w) if len(w) else np.nan)
+        acc_mean  = np.clip(means[0], 0, 100) if np.isfinite(means[0]) else 50.0
+        rmse_mean = np.clip(means[1], 0, 200) if np.isfinite(means[1]) else 50.0
+        out[i] = float(0.6*acc_mean + 0.4*(100.0 - rmse_mean))
+    return out
+
+def _relu_arr(x):
+    return np.where(x > 0.0, x, 0.0)
+
+def model_signal_parts(df, model_names, eval_dates):
+    """
+    Window-independent half of model_signal_history: for each model, the eval dates
+    it has rows on (`when`), their row positions (`idx`), the long/short signals and
+    the per-row acc/rmse series the side skills are built from. Models with no row
+    on any eval date are absent.
+    """
+    eval_dates = pd.DatetimeIndex(pd.to_datetime(pd.Series(eval_dates))).unique().sort_values()
+    out = {}
+    for m in model_names:
+        sub = df[df["model_name"] == m].sort_values("as_of_date_today", kind="stable").reset_index(drop=True)
+        if sub.empty or len(eval_dates) == 0:
+            continue
+        dates = sub["as_of_date_today"].to_numpy(dtype="datetime64[ns]")
+        idx = np.searchsorted(dates, eval_dates.to_numpy(dtype="datetime64[ns]"), side="left")
+        present = (idx < len(dates)) & (dates[np.minimum(idx, len(dates) - 1)] == eval_dates.to_numpy(dtype="datetime64[ns]"))
+        if not present.any():
+            continue
+        idx = idx[present]
+
+        z = {}
+        for col in ("y1_pred", "y2_pred", "y7_pred", "y8_pred"):
+            hist = pd.to_numeric(sub[col], errors="coerce").to_numpy(dtype=float) if col in sub \
+                else np.full(len(sub), np.nan)
+            z[col] = expanding_robust_z(hist, idx, _today_values(sub, col, 0.0)[idx])
+
+        part = {"when": eval_dates[present], "idx": idx, "acc": {}, "rmse": {}}
+        conf = {}
+        for name, (acc_cols, rmse_cols) in (("long", LONG_CONF_COLS), ("short", SHORT_CONF_COLS)):
+            acc  = _row_nanmean(sub, acc_cols)
+            rmse = _row_nanmean(sub, rmse_cols)
+            conf[name] = 0.5*expanding_norm_conf(acc, idx, acc[idx]) \
+                       + 0.5*expanding_norm_conf(rmse, idx, rmse[idx], invert=True)
+            part["acc"][name], part["rmse"][name] = acc, rmse
+
+        part["long"]  = (_relu_arr(z["y1_pred"]) + _relu_arr(z["y8_pred"])) * conf["long"]
+        part["short"] = (_relu_arr(-z["y2_pred"]) + _relu_arr(z["y7_pred"])) * conf["short"]
+        out[m] = part
+    return out
+
+def model_skills(part, roll_primary, roll_fallback, min_hist):
+    """Long/short side skills on a model_signal_parts() entry's eval dates for one window setting."""
+    return {name: expanding_side_skill(part["acc"][name], part["rmse"][name], part["idx"],
+                                       roll_primary, roll_fallback, min_hist)
+            for name in ("long", "short")}
+
+def combine_signal_history(parts, model_names, skills):
+    """{model: {date: (long_signal, short_signal, skill_long, skill_short)}} from parts + skills."""
+    out = {}
+    for m in model_names:
+        out[m] = {}
+        if m not in parts:
+            continue
+        part, sk = parts[m], skills[m]
+        for j, d in enumerate(part["when"]):
+            out[m][d] = (float(part["long"][j]), float(part["short"][j]),
+                         float(sk["long"][j]), float(sk["short"][j]))
+    return out
+
+def model_signal_history(df, model_names, eval_dates, roll_primary, roll_fallback, min_hist):
+    """
+    Long/short signals and skills for each model on each of `eval_dates`, where every
+    date only sees strictly earlier rows of the same model.
+    Returns {model: {date: (long_signal, short_signal, skill_long, skill_short)}};
+    dates on which a model has no row are absent.
+    """
+    parts = model_signal_parts(df, model_names, eval_dates)
+    skills = {m: model_skills(part, roll_primary, roll_fallback, min_hist) for m, part in parts.items()}
+    return combine_signal_history(parts, model_names, skills)
+
 # =========================
 # Enhanced Explanation System
 # =========================
@@ -454,11 +1315,11 @@ class MarketExplanationSystem:
             # Get yesterday's price data (if available)
             price_query = """
             SELECT * FROM price_history 
-            WHERE ticker = 'SPY' AND date < ? 
+            WHERE ticker = ? AND date < ? 
             ORDER BY date DESC 
             LIMIT 1
             """
-            price_df = pd.read_sql_query(price_query, conn, params=[today_date])
+            price_df = pd.read_sql_query(price_query, conn, params=[TICKER, today_date])
             yesterday_price = price_df.iloc[0].to_dict() if not price_df.empty else None
             
             return yesterday_tiers, yesterday_price
@@ -930,10 +1791,12 @@ class MarketExplanationSystem:
 # =========================
 # SQLite upserts
 # =========================
-def upsert_daily_tiers(conn, result):
-    import sqlite3 as _sqlite3
-    cur = conn.cursor()
-    cur.execute("""
+# Statements are built once at import: sqlite3 caches prepared statements by SQL
+# text, so every call (and every row of an executemany) reuses the same plan.
+# CREATE TABLE IF NOT EXISTS runs inside the write transaction, not as its own commit.
+_SQLITE_HAS_UPSERT = sqlite3.sqlite_version_info >= (3, 24, 0)
+
+DAILY_TIERS_DDL = """
     CREATE TABLE IF NOT EXISTS daily_tiers (
       as_of_date_today TEXT PRIMARY KEY,
       long_score REAL,
@@ -942,50 +1805,10 @@ def upsert_daily_tiers(conn, result):
       short_tier TEXT,
       details_json TEXT
     )
-    """)
-    conn.commit()
-
-    params = (
-        result["date"],
-        result["long"]["score"], result["long"]["tier"],
-        result["short"]["score"], result["short"]["tier"],
-        json.dumps(result, ensure_ascii=False),
-    )
-
-    ver_tuple = tuple(int(x) for x in _sqlite3.sqlite_version.split("."))
-    print(f"ℹ️ SQLite version in Lambda: {_sqlite3.sqlite_version}")
-
-    if ver_tuple >= (3, 24, 0):
-        cur.execute("""
-        INSERT INTO daily_tiers (as_of_date_today, long_score, long_tier, short_score, short_tier, details_json)
-        VALUES (?, ?, ?, ?, ?, ?)
-        ON CONFLICT(as_of_date_today) DO UPDATE SET
-          long_score=excluded.long_score,
-          long_tier=excluded.long_tier,
-          short_score=excluded.short_score,
-          short_tier=excluded.short_tier,
-          details_json=excluded.details_json
-        """, params)
-    else:
-        cur.execute("""
-        INSERT OR REPLACE INTO daily_tiers
-          (as_of_date_today, long_score, long_tier, short_score, short_tier, details_json)
-        VALUES (?, ?, ?, ?, ?, ?)
-        """, params)
-
-    conn.commit()
-    print("✅ daily_tiers upserted.")
-
-def upsert_model_eval_summary(conn, today_df: pd.DataFrame):
-    """
-    Upsert per-model results for the target date into model_eval_summary.
-    Matches your full schema with rmse + rmse_pct + acc + top_feature_*.
-    """
-    import sqlite3 as _sqlite3
-    cur = conn.cursor()
+"""
 
-    # Full schema (matches the one you posted)
-    cur.execute("""
+# Full schema (matches the one you posted)
+MODEL_EVAL_SUMMARY_DDL = """
     CREATE TABLE IF NOT EXISTS model_eval_summary (
         as_of_date_today TEXT,
         model_name TEXT,
@@ -1019,60 +1842,274 @@ def upsert_model_eval_summary(conn, today_df: pd.DataFrame):
         top_feature_20_name TEXT, top_feature_20_importance REAL,
         PRIMARY KEY (as_of_date_today, model_name)
     )
-    """)
-    conn.commit()
+"""
 
-    # Ensure all expected columns exist in the frame
-    base_cols = ["as_of_date_today","model_name"]
-    q = []
-    for i in range(1,9):
-        q += [f"y{i}_pred", f"y{i}_rmse", f"y{i}_rmse_pct", f"y{i}_acc"]
-    for i in range(1,21):
-        q += [f"top_feature_{i}_name", f"top_feature_{i}_importance"]
+DAILY_TIERS_COLS = ["as_of_date_today", "long_score", "long_tier", "short_score", "short_tier", "details_json"]
+MODEL_EVAL_KEY_COLS = ["as_of_date_today", "model_name"]
+MODEL_EVAL_VALUE_COLS = [f"y{i}_{k}" for i in range(1, 9) for k in ("pred", "rmse", "rmse_pct", "acc")] \
+                      + [f"top_feature_{i}_{k}" for i in range(1, 21) for k in ("name", "importance")]
+
+def _upsert_sql(table, key_cols, value_cols):
+    """INSERT … ON CONFLICT DO UPDATE (SQLite ≥ 3.24) or INSERT OR REPLACE for older builds."""
+    cols = key_cols + value_cols
+    if _SQLITE_HAS_UPSERT:
+        return f"""
+        INSERT INTO {table} ({",".join(cols)})
+        VALUES ({",".join(["?"]*len(cols))})
+        ON CONFLICT({",".join(key_cols)}) DO UPDATE SET
+          {",".join([f"{c}=excluded.{c}" for c in value_cols])}
+        """
+    return f"""
+        INSERT OR REPLACE INTO {table} ({",".join(cols)})
+        VALUES ({",".join(["?"]*len(cols))})
+        """
+
+DAILY_TIERS_UPSERT_SQL = _upsert_sql("daily_tiers", DAILY_TIERS_COLS[:1], DAILY_TIERS_COLS[1:])
+MODEL_EVAL_UPSERT_SQL  = _upsert_sql("model_eval_summary", MODEL_EVAL_KEY_COLS, MODEL_EVAL_VALUE_COLS)
 
-    df = today_df.copy()
-    for c in base_cols + q:
+def _frame_params(df, cols):
+    """
+    Row parameter tuples for `cols`, built column-wise: each column becomes one
+    object array (NaN/NaT → None, numpy scalars → Python values) and rows are zipped.
+    Columns missing from `df` bind as NULL.
+    """
+    n = len(df)
+    columns = []
+    for c in cols:
         if c not in df.columns:
-            df[c] = np.nan
+            columns.append(itertools.repeat(None, n))
+            continue
+        arr = df[c].to_numpy(dtype=object)
+        arr[pd.isna(arr)] = None
+        columns.append(arr)
+    return list(zip(*columns))
 
+def upsert_daily_tiers(conn, result, commit=True):
+    """
+    Upsert one daily_tiers result dict, or a list of them, as one executemany.
+    commit=False leaves the transaction open so the caller can batch more writes.
+    """
+    results = result if isinstance(result, list) else [result]
+    params = [(
+        r["date"],
+        r["long"]["score"], r["long"]["tier"],
+        r["short"]["score"], r["short"]["tier"],
+        json.dumps(r, ensure_ascii=False),
+    ) for r in results]
+
+    conn.execute(DAILY_TIERS_DDL)
+    conn.executemany(DAILY_TIERS_UPSERT_SQL, params)
+    if commit:
+        conn.commit()
+    print("✅ daily_tiers upserted." if len(params) == 1 else f"✅ daily_tiers upserted ({len(params)} rows).")
+    return params
+
+def upsert_model_eval_summary(conn, today_df: pd.DataFrame, commit=True):
+    """
+    Upsert per-model results (any number of dates/models) into model_eval_summary.
+    Matches your full schema with rmse + rmse_pct + acc + top_feature_*.
+    commit=False leaves the transaction open so the caller can batch more writes.
+    """
     # store date as TEXT (YYYY-MM-DD)
-    df["as_of_date_today"] = pd.to_datetime(df["as_of_date_today"]).dt.strftime("%Y-%m-%d")
+    dates = pd.to_datetime(today_df["as_of_date_today"]).dt.strftime("%Y-%m-%d")
+    params = _frame_params(today_df.assign(as_of_date_today=dates),
+                           MODEL_EVAL_KEY_COLS + MODEL_EVAL_VALUE_COLS)
+
+    conn.execute(MODEL_EVAL_SUMMARY_DDL)
+    conn.executemany(MODEL_EVAL_UPSERT_SQL, params)
+    if commit:
+        conn.commit()
+    print(f"✅ Upserted {len(params)} row(s) into full model_eval_summary.")
+    return params
 
-    cols = base_cols + q
-    params = [tuple(None if (pd.isna(r[c])) else r[c] for c in cols) for _, r in df.iterrows()]
 
-    ver_tuple = tuple(int(x) for x in _sqlite3.sqlite_version.split("."))
-    if ver_tuple >= (3, 24, 0):
-        sql = f"""
-        INSERT INTO model_eval_summary ({",".join(cols)})
-        VALUES ({",".join(["?"]*len(cols))})
-        ON CONFLICT(as_of_date_today, model_name) DO UPDATE SET
-          {",".join([f"{c}=excluded.{c}" for c in q])}
-        """
-    else:
-        sql = f"""
-        INSERT OR REPLACE INTO model_eval_summary ({",".join(cols)})
-        VALUES ({",".join(["?"]*len(cols))})
-        """
+# =========================
+# Guarded DB upload
+# =========================
+# Writers download the DB, upsert a few rows and upload the whole file. The upload
+# is a PUT with If-Match on the ETag we downloaded, so a writer whose copy went
+# stale (another ticker uploaded in between) is rejected by S3 instead of
+# clobbering those rows; it then re-applies its own rows on the newer DB.
+def _put_db_if_match(etag):
+    """
+    Upload DB_LOCAL over DB_KEY only if it still has ETag `etag`; new ETag, or None on
+    conflict. Up to DB_PART_MB it is one PUT; larger DBs are a multipart upload whose
+    CompleteMultipartUpload carries the If-Match. Refuses to upload unguarded.
+    """
+    if not _supports_conditional_put():
+        raise RuntimeError(f"botocore {botocore_version} cannot send If-Match; refusing an unguarded "
+                           f"upload of s3://{DB_BUCKET}/{DB_KEY} (upgrade boto3/botocore)")
+    part_size = max(5, DB_PART_MB) * 1024 * 1024
+    size = os.path.getsize(DB_LOCAL)
+    try:
+        if size <= part_size:
+            with open(DB_LOCAL, "rb") as f:
+                return s3.put_object(Bucket=DB_BUCKET, Key=DB_KEY, Body=f, IfMatch=etag,
+                                     ContentType="application/x-sqlite3").get("ETag")
+
+        upload_id = s3.create_multipart_upload(Bucket=DB_BUCKET, Key=DB_KEY,
+                                               ContentType="application/x-sqlite3")["UploadId"]
+
+        def put_part(number):
+            with open(DB_LOCAL, "rb") as f:
+                f.seek((number - 1) * part_size)
+                body = f.read(part_size)
+            resp = s3.upload_part(Bucket=DB_BUCKET, Key=DB_KEY, UploadId=upload_id,
+                                  PartNumber=number, Body=body)
+            return {"PartNumber": number, "ETag": resp["ETag"]}
 
-    cur.executemany(sql, params)
-    conn.commit()
-    print(f"✅ Upserted {len(params)} row(s) into full model_eval_summary.")
+        try:
+            n_parts = -(-size // part_size)
+            with ThreadPoolExecutor(max_workers=max(1, min(DB_UPLOAD_WORKERS, n_parts))) as ex:
+                parts = list(ex.map(put_part, range(1, n_parts + 1)))
+            return s3.complete_multipart_upload(Bucket=DB_BUCKET, Key=DB_KEY, UploadId=upload_id,
+                                                MultipartUpload={"Parts": parts}, IfMatch=etag).get("ETag")
+        except BaseException:
+            try:
+                s3.abort_multipart_upload(Bucket=DB_BUCKET, Key=DB_KEY, UploadId=upload_id)
+            except Exception:
+                pass  # best effort; the original error is what matters
+            raise
+    except ClientError as e:
+        if _is_precondition_conflict(e):
+            return None
+        raise
+
+def upload_db_guarded(reapply):
+    """
+    Upload DB_LOCAL unless DB_KEY changed since our download. On conflict, download
+    the newer DB, call reapply(conn) to redo this run's writes, commit and retry.
+    Returns the number of conflicts seen; raises after DB_WRITE_RETRIES of them.
+    """
+    global _db_etag
+    if not _db_etag:
+        raise RuntimeError(f"No downloaded ETag for s3://{DB_BUCKET}/{DB_KEY}; refusing blind upload")
+    with closing(sqlite3.connect(DB_LOCAL)) as conn:
+        ensure_tier_indexes(conn)  # every uploaded DB carries the read indexes
+    for attempt in range(DB_WRITE_RETRIES + 1):
+        new_etag = _put_db_if_match(_db_etag)
+        if new_etag:
+            _db_etag = new_etag
+            print(f"📤 Uploaded updated DB to s3://{DB_BUCKET}/{DB_KEY}"
+                  + (f" after {attempt} conflict(s)" if attempt else ""))
+            return attempt
+        if attempt == DB_WRITE_RETRIES:
+            break
+        print(f"⚠️ s3://{DB_BUCKET}/{DB_KEY} changed since download; re-applying rows "
+              f"(attempt {attempt + 1}/{DB_WRITE_RETRIES})")
+        time.sleep(min(5.0, 0.5 * (2 ** attempt)) * (0.5 + random.random()))
+        download_db()  # ETag differs, so this fetches the newer object
+        with closing(sqlite3.connect(DB_LOCAL)) as conn:
+            reapply(conn)
+            conn.commit()
+            ensure_tier_indexes(conn)
+    raise RuntimeError(f"Gave up writing s3://{DB_BUCKET}/{DB_KEY} after "
+                       f"{DB_WRITE_RETRIES + 1} conflicting attempts")
+
+
+# =========================
+# DB deltas
+# =========================
+# A delta is the rows one run upserted, per table, in upsert column order:
+#   {"format": 1, "db_key", "ticker", "created_at",
+#    "tables": {"model_eval_summary": {"columns": [...], "rows": [[...], ...]}, ...}}
+# Keys sort chronologically: <DB_DELTA_PREFIX><UTC timestamp>-<TICKER>-<random>.json
+DELTA_TABLES = {
+    "model_eval_summary": (MODEL_EVAL_SUMMARY_DDL, MODEL_EVAL_KEY_COLS,
+                           MODEL_EVAL_KEY_COLS + MODEL_EVAL_VALUE_COLS),
+    "daily_tiers":        (DAILY_TIERS_DDL, DAILY_TIERS_COLS[:1], DAILY_TIERS_COLS),
+}
+
+def _apply_table_rows(conn, table, columns, rows):
+    """Upsert `rows` (sequences in `columns` order) into one of the DELTA_TABLES."""
+    ddl, key_cols, _ = DELTA_TABLES[table]
+    conn.execute(ddl)
+    conn.executemany(_upsert_sql(table, key_cols, [c for c in columns if c not in key_cols]),
+                     [tuple(r) for r in rows])
+
+def ship_db_delta(table_rows):
+    """Write {table: upsert params} as one delta object; returns its key (None if empty)."""
+    tables = {t: {"columns": DELTA_TABLES[t][2], "rows": [list(r) for r in rows]}
+              for t, rows in table_rows.items() if rows}
+    if not tables:
+        return None
+    now = datetime.now(timezone.utc)
+    key = (f"{DB_DELTA_PREFIX.rstrip('/')}/{now.strftime('%Y%m%dT%H%M%S%fZ')}-{TICKER}-"
+           f"{random.getrandbits(32):08x}.json")
+    body = {"format": 1, "db_key": DB_KEY, "ticker": TICKER,
+            "created_at": now.strftime("%Y-%m-%dT%H:%M:%SZ"), "tables": tables}
+    s3.put_object(Bucket=DB_BUCKET, Key=key,
+                  Body=json.dumps(body, ensure_ascii=False, separators=(",",":")).encode("utf-8"),
+                  ContentType="application/json")
+    n = sum(len(t["rows"]) for t in tables.values())
+    print(f"📤 Shipped DB delta ({n} row(s)) to s3://{DB_BUCKET}/{key}")
+    return key
+
+def _list_keys(bucket, prefix):
+    keys, token = [], None
+    while True:
+        kw = dict(Bucket=bucket, Prefix=prefix)
+        if token:
+            kw["ContinuationToken"] = token
+        resp = s3.list_objects_v2(**kw)
+        keys += [o["Key"] for o in resp.get("Contents", [])]
+        if not resp.get("IsTruncated"):
+            return keys
+        token = resp.get("NextContinuationToken")
+
+def merge_db_deltas(delete=True):
+    """
+    Apply every pending delta for DB_KEY to the DB in one transaction (oldest
+    first, so later rows win), upload the DB once, then delete the applied deltas.
+    """
+    prefix = DB_DELTA_PREFIX.rstrip("/") + "/"
+    keys = sorted(k for k in _list_keys(DB_BUCKET, prefix) if k.endswith(".json"))
+    if not keys:
+        print("ℹ️ No pending DB deltas.")
+        return {"applied": 0, "rows": 0}
+
+    deltas, _ = fetch_s3_json_many(keys)
+    applied, rows, batch = [], 0, []
+    download_db()
+    with closing(sqlite3.connect(DB_LOCAL)) as conn:
+        for key, delta in zip(keys, deltas):
+            if isinstance(delta, Exception):
+                print(f"⚠️ Skipping unreadable delta {key}: {delta}")
+                continue
+            if delta.get("db_key", DB_KEY) != DB_KEY:
+                continue  # belongs to another DB sharing the prefix
+            for table, payload in (delta.get("tables") or {}).items():
+                if table not in DELTA_TABLES:
+                    print(f"⚠️ Delta {key}: unknown table {table}; skipped")
+                    continue
+                batch.append((table, payload["columns"], payload["rows"]))
+                rows += len(payload["rows"])
+            applied.append(key)
+
+        def reapply(conn):
+            for table, columns, table_rows in batch:
+                _apply_table_rows(conn, table, columns, table_rows)
+        reapply(conn)
+        conn.commit()
+
+    if applied:
+        upload_db_guarded(reapply)
+        print(f"📤 Merged {len(applied)} delta(s), {rows} row(s) into s3://{DB_BUCKET}/{DB_KEY}")
+        if delete:
+            for i in range(0, len(applied), 1000):
+                s3.delete_objects(Bucket=DB_BUCKET, Delete={
+                    "Objects": [{"Key": k} for k in applied[i:i+1000]], "Quiet": True})
+    _cleanup_tmp([DB_LOCAL])  # local copy now differs from any cached ETag
+    return {"applied": len(applied), "rows": rows}
 
 
 # =========================
 # S3 JSON loaders
 # =========================
 def _latest_as_of_from_s3():
-    """Return latest YYYY-MM-DD folder under MODELS_PREFIX/."""
-    resp = s3.list_objects_v2(Bucket=DB_BUCKET, Prefix=f"{MODELS_PREFIX.rstrip('/')}/", Delimiter="/")
-    prefixes = []
-    for cp in resp.get("CommonPrefixes", []):
-        p = cp["Prefix"]  # e.g., 'ml_out/2025-09-26/'
-        m = re.search(r"(\d{4}-\d{2}-\d{2})/?$", p.rstrip("/"))
-        if m:
-            prefixes.append(m.group(1))
-    return sorted(prefixes)[-1] if prefixes else None
+    """Return latest YYYY-MM-DD folder under MODELS_PREFIX/ (dates manifest first)."""
+    dates = list_model_dates()
+    return dates[-1] if dates else None
 
 def load_eval_from_s3(as_of_date, model_names):
     """
@@ -1084,98 +2121,283 @@ def load_eval_from_s3(as_of_date, model_names):
       - y1_acc..y8_acc
       - top_feature_1_name/importance .. top_feature_20_name/importance
     """
-    rows = []
     base = f"{MODELS_PREFIX.rstrip('/')}/{as_of_date}/"
+    keys = [f"{base}{m}.json" for m in model_names]
+    results, _ = fetch_s3_json_many(keys)
 
-    for m in model_names:
-        key = f"{base}{m}.json"
-        try:
-            obj = s3.get_object(Bucket=DB_BUCKET, Key=key)
-            data = json.loads(obj["Body"].read())
-        except Exception as e:
-            print(f"⚠️ Missing or unreadable {key}: {e}")
+    rows = []
+    for m, key, data in zip(model_names, keys, results):
+        if isinstance(data, Exception):
+            print(f"⚠️ Missing or unreadable {key}: {data}")
             continue
-
-        preds = data.get("predictions", {}) or {}
-        # v1 schema has metrics.rmse_pct & metrics.acc_pct
-        metrics = data.get("metrics", {}) or {}
-        rmse_pct = metrics.get("rmse_pct", {}) or {}
-        acc_pct  = metrics.get("acc_pct",  {}) or {}
-        # legacy absolute RMSE fallback under top-level "rmse"
-        rmse_abs = data.get("rmse", {}) or {}
-
-        row = {"as_of_date_today": as_of_date, "model_name": m}
-
-        # predictions
-        for i in range(1, 9):
-            yk = f"y{i}"
-            if yk in preds:
-                row[f"{yk}_pred"] = float(preds[yk])
-
-        # rmse absolute + pct + acc (prefer explicit metrics; fallback from legacy rmse)
-        for i in range(1, 9):
-            yk = f"y{i}"
-            # absolute RMSE
-            if yk in rmse_abs:
-                row[f"{yk}_rmse"] = float(rmse_abs[yk])
-            # pct RMSE
-            if yk in rmse_pct:
-                row[f"{yk}_rmse_pct"] = float(rmse_pct[yk])
-            elif yk in rmse_abs:
-                # heuristic fallback if only absolute RMSE provided
-                row[f"{yk}_rmse_pct"] = float(rmse_abs[yk]) * 100.0
-            # acc
-            if yk in acc_pct:
-                row[f"{yk}_acc"] = float(acc_pct[yk])
-            elif yk in rmse_abs:
-                # simple fallback consistent with your older code path
-                r = float(rmse_abs[yk])
-                row[f"{yk}_acc"] = max(0.0, 100.0 - r * 10.0)
-
-        # top_features can be list([{name,importance},...]) OR dict(feature_1={...}, ...)
-        tf = data.get("top_features", None)
-        top_pairs = []
-        if isinstance(tf, list):
-            top_pairs = [(str(item.get("name")), float(item.get("importance", 0.0))) for item in tf]
-        elif isinstance(tf, dict):
-            # sort keys like feature_1, feature_2, ...
-            for k in sorted(tf.keys(), key=lambda x: int(re.sub(r"\D+", "", x) or "9999")):
-                item = tf[k] or {}
-                top_pairs.append((str(item.get("name")), float(item.get("importance", 0.0))))
-
-        # pad/trim to 20
-        top_pairs = (top_pairs + [("_pad_", 0.0)]*20)[:20]
-        for i, (nm, imp) in enumerate(top_pairs, start=1):
-            row[f"top_feature_{i}_name"] = nm
-            row[f"top_feature_{i}_importance"] = imp
-
-        rows.append(row)
+        rows.append(_eval_row_from_json(as_of_date, m, data))
 
     df = pd.DataFrame(rows)
     if not df.empty:
         df["as_of_date_today"] = pd.to_datetime(df["as_of_date_today"])
     return df
 
+# =========================
+# Model-output dates manifest
+# =========================
+# LISTing MODELS_PREFIX/ to find dates gets slower every trading day. Instead a
+# small manifest maps each date to the models written for it:
+#   {"version": 1, "prefix": "ml_out", "updated_at": ..., "dates": {"2025-09-26": [models]}}
+# Writers call register_model_outputs() after their PUTs (the tier builder does
+# too, for the date it reads); updates are If-Match PUTs so none are lost.
+_models_index_cache = {}  # index key → (ETag, manifest)
+
+def _models_index_key():
+    return MODELS_INDEX_KEY or f"{MODELS_INDEX_PREFIX.rstrip('/')}/{MODELS_PREFIX.strip('/')}.json"
+
+def load_models_index(refresh=False):
+    """The dates manifest ({} when absent), GET once per invocation unless refresh."""
+    key = _models_index_key()
+    if key in _models_index_cache and not refresh:
+        return _models_index_cache[key][1]
+    try:
+        obj = s3.get_object(Bucket=DB_BUCKET, Key=key)
+        etag, index = obj.get("ETag"), json.loads(obj["Body"].read())
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+            raise
+        etag, index = None, {}
+    _models_index_cache[key] = (etag, index)
+    return index
+
+def _list_dates_after(after):
+    """Dated prefixes under MODELS_PREFIX/ that sort after `after` (all of them if None)."""
+    base = f"{MODELS_PREFIX.rstrip('/')}/"
+    if not after:
+        return list_available_dates_from_s3(DB_BUCKET, base)
+    # '/' < '0', so every key under <after>/ sorts before "<after>0" and every later date after it
+    dates, kw = [], dict(Bucket=DB_BUCKET, Prefix=base, Delimiter="/", StartAfter=f"{base}{after}0")
+    while True:
+        resp = s3.list_objects_v2(**kw)
+        dates += [d for d in (_extract_date_from_prefix(cp["Prefix"])
+                              for cp in resp.get("CommonPrefixes", [])) if d and d > after]
+        if not resp.get("IsTruncated"):
+            return sorted(set(dates))
+        kw["ContinuationToken"] = resp["NextContinuationToken"]
+
+def list_model_dates(start=None, end=None):
+    """
+    Sorted YYYY-MM-DD dates with model outputs, optionally within [start, end].
+    Served from the manifest; unless MODELS_INDEX_TRUST=1, dates newer than its
+    last entry (a writer that has not registered yet) are picked up by a LIST
+    that starts after that entry.
+    """
+    dates = sorted((load_models_index().get("dates") or {}).keys())
+    if not (MODELS_INDEX_TRUST and dates):
+        newer = _list_dates_after(dates[-1] if dates else None)
+        if newer:
+            print(f"ℹ️ {len(newer)} date(s) under {MODELS_PREFIX}/ missing from {_models_index_key()}")
+        dates = sorted(set(dates) | set(newer))
+    return [d for d in dates if (not start or d >= start) and (not end or d <= end)]
+
+def register_model_outputs(as_of_date, model_names):
+    """
+    Add `model_names` under `as_of_date` in the manifest (no-op if already there).
+    Read-modify-write guarded by If-Match (If-None-Match on create); on a
+    conflict the newer manifest is re-read and the change re-applied.
+    """
+    key = _models_index_key()
+    for attempt in range(DB_WRITE_RETRIES + 1):
+        index = load_models_index(refresh=attempt > 0)
+        etag = _models_index_cache[key][0]
+        dates = index.setdefault("dates", {})
+        have = set(dates.get(as_of_date) or [])
+        if have >= set(model_names):
+            return False
+        dates[as_of_date] = sorted(have | set(model_names))
+        index.update(version=1, prefix=MODELS_PREFIX.rstrip("/"),
+                     updated_at=datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"))
+        kw = _guarded_put_kwargs(key, etag)
+        try:
+            resp = s3.put_object(Bucket=DB_BUCKET, Key=key, ContentType="application/json",
+                                 Body=json.dumps(index, sort_keys=True, separators=(",", ":")).encode("utf-8"),
+                                 **kw)
+        except ClientError as e:
+            if not _is_precondition_conflict(e):
+                raise
+            time.sleep(min(2.0, 0.2 * (2 ** attempt)) * (0.5 + random.random()))
+            continue
+        _models_index_cache[key] = (resp.get("ETag"), index)
+        print(f"🗂️ Registered {as_of_date} ({len(dates[as_of_date])} model(s)) in s3://{DB_BUCKET}/{key}")
+        return True
+    raise RuntimeError(f"Gave up updating s3://{DB_BUCKET}/{key} after {DB_WRITE_RETRIES + 1} conflicts")
+
+def rebuild_models_index():
+    """Rebuild the manifest from one full listing of MODELS_PREFIX/ (bootstrap / repair)."""
+    base = f"{MODELS_PREFIX.rstrip('/')}/"
+    found = {}
+    for key in _list_keys(DB_BUCKET, base):
+        m = re.match(re.escape(base) + r"(\d{4}-\d{2}-\d{2})/([^/]+)\.json$", key)
+        if m:
+            found.setdefault(m.group(1), set()).add(m.group(2))
+    index = {"version": 1, "prefix": base.rstrip("/"),
+             "updated_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+             "dates": {d: sorted(ms) for d, ms in sorted(found.items())}}
+    key = _models_index_key()
+    resp = s3.put_object(Bucket=DB_BUCKET, Key=key, ContentType="application/json",
+                         Body=json.dumps(index, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    _models_index_cache[key] = (resp.get("ETag"), index)
+    print(f"🗂️ Rebuilt s3://{DB_BUCKET}/{key}: {len(found)} date(s)")
+    return {"dates": len(found), "latest": max(found) if found else None}
+
+
+# =========================
+# Tier score history cache
+# =========================
+def tier_history_cache_key(model_names, cfg):
+    """Short hash of everything that shapes historical scores (model set, config, DB)."""
+    blob = json.dumps({"models": list(model_names), "config": cfg, "db_key": DB_KEY},
+                      sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+def _tier_history_s3_key(cache_key):
+    return f"{TIER_HISTORY_PREFIX.rstrip('/')}/{cache_key}.json"
+
+def load_tier_history(cache_key):
+    """Return {YYYY-MM-DD: (long_score, short_score)} for this cache key, or {} on a miss."""
+    key = _tier_history_s3_key(cache_key)
+    try:
+        obj = s3.get_object(Bucket=DB_BUCKET, Key=key)
+        data = json.loads(obj["Body"].read())
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+            print(f"ℹ️ No tier history at s3://{DB_BUCKET}/{key}; full rebuild.")
+        else:
+            print(f"⚠️ Could not load tier history s3://{DB_BUCKET}/{key}: {e}")
+        return {}
+    except Exception as e:
+        print(f"⚠️ Could not load tier history s3://{DB_BUCKET}/{key}: {e}")
+        return {}
+
+    if data.get("cache_key") != cache_key:
+        return {}
+    return {d: (float(v[0]), float(v[1])) for d, v in (data.get("scores") or {}).items()}
+
+def save_tier_history(cache_key, model_names, scores, keep_days):
+    """Persist the newest `keep_days` per-date scores back to the S3 sidecar."""
+    key = _tier_history_s3_key(cache_key)
+    dates = sorted(scores)[-keep_days:]
+    body = {
+        "cache_key": cache_key,
+        "models": list(model_names),
+        "updated_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "scores": {d: [scores[d][0], scores[d][1]] for d in dates},
+    }
+    s3.put_object(
+        Bucket=DB_BUCKET,
+        Key=key,
+        Body=json.dumps(body, separators=(",",":")).encode("utf-8"),
+        ContentType="application/json"
+    )
+    print(f"📤 Saved {len(dates)} tier history score(s) to s3://{DB_BUCKET}/{key}")
+
 # =========================
 # Core compute
 # =========================
-def compute_result(event=None):
+def _tier_outputs(target_date, sig_df, w_long, w_short, long_score, short_score,
+                  long_hist, short_hist, long_cuts, short_cuts, labels):
+    """
+    Tiers for one date's scores against their history distributions.
+    Returns (today_tiers, daily_row): the record the explanation system reads and
+    the result dict upsert_daily_tiers stores.
+    """
+    labels      = list(labels)
+    long_tier   = assign_tier(long_score,  long_hist,  long_cuts,  labels)
+    short_tier  = assign_tier(short_score, short_hist, short_cuts, labels)
+    long_pct    = percentile_rank(long_hist,  long_score)
+    short_pct   = percentile_rank(short_hist, short_score)
+    date_str    = pd.to_datetime(target_date).strftime("%Y-%m-%d")
+
+    long_weights  = dict(zip(sig_df["model_name"], np.round(w_long, 4)))
+    long_signals  = dict(zip(sig_df["model_name"], np.round(sig_df["long_signal"], 4)))
+    short_weights = dict(zip(sig_df["model_name"], np.round(w_short, 4)))
+    short_signals = dict(zip(sig_df["model_name"], np.round(sig_df["short_signal"], 4)))
+    long_pct_out  = None if np.isnan(long_pct) else round(long_pct, 2)
+    short_pct_out = None if np.isnan(short_pct) else round(short_pct, 2)
+    long_bias     = bias_tag("long", long_score, long_hist)
+    short_bias    = bias_tag("short", short_score, short_hist)
+
+    today_tiers = {
+        "as_of_date_today": date_str,
+        "long_score": long_score,
+        "long_tier": long_tier,
+        "short_score": short_score,
+        "short_tier": short_tier,
+        "details_json": json.dumps({
+            "date": date_str,
+            "long": {
+                "score": round(long_score, 6),
+                "percentile": long_pct_out,
+                "tier": long_tier,
+                "bias": long_bias,
+                "model_weights": long_weights,
+                "model_signals": long_signals,
+                "cuts_top_cum_pct": long_cuts,
+            },
+            "short": {
+                "score": round(short_score, 6),
+                "percentile": short_pct_out,
+                "tier": short_tier,
+                "bias": short_bias,
+                "model_weights": short_weights,
+                "model_signals": short_signals,
+                "cuts_top_cum_pct": short_cuts,
+            },
+        }, ensure_ascii=False)
+    }
+    daily_row = {
+        "date": date_str,
+        "long": {
+            "score": long_score,
+            "tier": long_tier,
+            "percentile": long_pct_out,
+            "bias": long_bias,
+            "model_weights": long_weights,
+            "model_signals": long_signals,
+            "cuts_top_cum_pct": long_cuts,
+        },
+        "short": {
+            "score": short_score,
+            "tier": short_tier,
+            "percentile": short_pct_out,
+            "bias": short_bias,
+            "model_weights": short_weights,
+            "model_signals": short_signals,
+            "cuts_top_cum_pct": short_cuts,
+        },
+    }
+    return today_tiers, daily_row
+
+def _weighted_scores(rows, TEMP, FLOOR, ALPHA, PRIOR_LONG, PRIOR_SHORT):
+    """Skill-softmax weights and long/short scores for one date's engine rows (models × 4)."""
+    rows = np.array(rows, dtype=float)
+    wl = apply_floor(softmax_temp(rows[:,2], T=float(TEMP)), floor=float(FLOOR))
+    ws = apply_floor(softmax_temp(rows[:,3], T=float(TEMP)), floor=float(FLOOR))
+    if float(ALPHA) < 1.0:
+        wl = blend_with_prior(wl, PRIOR_LONG,  alpha=float(ALPHA))
+        ws = blend_with_prior(ws, PRIOR_SHORT, alpha=float(ALPHA))
+    return float(np.sum(wl * rows[:,0])), float(np.sum(ws * rows[:,1])), wl, ws
+
+def compute_result(event=None, cfg=None):
     """
     Loads TODAY from S3 JSON (race-safe), loads HISTORY from SQLite DB in S3 (for percentiles/tiers),
     then computes signals, weights, long/short scores, tiers, and optional upserts/outputs.
-    Enhanced with market explanation system.
+    Enhanced with market explanation system. `cfg` skips the config fetch (batch mode).
     """
     global _cfg
 
-    _cfg = load_config_from_s3()
+    _stage_start()
+    _cfg = cfg if cfg is not None else load_config_from_s3()
+    _stage("config")
     artifacts = []  # files to clean from /tmp at end of compute_result
 
     MODEL_NAMES = [x.strip() for x in (MODEL_NAMES_ENV.split(",")
-                    if MODEL_NAMES_ENV else [
-                        "Model1_Random_forest_OldFeature4",
-                        "Model5_TabNet",
-                        "Model3_RandomForest_Oldfeature4_treeandNNBlend",
-                    ])]
+                    if MODEL_NAMES_ENV else DEFAULT_MODEL_NAMES)]
 
     TIER_LABELS        = _cfg_get(["tiers","labels"], ["SSS","SS","S","A+","A","B+","B","C+","C","D"])
     LONG_TOP_CUM_PCTS  = _cfg_get(["tiers","long_top_cum_pcts"],  [1,3,7,14,24,52,69,82,93,100])
@@ -1203,6 +2425,7 @@ def compute_result(event=None):
 
     df = pd.DataFrame()
     conn = None  # main DB connection used for optional upserts
+    delta_rows = {}  # table → upserted params, shipped when SHIP_DB_DELTAS
 
     if SOURCE.lower().startswith("s3"):
         # --- TODAY from S3 JSON (race-safe) ---
@@ -1214,67 +2437,65 @@ def compute_result(event=None):
         print(f"🔎 Using S3 JSONs for as_of={asof_str}")
 
         df = load_eval_from_s3(asof_str, MODEL_NAMES)
+        if not df.empty:
+            try:
+                register_model_outputs(asof_str, sorted(df["model_name"].unique()))
+            except Exception as e:
+                print(f"⚠️ Could not update {_models_index_key()}: {e}")
+        _stage("s3_fetch", rows=len(df))
 
         # If we plan to upsert later, prep DB now (also ensures DB is downloaded)
         if STORE_IN_DB:
             download_db()
             artifacts.append(DB_LOCAL)
             conn = sqlite3.connect(DB_LOCAL)
+            _stage("db_download")
 
         # --- HISTORY from SQLite DB in S3 (for percentiles/tiers) ---
         # We read-only from DB even if STORE_IN_DB=0.
         try:
-            if conn is None:
-                download_db()
-                artifacts.append(DB_LOCAL)
-                hist_conn = sqlite3.connect(DB_LOCAL)
-                close_hist_conn = True
-            else:
-                hist_conn = conn
-                close_hist_conn = False
+            hist_df = None
+            if USE_COLUMNAR_HISTORY:
+                hist_df = load_history_from_columnar(MODEL_NAMES, asof_str, DIST_LOOKBACK_DAYS)
+
+            if hist_df is None:
+                if conn is None:
+                    read_path = download_read_db(MODEL_NAMES)
+                    artifacts.append(read_path)
+                    hist_conn = sqlite3.connect(read_path)
+                    close_hist_conn = True
+                    _stage("db_download")
+                else:
+                    hist_conn = conn
+                    close_hist_conn = False
 
-            # Pull rows strictly before the target as_of_date
-            q = f"""
-                SELECT *
-                FROM model_eval_summary
-                WHERE model_name IN ({",".join(["?"]*len(MODEL_NAMES))})
-                  AND DATE(as_of_date_today) < DATE(?)
-                ORDER BY as_of_date_today ASC
-            """
-            hist_df = pd.read_sql_query(q, hist_conn, params=MODEL_NAMES + [asof_str])
+                # Rows strictly before the target as_of_date, trailing DIST_LOOKBACK_DAYS only
+                hist_df = read_history_window(hist_conn, MODEL_NAMES, asof_str, DIST_LOOKBACK_DAYS)
 
-            if close_hist_conn:
-                hist_conn.close()
+                if close_hist_conn:
+                    hist_conn.close()
 
             if not hist_df.empty:
-                hist_df["as_of_date_today"] = pd.to_datetime(hist_df["as_of_date_today"])
-                # Keep only the trailing DIST_LOOKBACK_DAYS of distinct dates (like local script)
-                min_keep_date = pd.to_datetime(asof_str) - pd.Timedelta(days=DIST_LOOKBACK_DAYS)
-                hist_df = hist_df[hist_df["as_of_date_today"] >= min_keep_date]
-
-                # Limit to columns needed downstream (safe if others present)
-                need = {"as_of_date_today","model_name"}
-                for k in [1,2,3,7,8]:
-                    need.update({f"y{k}_pred", f"y{k}_rmse_pct", f"y{k}_acc"})
-                keep_cols = [c for c in hist_df.columns if c in need]
-                if keep_cols:
-                    hist_df = hist_df[keep_cols].copy()
-
+                # Both sources already return just the window and the engine's columns
                 # Combine HISTORY + TODAY
                 df = pd.concat([hist_df, df], ignore_index=True)
             else:
                 print("ℹ️ No history found in DB (model_eval_summary). Percentiles may be null.")
         except Exception as e:
             print(f"⚠️ Failed to read history from DB: {e}. Proceeding with today only.")
+        _stage("history_query", rows=len(df))
 
     else:
         # --- SOURCE == 'sqlite': use DB for both history and today (original behavior) ---
-        download_db()
-        artifacts.append(DB_LOCAL)
-        conn = sqlite3.connect(DB_LOCAL)
+        read_path = DB_LOCAL if STORE_IN_DB else download_read_db(MODEL_NAMES)
+        if read_path == DB_LOCAL:
+            download_db()
+        artifacts.append(read_path)
+        conn = sqlite3.connect(read_path)
+        _stage("db_download")
         df = pd.read_sql_query(
             f"""
-            SELECT *
+            SELECT {", ".join(_engine_columns(conn)) or "*"}
             FROM model_eval_summary
             WHERE model_name IN ({",".join(["?"]*len(MODEL_NAMES))})
             ORDER BY as_of_date_today ASC
@@ -1288,6 +2509,7 @@ def compute_result(event=None):
         df["as_of_date_today"] = pd.to_datetime(df["as_of_date_today"])
         if not asof_str:
             asof_str = df["as_of_date_today"].max().strftime("%Y-%m-%d")
+        _stage("history_query", rows=len(df))
 
     if df.empty:
         if conn: conn.close()
@@ -1307,39 +2529,42 @@ def compute_result(event=None):
                 download_db()
                 artifacts.append(DB_LOCAL)
                 conn = sqlite3.connect(DB_LOCAL)
-            upsert_model_eval_summary(conn, today_rows)
+            # Commit now: a failed pandas read on this connection later rolls back open writes
+            delta_rows["model_eval_summary"] = upsert_model_eval_summary(conn, today_rows)
         except Exception as e:
             print(f"⚠️ model_eval_summary upsert failed: {e}")
+        _stage("writes", rows=len(delta_rows.get("model_eval_summary") or []))
 
-    # ===== Signals & weights =====
-    signals = []
-    for m in MODEL_NAMES:
-        sub  = df[df["model_name"] == m].sort_values("as_of_date_today").reset_index(drop=True)
-        row  = sub[sub["as_of_date_today"] == target_date]
-        if row.empty:
-            continue
-        row  = row.iloc[0]
-        hist = sub[sub["as_of_date_today"] < target_date]
+    # Today's rows are persisted above; from here on only the engine's columns matter
+    df = compact_history_frame(df)
 
-        y1p = _to_float(row.get("y1_pred"), 0.0)
-        y2p = _to_float(row.get("y2_pred"), 0.0)
-        y7p = _to_float(row.get("y7_pred"), 0.0)
-        y8p = _to_float(row.get("y8_pred"), 0.0)
-
-        z_y1 = robust_z(hist["y1_pred"] if "y1_pred" in hist else [], y1p)
-        z_y2 = robust_z(hist["y2_pred"] if "y2_pred" in hist else [], y2p)
-        z_y7 = robust_z(hist["y7_pred"] if "y7_pred" in hist else [], y7p)
-        z_y8 = robust_z(hist["y8_pred"] if "y8_pred" in hist else [], y8p)
-
-        conf_long  = make_conf(row, hist, ["y1_acc","y8_acc"], ["y1_rmse_pct","y8_rmse_pct"])
-        conf_short = make_conf(row, hist, ["y2_acc","y7_acc"], ["y2_rmse_pct","y7_rmse_pct"])
+    # ===== Historical distribution dates (build from df which now includes history rows) =====
+    start_cut = pd.to_datetime(target_date) - pd.Timedelta(days=365*2)
+    hist_dates = df[(df["as_of_date_today"] >= start_cut) & (df["as_of_date_today"] < target_date)] \
+                   ["as_of_date_today"].drop_duplicates().sort_values()
+    hist_dates = hist_dates.tail(int(_cfg_get(["windows","DIST_LOOKBACK_DAYS"], 180)))
 
-        long_signal  = (relu(z_y1) + relu(z_y8)) * conf_long
-        short_signal = (relu(-z_y2) + relu(z_y7)) * conf_short
+    # Reuse cached per-date scores when enabled; only uncached dates go through the engine
+    history_key = tier_history_cache_key(MODEL_NAMES, _cfg) if TIER_HISTORY_CACHE else None
+    cached_scores = {}
+    if history_key and not (isinstance(event, dict) and event.get("rebuild_history")):
+        cached_scores = load_tier_history(history_key)
+    todo_dates = [d for d in hist_dates if d.strftime("%Y-%m-%d") not in cached_scores]
+    if history_key:
+        print(f"🗂️ Tier history {history_key}: {len(hist_dates) - len(todo_dates)} cached, "
+              f"{len(todo_dates)} to compute")
 
-        skl_long  = side_skill(sub, "long",  target_date, ROLL_DAYS_PRIMARY, ROLL_DAYS_FALLBACK, MIN_HISTORY)
-        skl_short = side_skill(sub, "short", target_date, ROLL_DAYS_PRIMARY, ROLL_DAYS_FALLBACK, MIN_HISTORY)
+    # Per-model signals/skills for every uncached history date plus today, in one pass per model
+    engine = model_signal_history(df, MODEL_NAMES, todo_dates + [target_date],
+                                  ROLL_DAYS_PRIMARY, ROLL_DAYS_FALLBACK, MIN_HISTORY)
 
+    # ===== Signals & weights =====
+    signals = []
+    for m in MODEL_NAMES:
+        cur = engine[m].get(target_date)
+        if cur is None:
+            continue
+        long_signal, short_signal, skl_long, skl_short = cur
         signals.append({
             "model_name": m,
             "long_signal": float(long_signal),
@@ -1369,85 +2594,37 @@ def compute_result(event=None):
 
     long_score  = float(np.sum(w_long  * sig_df["long_signal"].values))
     short_score = float(np.sum(w_short * sig_df["short_signal"].values))
+    _stage("signal_compute", rows=len(todo_dates) + 1)
 
-    # ===== Historical distributions (build from df which now includes history rows) =====
-    start_cut = pd.to_datetime(target_date) - pd.Timedelta(days=365*2)
-    hist_dates = df[(df["as_of_date_today"] >= start_cut) & (df["as_of_date_today"] < target_date)] \
-                   ["as_of_date_today"].drop_duplicates().sort_values()
-    hist_dates = hist_dates.tail(int(_cfg_get(["windows","DIST_LOOKBACK_DAYS"], 180)))
-
+    # ===== Historical distributions =====
     long_hist, short_hist = [], []
     for d in hist_dates:
-        rows = []
-        for m in MODEL_NAMES:
-            sub = df[df["model_name"] == m].sort_values("as_of_date_today")
-            cur = sub[sub["as_of_date_today"] == d]
-            if cur.empty: continue
-            cur = cur.iloc[0]
-            past = sub[sub["as_of_date_today"] < d]
-
-            z1 = robust_z(past["y1_pred"] if "y1_pred" in past else [], _to_float(cur.get("y1_pred"), 0.0))
-            z8 = robust_z(past["y8_pred"] if "y8_pred" in past else [], _to_float(cur.get("y8_pred"), 0.0))
-            z2 = robust_z(past["y2_pred"] if "y2_pred" in past else [], _to_float(cur.get("y2_pred"), 0.0))
-            z7 = robust_z(past["y7_pred"] if "y7_pred" in past else [], _to_float(cur.get("y7_pred"), 0.0))
-
-            conf_l = make_conf(cur, past, ["y1_acc","y8_acc"], ["y1_rmse_pct","y8_rmse_pct"])
-            conf_s = make_conf(cur, past, ["y2_acc","y7_acc"], ["y2_rmse_pct","y7_rmse_pct"])
-
-            ls = (relu(z1) + relu(z8)) * conf_l
-            ss = (relu(-z2) + relu(z7)) * conf_s
-
-            skl_l = side_skill(sub, "long", d, ROLL_DAYS_PRIMARY, ROLL_DAYS_FALLBACK, MIN_HISTORY)
-            skl_s = side_skill(sub, "short", d, ROLL_DAYS_PRIMARY, ROLL_DAYS_FALLBACK, MIN_HISTORY)
-
-            rows.append((ls, ss, skl_l, skl_s))
-
+        d_str = d.strftime("%Y-%m-%d")
+        if d_str in cached_scores:
+            long_hist.append(cached_scores[d_str][0])
+            short_hist.append(cached_scores[d_str][1])
+            continue
+        rows = [engine[m][d] for m in MODEL_NAMES if d in engine[m]]
         if rows:
-            rows = np.array(rows, dtype=float)
-            wl = apply_floor(softmax_temp(rows[:,2], T=float(TEMP)), floor=float(FLOOR))
-            ws = apply_floor(softmax_temp(rows[:,3], T=float(TEMP)), floor=float(FLOOR))
-            if float(ALPHA) < 1.0:
-                wl = blend_with_prior(wl, PRIOR_LONG,  alpha=float(ALPHA))
-                ws = blend_with_prior(ws, PRIOR_SHORT, alpha=float(ALPHA))
-            long_hist.append(float(np.sum(wl * rows[:,0])))
-            short_hist.append(float(np.sum(ws * rows[:,1])))
+            l, s_, _, _ = _weighted_scores(rows, TEMP, FLOOR, ALPHA, PRIOR_LONG, PRIOR_SHORT)
+            long_hist.append(l)
+            short_hist.append(s_)
+            cached_scores[d_str] = (l, s_)
+
+    # Today's score is tomorrow's history point (same past window, same weighting)
+    if history_key:
+        cached_scores[pd.to_datetime(target_date).strftime("%Y-%m-%d")] = (long_score, short_score)
+        try:
+            save_tier_history(history_key, MODEL_NAMES, cached_scores,
+                              keep_days=2 * int(_cfg_get(["windows","DIST_LOOKBACK_DAYS"], 180)))
+        except Exception as e:
+            print(f"⚠️ Failed to save tier history: {e}")
+    _stage("distribution_build", rows=len(long_hist))
 
     # ===== Tiers & output =====
-    TIER_LABELS = list(TIER_LABELS)
-    long_tier   = assign_tier(long_score,  long_hist,  LONG_TOP_CUM_PCTS,  TIER_LABELS)
-    short_tier  = assign_tier(short_score, short_hist, SHORT_TOP_CUM_PCTS, TIER_LABELS)
-    long_pct    = percentile_rank(long_hist,  long_score)
-    short_pct   = percentile_rank(short_hist, short_score)
-
-    # Create today's tier data for enhanced analysis
-    today_tiers = {
-        "as_of_date_today": pd.to_datetime(target_date).strftime("%Y-%m-%d"),
-        "long_score": long_score,
-        "long_tier": long_tier,
-        "short_score": short_score,
-        "short_tier": short_tier,
-        "details_json": json.dumps({
-            "date": pd.to_datetime(target_date).strftime("%Y-%m-%d"),
-            "long": {
-                "score": round(long_score, 6),
-                "percentile": None if np.isnan(long_pct) else round(long_pct, 2),
-                "tier": long_tier,
-                "bias": bias_tag("long", long_score, long_hist),
-                "model_weights": dict(zip(sig_df["model_name"], np.round(w_long, 4))),
-                "model_signals": dict(zip(sig_df["model_name"], np.round(sig_df["long_signal"], 4))),
-                "cuts_top_cum_pct": LONG_TOP_CUM_PCTS,
-            },
-            "short": {
-                "score": round(short_score, 6),
-                "percentile": None if np.isnan(short_pct) else round(short_pct, 2),
-                "tier": short_tier,
-                "bias": bias_tag("short", short_score, short_hist),
-                "model_weights": dict(zip(sig_df["model_name"], np.round(w_short, 4))),
-                "model_signals": dict(zip(sig_df["model_name"], np.round(sig_df["short_signal"], 4))),
-                "cuts_top_cum_pct": SHORT_TOP_CUM_PCTS,
-            },
-        }, ensure_ascii=False)
-    }
+    today_tiers, daily_row = _tier_outputs(target_date, sig_df, w_long, w_short, long_score, short_score,
+                                           long_hist, short_hist, LONG_TOP_CUM_PCTS, SHORT_TOP_CUM_PCTS,
+                                           TIER_LABELS)
 
     # Initialize explanation system and generate enhanced analysis
     explanation_system = MarketExplanationSystem()
@@ -1461,77 +2638,863 @@ def compute_result(event=None):
     explanation = explanation_system.generate_comprehensive_explanation(
         today_tiers, yesterday_tiers, yesterday_price
     )
+    _stage("explanation")
 
-    # Optional: write to DB + push back to S3
+    # Optional: write to DB + push back to S3. A failure here does not stop the
+    # summary writes below, but the invocation still fails once they are done.
+    db_error = None
     if STORE_IN_DB:
         try:
             if conn is None:
                 download_db()
                 conn = sqlite3.connect(DB_LOCAL)
-            upsert_daily_tiers(conn, {
-                "date": today_tiers["as_of_date_today"],
-                "long": {
-                    "score": long_score,
-                    "tier": long_tier,
-                    "percentile": None if np.isnan(long_pct) else round(long_pct, 2),
-                    "bias": bias_tag("long", long_score, long_hist),
-                    "model_weights": dict(zip(sig_df["model_name"], np.round(w_long, 4))),
-                    "model_signals": dict(zip(sig_df["model_name"], np.round(sig_df["long_signal"], 4))),
-                    "cuts_top_cum_pct": LONG_TOP_CUM_PCTS,
-                },
-                "short": {
-                    "score": short_score,
-                    "tier": short_tier,
-                    "percentile": None if np.isnan(short_pct) else round(short_pct, 2),
-                    "bias": bias_tag("short", short_score, short_hist),
-                    "model_weights": dict(zip(sig_df["model_name"], np.round(w_short, 4))),
-                    "model_signals": dict(zip(sig_df["model_name"], np.round(sig_df["short_signal"], 4))),
-                    "cuts_top_cum_pct": SHORT_TOP_CUM_PCTS,
-                },
-            })
+            delta_rows["daily_tiers"] = upsert_daily_tiers(conn, daily_row, commit=False)
         except Exception as e:
             print(f"⚠️ DB upsert failed: {e}")
+            db_error = f"DB upsert failed: {e}"
         finally:
             if conn:
                 conn.commit()
                 conn.close()
                 try:
-                    s3.upload_file(DB_LOCAL, DB_BUCKET, DB_KEY)
-                    print(f"📤 Uploaded updated DB to s3://{DB_BUCKET}/{DB_KEY}")
+                    if SHIP_DB_DELTAS:
+                        ship_db_delta(delta_rows)
+                    else:
+                        upload_db_guarded(lambda c: [_apply_table_rows(c, t, DELTA_TABLES[t][2], r)
+                                                     for t, r in delta_rows.items() if r])
                 except Exception as e:
                     print(f"⚠️ Failed to upload DB back to S3: {e}")
+                    db_error = db_error or f"Failed to upload DB back to S3: {e}"
 
     # Write enhanced summary JSON to S3
     if WRITE_TIER_TO_S3:
-        out_key = f"summary_json/{explanation['date']}.json"
-        s3.put_object(
+        out_key = f"{SUMMARY_PREFIX.rstrip('/')}/{explanation['date']}.json"
+        put = s3.put_object(
             Bucket=DB_BUCKET,
             Key=out_key,
             Body=json.dumps(explanation, ensure_ascii=False, separators=(",",":")).encode("utf-8"),
             ContentType="application/json"
         )
         print(f"📤 Wrote enhanced summary to s3://{DB_BUCKET}/{out_key}")
+        try:
+            publish_latest_summary(explanation, put.get("ETag"))
+        except Exception as e:
+            print(f"⚠️ Failed to update latest summary pointer: {e}")
+        try:
+            update_tiers_timeline([daily_row])
+        except Exception as e:
+            print(f"⚠️ Failed to update tiers timeline: {e}")
+    _stage("writes", rows=len(delta_rows.get("daily_tiers") or []))
 
-    # Best-effort cleanup to avoid /tmp filling on warm invocations
+    # Read-only run that had to fall back to the full DB: refresh the extract /
+    # columnar snapshot for the next reader
+    if USE_DB_EXTRACT and not STORE_IN_DB and DB_LOCAL in artifacts:
+        try:
+            artifacts.append(publish_tier_extract(MODEL_NAMES))
+        except Exception as e:
+            print(f"⚠️ Failed to publish tiers extract: {e}")
+    if USE_COLUMNAR_HISTORY and not STORE_IN_DB and DB_LOCAL in artifacts:
+        try:
+            publish_columnar_snapshot()
+        except Exception as e:
+            print(f"⚠️ Failed to publish columnar snapshot: {e}")
+    _stage("publish")
+
+    # Best-effort cleanup to avoid /tmp filling on warm invocations. Read-only runs
+    # keep the DB/extract for the next warm invocation (revalidated by ETag).
+    keep = set(_tmp_keep)
+    if WARM_CACHE and not STORE_IN_DB:
+        keep.update((DB_LOCAL, DB_EXTRACT_LOCAL))
     try:
-        _cleanup_tmp(artifacts)
+        _cleanup_tmp([p for p in artifacts if p not in keep])
     except Exception:
         pass
 
+    if db_error:
+        raise RuntimeError(db_error)
     return explanation
 
 
+# =========================
+# Tiers timeline
+# =========================
+# The history pages only need date/tier/score per day. Every summary write also
+# merges its dates into <TIMELINE_PREFIX>/<TICKER>/250d.json (If-Match guarded,
+# newest 250 rated days) and then rewrites the 20d/40d tails from whatever 250d
+# document is current, so a page is one GET instead of one per day. A
+# --range --write-s3 backfill seeds it.
+TIMELINE_WINDOWS = (20, 40, 250)
+
+def _timeline_key(window):
+    return f"{TIMELINE_PREFIX.rstrip('/')}/{TICKER}/{window}d.json"
+
+def _timeline_entry(daily_row):
+    return {"date": daily_row["date"],
+            "long_tier": daily_row["long"]["tier"], "short_tier": daily_row["short"]["tier"],
+            "long_score": round(daily_row["long"]["score"], 6),
+            "short_score": round(daily_row["short"]["score"], 6),
+            "long_pct": daily_row["long"]["percentile"], "short_pct": daily_row["short"]["percentile"]}
+
+def update_tiers_timeline(daily_rows):
+    """Merge `daily_rows` (upsert_daily_tiers result dicts) into the timeline windows; same date → replaced."""
+    longest = max(TIMELINE_WINDOWS)
+    key = _timeline_key(longest)
+    new = {e["date"]: e for e in map(_timeline_entry, daily_rows)}
+    for attempt in range(DB_WRITE_RETRIES + 1):
+        try:
+            obj = s3.get_object(Bucket=DB_BUCKET, Key=key)
+            etag, entries = obj.get("ETag"), json.loads(obj["Body"].read()).get("entries") or []
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+                raise
+            etag, entries = None, []
+        merged = {e["date"]: e for e in entries}
+        merged.update(new)
+        entries = [merged[d] for d in sorted(merged)][-longest:]
+        stamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        doc = {"ticker": TICKER, "window": longest, "updated_at": stamp, "entries": entries}
+
+        kw = _guarded_put_kwargs(key, etag)
+        try:
+            s3.put_object(Bucket=DB_BUCKET, Key=key, ContentType="application/json",
+                          Body=json.dumps(doc, ensure_ascii=False, separators=(",",":")).encode("utf-8"),
+                          **kw)
+        except ClientError as e:
+            if not _is_precondition_conflict(e):
+                raise
+            time.sleep(min(2.0, 0.2 * (2 ** attempt)) * (0.5 + random.random()))
+            continue
+        failed = []
+        for w in TIMELINE_WINDOWS:
+            if w == longest:
+                continue
+            try:
+                _sync_timeline_window(w)
+            except Exception as e:
+                print(f"⚠️ Failed to write s3://{DB_BUCKET}/{_timeline_key(w)}: {e}")
+                failed.append(w)
+        print(f"📤 Timeline {entries[0]['date']}→{entries[-1]['date']} ({len(entries)} day(s)) under "
+              f"s3://{DB_BUCKET}/{TIMELINE_PREFIX.rstrip('/')}/{TICKER}/"
+              + (f", {len(failed)} window(s) failed" if failed else ""))
+        return len(entries)
+    raise RuntimeError(f"Gave up updating s3://{DB_BUCKET}/{key} after {DB_WRITE_RETRIES + 1} conflicts")
+
+def _sync_timeline_window(window):
+    """
+    Rewrite the `window`-day tail from the current 250d document (not from this
+    writer's copy, which may have lost a race). The tail's ETag is read before
+    the 250d document and the PUT is If-Match guarded, so a concurrent writer's
+    newer tail is never replaced by an older one: either it landed before our
+    read of 250d (and we copy the same or newer entries) or our PUT conflicts.
+    """
+    key = _timeline_key(window)
+    for attempt in range(DB_WRITE_RETRIES + 1):
+        try:
+            etag = s3.head_object(Bucket=DB_BUCKET, Key=key).get("ETag")
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404", "NotFound"):
+                raise
+            etag = None
+        source = json.loads(s3.get_object(Bucket=DB_BUCKET, Key=_timeline_key(max(TIMELINE_WINDOWS)))["Body"].read())
+        doc = {"ticker": source.get("ticker", TICKER), "window": window,
+               "updated_at": source.get("updated_at"), "entries": (source.get("entries") or [])[-window:]}
+
+        kw = _guarded_put_kwargs(key, etag)
+        try:
+            s3.put_object(Bucket=DB_BUCKET, Key=key, ContentType="application/json",
+                          Body=json.dumps(doc, ensure_ascii=False, separators=(",",":")).encode("utf-8"),
+                          **kw)
+            return
+        except ClientError as e:
+            if not _is_precondition_conflict(e):
+                raise
+            time.sleep(min(2.0, 0.2 * (2 ** attempt)) * (0.5 + random.random()))
+    raise RuntimeError(f"Gave up updating s3://{DB_BUCKET}/{key} after {DB_WRITE_RETRIES + 1} conflicts")
+
+
+# =========================
+# Latest summary pointer
+# =========================
+# Readers used to find the newest summary by walking back day by day (a 404 per
+# weekend/holiday day, per ticker). After a dated summary is confirmed in S3,
+# <LATEST_SUMMARY_PREFIX>/<TICKER>.json gets the same document and
+# <TICKER>.manifest.json its date, key and ETag. Both only ever move forward
+# (If-Match guarded), so a backfill of an older date leaves them alone. They live
+# outside summary_json/ because PreSyncDb expects only <date>.json there.
+#
+# Only publish_latest_summary() moves the pointer. Summaries that reach S3 any other
+# way (the per-ticker `aws s3 sync` mirrors, external tier Lambdas) leave it stale
+# until a {"refresh_latest_summary": true, "ticker": ...} run re-points it.
+def _summary_prefix(ticker=None):
+    ticker = str(ticker or TICKER).upper()
+    if ticker == TICKER:
+        return SUMMARY_PREFIX.rstrip("/")
+    return "summary_json" if ticker == "SPY" else f"summary_json/{ticker}"
+
+def _latest_summary_key(ticker=None):
+    return f"{LATEST_SUMMARY_PREFIX.rstrip('/')}/{str(ticker or TICKER).upper()}.json"
+
+def _summary_manifest_key(ticker=None):
+    return f"{LATEST_SUMMARY_PREFIX.rstrip('/')}/{str(ticker or TICKER).upper()}.manifest.json"
+
+def _put_json_if_newer(key, obj, date):
+    """PUT `obj` at `key` unless the stored document's "date" is newer; True when written."""
+    body = json.dumps(obj, ensure_ascii=False, separators=(",",":")).encode("utf-8")
+    for attempt in range(DB_WRITE_RETRIES + 1):
+        try:
+            cur = s3.get_object(Bucket=DB_BUCKET, Key=key)
+            etag, cur_date = cur.get("ETag"), (json.loads(cur["Body"].read()) or {}).get("date")
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+                raise
+            etag, cur_date = None, None
+        if cur_date and str(cur_date) > date:
+            return False
+
+        kw = _guarded_put_kwargs(key, etag)
+        try:
+            s3.put_object(Bucket=DB_BUCKET, Key=key, Body=body, ContentType="application/json", **kw)
+            return True
+        except ClientError as e:
+            if not _is_precondition_conflict(e):
+                raise
+            time.sleep(min(2.0, 0.2 * (2 ** attempt)) * (0.5 + random.random()))
+    raise RuntimeError(f"Gave up updating s3://{DB_BUCKET}/{key} after {DB_WRITE_RETRIES + 1} conflicts")
+
+def publish_latest_summary(explanation, etag=None, ticker=None):
+    """
+    Point the latest pointer/manifest at the dated summary for explanation["date"].
+    The dated object must already be in S3: it is HEADed first (and must carry
+    `etag` when given), so the pointer never names a summary readers cannot GET.
+    """
+    ticker = str(ticker or TICKER).upper()
+    date = explanation["date"]
+    key = f"{_summary_prefix(ticker)}/{date}.json"
+    latest_key = _latest_summary_key(ticker)
+    head = s3.head_object(Bucket=DB_BUCKET, Key=key)
+    if etag and head.get("ETag") != etag:
+        raise RuntimeError(f"s3://{DB_BUCKET}/{key} changed under us ({head.get('ETag')} != {etag})")
+
+    if not _put_json_if_newer(latest_key, explanation, date):
+        print(f"ℹ️ {latest_key} already points past {date}; left as is")
+        return False
+    _put_json_if_newer(_summary_manifest_key(ticker), {
+        "ticker": ticker, "date": date, "key": key, "etag": head.get("ETag"),
+        "latest_key": latest_key,
+        "updated_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }, date)
+    print(f"📤 Latest summary → {date} (s3://{DB_BUCKET}/{latest_key})")
+    return True
+
+def refresh_latest_summary(ticker=None):
+    """
+    Re-point the latest pointer at the newest dated summary under the ticker's
+    prefix, for summaries written without publish_latest_summary(). Lists only
+    keys from the date the pointer already names on (that day's file included,
+    in case a sync replaced it).
+    """
+    ticker = str(ticker or TICKER).upper()
+    base = f"{_summary_prefix(ticker)}/"
+    try:
+        current = json.loads(s3.get_object(Bucket=DB_BUCKET, Key=_latest_summary_key(ticker))["Body"].read())
+        after = str(current.get("date") or "")
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+            raise
+        after = ""
+
+    dates, kw = [], dict(Bucket=DB_BUCKET, Prefix=base, Delimiter="/")
+    if after:
+        kw["StartAfter"] = f"{base}{after}"
+    while True:
+        resp = s3.list_objects_v2(**kw)
+        dates += [m.group(1) for m in (re.match(re.escape(base) + r"(\d{4}-\d{2}-\d{2})\.json$", o["Key"])
+                                       for o in resp.get("Contents", [])) if m]
+        if not resp.get("IsTruncated"):
+            break
+        kw["ContinuationToken"] = resp["NextContinuationToken"]
+    if not dates:
+        print(f"ℹ️ No dated summary under s3://{DB_BUCKET}/{base}")
+        return {"ticker": ticker, "date": None, "updated": False}
+
+    date = max(dates)
+    obj = s3.get_object(Bucket=DB_BUCKET, Key=f"{base}{date}.json")
+    doc = {**json.loads(obj["Body"].read()), "date": date}
+    return {"ticker": ticker, "date": date,
+            "updated": publish_latest_summary(doc, etag=obj.get("ETag"), ticker=ticker)}
+
+
+# =========================
+# Backfill / replay over a date range
+# =========================
+def _put_json_many(items, workers=None):
+    """PUT many (key, obj) JSON documents to DB_BUCKET concurrently; returns the failed keys."""
+    def one(item):
+        key, obj = item
+        try:
+            s3.put_object(Bucket=DB_BUCKET, Key=key,
+                          Body=json.dumps(obj, ensure_ascii=False, separators=(",",":")).encode("utf-8"),
+                          ContentType="application/json")
+            return None
+        except Exception as e:
+            print(f"⚠️ Failed to write s3://{DB_BUCKET}/{key}: {e}")
+            return key
+    workers = S3_FETCH_WORKERS if workers is None else workers
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(items) or 1))) as pool:
+        return [k for k in pool.map(one, items) if k]
+
+def _tier_settings():
+    """The tiers/weights/windows knobs of the current _cfg, with compute_result's defaults."""
+    return {
+        "TIER_LABELS":        _cfg_get(["tiers","labels"], ["SSS","SS","S","A+","A","B+","B","C+","C","D"]),
+        "LONG_TOP_CUM_PCTS":  _cfg_get(["tiers","long_top_cum_pcts"],  [1,3,7,14,24,52,69,82,93,100]),
+        "SHORT_TOP_CUM_PCTS": _cfg_get(["tiers","short_top_cum_pcts"], [0.1,0.4,1.4,4.4,21.4,49.4,66.4,82.4,93.4,100]),
+        "TEMP":  float(_cfg_get(["weights","TEMP"], 10.0)),
+        "FLOOR": float(_cfg_get(["weights","FLOOR"], 0.12)),
+        "ALPHA": float(_cfg_get(["weights","ALPHA"], 1.0)),
+        "PRIOR_LONG":  np.array(_cfg_get(["weights","PRIOR_LONG"],  [0.40,0.40,0.20]), dtype=float),
+        "PRIOR_SHORT": np.array(_cfg_get(["weights","PRIOR_SHORT"], [0.20,0.20,0.60]), dtype=float),
+        "ROLL_DAYS_PRIMARY":  int(_cfg_get(["windows","ROLL_DAYS_PRIMARY"], 60)),
+        "ROLL_DAYS_FALLBACK": int(_cfg_get(["windows","ROLL_DAYS_FALLBACK"], 120)),
+        "MIN_HISTORY":        int(_cfg_get(["windows","MIN_HISTORY"], 30)),
+        "DIST_LOOKBACK_DAYS": int(_cfg_get(["windows","DIST_LOOKBACK_DAYS"], 180)),
+    }
+
+def _replay_frame(conn, model_names, start, end):
+    """
+    All model_eval_summary rows for `model_names` plus the date axes a replay needs:
+    (df, all_dates, targets in [start, end], span = targets + every date they can use as history).
+    """
+    df = pd.read_sql_query(
+        f"""
+        SELECT {", ".join(_engine_columns(conn)) or "*"}
+        FROM model_eval_summary
+        WHERE model_name IN ({",".join(["?"]*len(model_names))})
+        ORDER BY as_of_date_today ASC
+        """,
+        conn,
+        params=model_names
+    )
+    if df.empty:
+        raise RuntimeError("No rows found for the specified models.")
+    df["as_of_date_today"] = pd.to_datetime(df["as_of_date_today"])
+    df = compact_history_frame(df, max_mb=0)  # a replay needs every date; no ceiling
+
+    all_dates = pd.DatetimeIndex(df["as_of_date_today"].drop_duplicates().sort_values())
+    lo, hi = pd.to_datetime(start), pd.to_datetime(end)
+    targets = all_dates[(all_dates >= lo) & (all_dates <= hi)]
+    if len(targets) == 0:
+        raise RuntimeError(f"No model rows between {lo.date()} and {hi.date()}.")
+    span = all_dates[(all_dates >= targets[0] - pd.Timedelta(days=365*2)) & (all_dates <= hi)]
+    return df, all_dates, targets, span
+
+def _history_window(all_dates, d, lookback):
+    """compute_result's hist_dates for target `d`: the last `lookback` dates before it, within 2 years."""
+    pos = all_dates.searchsorted(d)
+    window = all_dates[max(0, pos - lookback):pos]
+    return window[window >= d - pd.Timedelta(days=365*2)]
+
+def compute_range(start, end, cfg=None, write_s3=None, store_in_db=None):
+    """
+    Re-rate every date with model rows in [start, end] (inclusive) in one pass.
+
+    History comes from the DB as with SOURCE=sqlite. Signals for the whole span come
+    from one engine pass and each date's score is computed once, then reused as
+    history by later dates. Each date's "yesterday" is the previous replayed date.
+    Summaries go to S3 in one concurrent burst and daily_tiers in one transaction.
+    """
+    global _cfg
+    t0 = time.perf_counter()
+    _cfg = cfg if cfg is not None else load_config_from_s3()
+    write_s3    = WRITE_TIER_TO_S3 if write_s3 is None else write_s3
+    store_in_db = STORE_IN_DB if store_in_db is None else store_in_db
+
+    MODEL_NAMES = [x.strip() for x in (MODEL_NAMES_ENV.split(",")
+                    if MODEL_NAMES_ENV else DEFAULT_MODEL_NAMES)]
+    st = _tier_settings()
+
+    read_path = DB_LOCAL if store_in_db else download_read_db(MODEL_NAMES)
+    if read_path == DB_LOCAL:
+        download_db()
+    conn = sqlite3.connect(read_path)
+    try:
+        df, all_dates, targets, span = _replay_frame(conn, MODEL_NAMES, start, end)
+        engine = model_signal_history(df, MODEL_NAMES, list(span),
+                                      st["ROLL_DAYS_PRIMARY"], st["ROLL_DAYS_FALLBACK"], st["MIN_HISTORY"])
+        scored = {}  # date → (long_score, short_score, w_long, w_short, names, rows)
+        for d in span:
+            names = [m for m in MODEL_NAMES if d in engine[m]]
+            if names:
+                rows = [engine[m][d] for m in names]
+                scored[d] = _weighted_scores(rows, st["TEMP"], st["FLOOR"], st["ALPHA"],
+                                             st["PRIOR_LONG"], st["PRIOR_SHORT"]) + (names, rows)
+
+        explanation_system = MarketExplanationSystem()
+        results, daily_rows, errors = {}, [], {}
+        prev_tiers = None
+        for d in targets:
+            date_str = d.strftime("%Y-%m-%d")
+            if d not in scored:
+                errors[date_str] = "No per-model rows for target date; cannot compute tiers."
+                continue
+            long_score, short_score, w_long, w_short, names, rows = scored[d]
+            sig_df = pd.DataFrame({"model_name": names,
+                                   "long_signal":  [r[0] for r in rows],
+                                   "short_signal": [r[1] for r in rows]})
+
+            window = _history_window(all_dates, d, st["DIST_LOOKBACK_DAYS"])
+            long_hist  = [scored[h][0] for h in window if h in scored]
+            short_hist = [scored[h][1] for h in window if h in scored]
+
+            today_tiers, daily_row = _tier_outputs(d, sig_df, w_long, w_short, long_score, short_score,
+                                                   long_hist, short_hist, st["LONG_TOP_CUM_PCTS"],
+                                                   st["SHORT_TOP_CUM_PCTS"], st["TIER_LABELS"])
+            yesterday_tiers, yesterday_price = explanation_system.get_yesterday_data(conn, date_str)
+            if prev_tiers is not None:
+                yesterday_tiers = prev_tiers
+            results[date_str] = explanation_system.generate_comprehensive_explanation(
+                today_tiers, yesterday_tiers, yesterday_price)
+            daily_rows.append(daily_row)
+            # The row get_yesterday_data would read back from daily_tiers
+            prev_tiers = {"as_of_date_today": date_str,
+                          "long_score": daily_row["long"]["score"], "long_tier": daily_row["long"]["tier"],
+                          "short_score": daily_row["short"]["score"], "short_tier": daily_row["short"]["tier"],
+                          "details_json": json.dumps(daily_row, ensure_ascii=False)}
+
+        written = None
+        if store_in_db and daily_rows:
+            written = upsert_daily_tiers(conn, daily_rows)
+    finally:
+        conn.close()
+
+    if store_in_db and daily_rows:
+        if SHIP_DB_DELTAS:
+            ship_db_delta({"daily_tiers": written})
+        else:
+            upload_db_guarded(lambda c: _apply_table_rows(c, "daily_tiers", DAILY_TIERS_COLS, written))
+
+    failed_writes = []
+    if write_s3 and results:
+        failed_writes = _put_json_many([(f"{SUMMARY_PREFIX.rstrip('/')}/{exp['date']}.json", exp)
+                                        for exp in results.values()])
+        print(f"📤 Wrote {len(results) - len(failed_writes)} summaries under s3://{DB_BUCKET}/{SUMMARY_PREFIX}/")
+        written_dates = [d for d in results
+                         if f"{SUMMARY_PREFIX.rstrip('/')}/{d}.json" not in failed_writes]
+        try:
+            if written_dates:
+                publish_latest_summary(results[max(written_dates)])
+        except Exception as e:
+            print(f"⚠️ Failed to update latest summary pointer: {e}")
+        try:
+            update_tiers_timeline(daily_rows)
+        except Exception as e:
+            print(f"⚠️ Failed to update tiers timeline: {e}")
+
+    if store_in_db or not WARM_CACHE:
+        _cleanup_tmp([DB_LOCAL] if store_in_db else [read_path])
+    wall = time.perf_counter() - t0
+    rate = len(results) / wall if wall > 0 else float("inf")
+    print(f"📊 Replayed {len(results)} date(s) {targets[0].date()}→{targets[-1].date()} "
+          f"in {wall:.2f}s ({rate:.1f} dates/s), {len(errors)} skipped")
+    return {"dates": list(results), "results": results, "errors": errors,
+            "failed_writes": failed_writes, "seconds": round(wall, 3),
+            "dates_per_sec": round(rate, 2)}
+
+
+# =========================
+# Config sweep
+# =========================
+def _cfg_with(base, overrides):
+    """Copy of config `base` with dotted-path overrides ({"weights.TEMP": 5, ...}) applied."""
+    cfg = json.loads(json.dumps(base))
+    for path, value in overrides.items():
+        cur = cfg
+        keys = path.split(".")
+        for k in keys[:-1]:
+            cur = cur.setdefault(k, {})
+        cur[keys[-1]] = value
+    return cfg
+
+def sweep_configs(start, end, grid, cfg=None):
+    """
+    Rate every date in [start, end] under the base config and under each combination
+    of `grid` ({"weights.TEMP": [5, 10, 20], "windows.MIN_HISTORY": [20, 30], ...},
+    dotted paths into tiers/config.json). Nothing is written.
+
+    The per-model z-scores and confidences (the expensive part) are computed once,
+    skills once per distinct window setting; each variant only re-runs the softmax
+    weighting and the tier assignment. Returns {"variants": [...], "table": str, ...}.
+    """
+    global _cfg
+    t0 = time.perf_counter()
+    base = cfg if cfg is not None else load_config_from_s3()
+    paths = list(grid)
+    variants = [({}, base)] + [(dict(zip(paths, combo)), _cfg_with(base, dict(zip(paths, combo))))
+                               for combo in itertools.product(*(grid[p] for p in paths))]
+
+    MODEL_NAMES = [x.strip() for x in (MODEL_NAMES_ENV.split(",")
+                    if MODEL_NAMES_ENV else DEFAULT_MODEL_NAMES)]
+    read_path = download_read_db(MODEL_NAMES)
+    with closing(sqlite3.connect(read_path)) as conn:
+        df, all_dates, targets, span = _replay_frame(conn, MODEL_NAMES, start, end)
+    parts = model_signal_parts(df, MODEL_NAMES, list(span))
+
+    skills_by_window = {}
+    rows_out, base_tiers = [], None
+    try:
+        for params, vcfg in variants:
+            _cfg = vcfg
+            st = _tier_settings()
+            wkey = (st["ROLL_DAYS_PRIMARY"], st["ROLL_DAYS_FALLBACK"], st["MIN_HISTORY"])
+            if wkey not in skills_by_window:
+                skills_by_window[wkey] = {m: model_skills(part, *wkey) for m, part in parts.items()}
+            engine = combine_signal_history(parts, MODEL_NAMES, skills_by_window[wkey])
+
+            scores = {}
+            for d in span:
+                rows = [engine[m][d] for m in MODEL_NAMES if d in engine[m]]
+                if rows:
+                    scores[d] = _weighted_scores(rows, st["TEMP"], st["FLOOR"], st["ALPHA"],
+                                                 st["PRIOR_LONG"], st["PRIOR_SHORT"])[:2]
+            labels = list(st["TIER_LABELS"])
+            tiers = {}
+            for d in targets:
+                if d not in scores:
+                    continue
+                window = _history_window(all_dates, d, st["DIST_LOOKBACK_DAYS"])
+                long_hist  = [scores[h][0] for h in window if h in scores]
+                short_hist = [scores[h][1] for h in window if h in scores]
+                tiers[d] = (assign_tier(scores[d][0], long_hist,  st["LONG_TOP_CUM_PCTS"],  labels),
+                            assign_tier(scores[d][1], short_hist, st["SHORT_TOP_CUM_PCTS"], labels))
+            if base_tiers is None:
+                base_tiers = tiers
+
+            dates = list(tiers)
+            row = {"params": params, "dates": len(dates)}
+            for j, side in enumerate(("long", "short")):
+                seq = [tiers[d][j] for d in dates]
+                row[f"{side}_mean"] = round(float(np.mean([scores[d][j] for d in dates])), 4) if dates else None
+                row[f"{side}_top3_pct"] = round(100.0 * sum(t in labels[:3] for t in seq) / len(seq), 1) if seq else None
+                row[f"{side}_flips"] = sum(a != b for a, b in zip(seq, seq[1:]))
+                common = [d for d in dates if d in base_tiers]
+                row[f"{side}_agree_pct"] = round(100.0 * sum(tiers[d][j] == base_tiers[d][j] for d in common)
+                                                 / len(common), 1) if common else None
+                row[f"{side}_tiers"] = {t: seq.count(t) for t in labels if t in seq}
+            rows_out.append(row)
+    finally:
+        _cfg = base
+
+    names = [", ".join(f"{k}={v}" for k, v in row["params"].items()) or "base" for row in rows_out]
+    width = max(len("variant"), *(len(n) for n in names))
+    header = f"{'variant':<{width}} {'L_mean':>8} {'S_mean':>8} {'L_top3%':>7} {'S_top3%':>7} " \
+             f"{'L_flip':>6} {'S_flip':>6} {'L_agr%':>6} {'S_agr%':>6}"
+    lines = [header]
+    for name, row in zip(names, rows_out):
+        lines.append(f"{name:<{width}} {row['long_mean']!s:>8} {row['short_mean']!s:>8} "
+                     f"{row['long_top3_pct']!s:>7} {row['short_top3_pct']!s:>7} "
+                     f"{row['long_flips']:>6} {row['short_flips']:>6} "
+                     f"{row['long_agree_pct']!s:>6} {row['short_agree_pct']!s:>6}")
+    table = "\n".join(lines)
+    wall = time.perf_counter() - t0
+    print(f"📊 Config sweep: {len(variants)} variant(s), {len(skills_by_window)} skill window(s), "
+          f"{len(targets)} date(s) in {wall:.2f}s\n{table}")
+    return {"variants": rows_out, "table": table, "dates": len(targets), "seconds": round(wall, 3)}
+
+
+# =========================
+# Batch (multi-ticker) mode
+# =========================
+# One invocation rates many tickers: configs are fetched once in the parent.
+# Read-only jobs fan out one per forked worker over a DB the parent downloaded
+# once (workers only read it). With STORE_IN_DB=1, jobs sharing a DB run
+# back-to-back in one worker (no concurrent writers) and distinct DBs run in
+# parallel. Lambda has no /dev/shm, so workers are plain fork()ed Processes
+# with a Pipe each rather than a multiprocessing.Pool.
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", str(os.cpu_count() or 2)))
+
+_tmp_keep = set()  # /tmp paths compute_result must not clean up (batch workers)
+
+def _batch_db_local(db_key):
+    return f"/tmp/batch/{re.sub(r'[^A-Za-z0-9_.-]+', '_', db_key)}"
+
+def _prefetch_batch_db(db_key):
+    """Download `db_key` once for read-only workers; False if they must fetch it themselves."""
+    local = _batch_db_local(db_key)
+    try:
+        _batch_db_etags[local] = _download_db_once(s3, DB_BUCKET, db_key, local,
+                                                   _batch_db_etags.get(local) if WARM_CACHE else None)
+        return True
+    except Exception as e:
+        _batch_db_etags.pop(local, None)
+        print(f"⚠️ Could not prefetch s3://{DB_BUCKET}/{db_key} ({e}); its jobs share one worker.")
+        return False
+
+# Module settings a batch job may override; every job starts from the env values
+_BATCH_FIELDS = ("TICKER", "SUMMARY_PREFIX", "DB_KEY", "MODELS_PREFIX", "CONFIG_KEY", "MODEL_NAMES_ENV",
+                 "DB_LOCAL", "DB_EXTRACT_KEY", "DB_EXTRACT_LOCAL", "COLUMNAR_PREFIX")
+_batch_defaults = {k: globals()[k] for k in _BATCH_FIELDS}
+
+def _apply_batch_job(job):
+    """Point this (forked) process's module settings at one batch job's ticker."""
+    global TICKER, SUMMARY_PREFIX, DB_KEY, MODELS_PREFIX, CONFIG_KEY, MODEL_NAMES_ENV
+    global DB_LOCAL, DB_EXTRACT_KEY, DB_EXTRACT_LOCAL, COLUMNAR_PREFIX, _db_etag, _extract_etag
+    prev_local = DB_LOCAL
+    globals().update(_batch_defaults)  # nothing carries over from the previous job
+
+    TICKER = str(job.get("ticker") or TICKER).upper()
+    SUMMARY_PREFIX = job.get("summary_prefix") or (
+        "summary_json" if TICKER == "SPY" else f"summary_json/{TICKER}")
+    MODELS_PREFIX = job.get("models_prefix") or MODELS_PREFIX
+    CONFIG_KEY = job.get("config_key") or CONFIG_KEY
+    if job.get("model_names"):
+        names = job["model_names"]
+        MODEL_NAMES_ENV = names if isinstance(names, str) else ",".join(names)
+    if job.get("db_key") and job["db_key"] != DB_KEY:
+        DB_KEY = job["db_key"]
+        COLUMNAR_PREFIX = job.get("columnar_prefix") or re.sub(
+            r"(\.db)?$", "", DB_KEY, count=1) + "/columnar/model_eval_summary"
+    DB_EXTRACT_KEY = _tier_extract_key(DB_KEY, TICKER)
+    DB_LOCAL = _batch_db_local(DB_KEY)
+    DB_EXTRACT_LOCAL = _tier_extract_key(DB_LOCAL, TICKER)
+    if DB_LOCAL != prev_local:
+        # The cached ETags describe files at the previous paths
+        _db_etag = _extract_etag = None
+    _tmp_keep.add(DB_LOCAL)
+
+def _run_batch_group(jobs, cfgs, default_as_of):
+    """Run jobs that share one DB in order; never raises (errors are per job)."""
+    _tmp_keep.clear()
+    out = []
+    for job in jobs:
+        t0 = time.perf_counter()
+        ticker = str(job.get("ticker") or TICKER).upper()
+        try:
+            _apply_batch_job(job)
+            res = compute_result({"as_of": job.get("as_of") or default_as_of},
+                                 cfg=cfgs.get(CONFIG_KEY))
+            out.append({"ticker": ticker, "ok": True, "result": res,
+                        "seconds": round(time.perf_counter() - t0, 3)})
+        except Exception as e:
+            print(f"❌ [{ticker}] {e}")
+            out.append({"ticker": ticker, "ok": False, "error": str(e),
+                        "seconds": round(time.perf_counter() - t0, 3)})
+    # A prefetched DB is shared with sibling workers; the parent removes it
+    _cleanup_tmp([p for p in _tmp_keep if p not in _batch_db_etags] + [DB_EXTRACT_LOCAL])
+    _tmp_keep.clear()
+    return out
+
+def _batch_child(jobs, cfgs, default_as_of, conn):
+    global s3
+    try:
+        s3 = _new_s3_client()  # never reuse the parent's connection pool after fork()
+        conn.send(_run_batch_group(jobs, cfgs, default_as_of))
+    finally:
+        conn.close()
+
+def run_batch(jobs, as_of=None, workers=None):
+    """
+    Rate several tickers in one invocation. Each job is a dict with `ticker` and
+    optional `as_of`, `model_names`, `db_key`, `models_prefix`, `config_key`,
+    `summary_prefix`. Returns per-job results/errors in input order.
+    """
+    import multiprocessing as mp
+    from multiprocessing.connection import wait
+
+    workers = max(1, BATCH_WORKERS if workers is None else int(workers))
+    t0 = time.perf_counter()
+
+    cfgs = {}
+    for key in dict.fromkeys(job.get("config_key") or CONFIG_KEY for job in jobs):
+        cfgs[key] = load_config_from_s3(key)
+
+    groups = {}  # db_key → [(input index, job)], in first-seen order
+    for i, job in enumerate(jobs):
+        groups.setdefault(job.get("db_key") or DB_KEY, []).append((i, job))
+
+    # Read-only jobs over a prefetched DB each get their own worker; the rest
+    # (writers, or a DB the parent could not fetch) stay one worker per DB
+    pending = []
+    for db_key, group in groups.items():
+        if not STORE_IN_DB and _prefetch_batch_db(db_key):
+            pending.extend([item] for item in group)
+        else:
+            pending.append(group)
+
+    print(f"🗂️ Batch: {len(jobs)} ticker(s) across {len(groups)} DB(s), {len(pending)} task(s), "
+          f"up to {workers} worker(s)", flush=True)  # flush so forked children don't re-emit buffered output
+    ctx = mp.get_context("fork")
+    results = [None] * len(jobs)
+    running = {}  # parent pipe end → (process, [(index, job)])
+    while pending or running:
+        while pending and len(running) < workers:
+            group = pending.pop(0)
+            recv_end, send_end = ctx.Pipe(duplex=False)
+            proc = ctx.Process(target=_batch_child,
+                               args=([job for _, job in group], cfgs, as_of, send_end))
+            proc.start()
+            send_end.close()
+            running[recv_end] = (proc, group)
+        for recv_end in wait(list(running)):
+            proc, group = running.pop(recv_end)
+            try:
+                group_out = recv_end.recv()
+            except EOFError:
+                group_out = None
+            proc.join()
+            for pos, (i, job) in enumerate(group):
+                if group_out is not None:
+                    results[i] = group_out[pos]
+                else:
+                    results[i] = {"ticker": str(job.get("ticker") or TICKER).upper(), "ok": False,
+                                  "error": f"worker exited with code {proc.exitcode}"}
+
+    if not WARM_CACHE:
+        _cleanup_tmp(list(_batch_db_etags))
+        _batch_db_etags.clear()
+
+    failed = sum(not r["ok"] for r in results)
+    wall = time.perf_counter() - t0
+    print(f"📊 Batch: {len(jobs)} ticker(s), {failed} failed, {wall:.1f}s wall")
+    return {"batch": results, "failed": failed, "seconds": round(wall, 3)}
+
+
 # =========================
 # Lambda entry
 # =========================
-def lambda_handler(event, context):
+def _handle_event(event):
     try:
+        if isinstance(event, dict) and (event.get("publish_db_extract") or event.get("publish_columnar_snapshot")):
+            # e.g. invoked right after PreSyncDb so the day's RateTiers reads the extract/snapshot
+            model_names = [x.strip() for x in MODEL_NAMES_ENV.split(",")] if MODEL_NAMES_ENV else DEFAULT_MODEL_NAMES
+            published = {}
+            try:
+                if event.get("publish_db_extract"):
+                    publish_tier_extract(model_names)
+                    published["extract"] = f"s3://{DB_BUCKET}/{DB_EXTRACT_KEY}"
+                if event.get("publish_columnar_snapshot"):
+                    publish_columnar_snapshot()
+                    published["columnar"] = f"s3://{DB_BUCKET}/{COLUMNAR_PREFIX}/"
+            finally:
+                _cleanup_tmp([DB_EXTRACT_LOCAL] if WARM_CACHE else [DB_LOCAL, DB_EXTRACT_LOCAL])
+            return {"ok": True, "result": published}
+        if isinstance(event, dict) and event.get("rebuild_models_index"):
+            return {"ok": True, "result": rebuild_models_index()}
+        if isinstance(event, dict) and event.get("refresh_latest_summary"):
+            tickers = event.get("tickers") or [event.get("ticker") or TICKER]
+            return {"ok": True, "result": [refresh_latest_summary(t) for t in tickers]}
+        if isinstance(event, dict) and event.get("merge_db_deltas"):
+            return {"ok": True, "result": merge_db_deltas(delete=event.get("delete", True))}
+        if isinstance(event, dict) and event.get("sweep"):
+            start, end = event["sweep"]["range"]
+            res = sweep_configs(start, end, event["sweep"].get("grid") or {})
+            return {"ok": True, "result": res}
+        if isinstance(event, dict) and event.get("range"):
+            start, end = event["range"]
+            res = compute_range(start, end)
+            res.pop("results")  # summaries are in S3 / daily_tiers; keep the payload small
+            return {"ok": True, "result": res}
+        if isinstance(event, dict) and isinstance(event.get("batch"), list):
+            res = run_batch(event["batch"], as_of=event.get("as_of"), workers=event.get("workers"))
+            return {"ok": res["failed"] == 0, "result": res}
         res = compute_result(event or {})
         return {"ok": True, "result": res}
     except Exception as e:
         print(f"❌ Error: {e}")
         return {"ok": False, "error": str(e)}
 
+def emit_stage_metrics(timing, ok):
+    """Print one EMF line: stage/total/init ms and peak RSS as metrics, stage rows as properties."""
+    doc = {"Ticker": TICKER, "ok": ok, **timing, "stages": list(_stages)}
+    metrics = []
+    for rec in _stages:
+        doc[f"stage_{rec['stage']}_ms"] = rec["ms"]
+        metrics.append({"Name": f"stage_{rec['stage']}_ms", "Unit": "Milliseconds"})
+    for name in ("total_ms", "init_ms", "db_ms", "config_ms"):
+        if isinstance(timing.get(name), (int, float)):
+            metrics.append({"Name": name, "Unit": "Milliseconds"})
+    doc["peak_rss_mb"] = _peak_rss_mb()
+    if doc["peak_rss_mb"] is not None:
+        metrics.append({"Name": "peak_rss_mb", "Unit": "Megabytes"})
+    doc["_aws"] = {"Timestamp": int(time.time() * 1000), "CloudWatchMetrics": [{
+        "Namespace": METRICS_NAMESPACE, "Dimensions": [["Ticker"]], "Metrics": metrics}]}
+    print(json.dumps(doc, default=str, separators=(",", ":")))
+
+def _run_profiled(event):
+    """_handle_event under cProfile + tracemalloc; the .prof and a text report go to PROFILE_PREFIX."""
+    import cProfile, io, pstats, tracemalloc
+    prof = cProfile.Profile()
+    tracemalloc.start(10)
+    try:
+        out = prof.runcall(_handle_event, event)
+        snap = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    report = io.StringIO()
+    pstats.Stats(prof, stream=report).sort_stats("cumulative").print_stats(40)
+    report.write(f"\ntracemalloc peak: {peak / 2**20:.1f} MiB; top allocations by line:\n")
+    for st in snap.statistics("lineno")[:25]:
+        report.write(f"{st}\n")
+    base = f"{PROFILE_PREFIX.rstrip('/')}/{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{TICKER}"
+    prof_local = f"/tmp/{os.path.basename(base)}.prof"
+    try:
+        prof.dump_stats(prof_local)
+        s3.upload_file(prof_local, DB_BUCKET, f"{base}.prof")
+        s3.put_object(Bucket=DB_BUCKET, Key=f"{base}.txt", Body=report.getvalue().encode("utf-8"),
+                      ContentType="text/plain")
+        out["profile"] = f"s3://{DB_BUCKET}/{base}.prof"
+        print(f"📤 Profile written to s3://{DB_BUCKET}/{base}.{{prof,txt}}")
+    except Exception as e:
+        print(f"⚠️ Failed to upload profile: {e}")
+    finally:
+        _cleanup_tmp([prof_local])
+    return out
+
+def lambda_handler(event, context):
+    global _cold_start
+    t0 = time.perf_counter()
+    cold, _cold_start = _cold_start, False
+    _timings.clear()
+    _stages.clear()
+    if PROFILE_RUN or (isinstance(event, dict) and event.get("profile")):
+        out = _run_profiled(event)
+    else:
+        out = _handle_event(event)
+
+    timing = {"start": "cold" if cold else "warm",
+              "total_ms": round((time.perf_counter() - t0) * 1000.0, 1), **_timings}
+    if cold:
+        timing["init_ms"] = _INIT_MS
+    out["timing"] = timing
+    print(f"⏱️ {timing['start']} invocation: " + " ".join(
+        f"{k}={v}" for k, v in timing.items() if k != "start"))
+    if _stages:
+        print("📊 Stages: " + " ".join(
+            f"{r['stage']}={r['ms']}ms" + (f"/{r['rows']}rows" if "rows" in r else "") for r in _stages))
+    if EMIT_METRICS:
+        emit_stage_metrics(timing, out.get("ok"))
+    if _stages:
+        timing["stages"] = list(_stages)
+    return out
+
+_INIT_MS = round((time.perf_counter() - _INIT_T0) * 1000.0, 1)  # module import (container init)
+
 if __name__ == "__main__":
-    out = lambda_handler({}, None)
-    print(json.dumps(out, indent=2, ensure_ascii=False))
\ No newline at end of file
+    import argparse
+    ap = argparse.ArgumentParser(description="Daily LONG/SHORT tier builder")
+    ap.add_argument("--range", nargs=2, metavar=("START", "END"),
+                    help="replay every date in [START, END] (YYYY-MM-DD) instead of one as_of")
+    ap.add_argument("--write-s3", action="store_true", help="write summary_json objects (range mode)")
+    ap.add_argument("--store-db", action="store_true", help="upsert daily_tiers and upload the DB (range mode)")
+    ap.add_argument("--sweep", metavar="GRID_JSON",
+                    help='with --range: compare config variants, e.g. \'{"weights.TEMP": [5, 10, 20]}\'')
+    args = ap.parse_args()
+    if args.range and args.sweep:
+        sweep_configs(*args.range, json.loads(args.sweep))
+    elif args.range:
+        res = compute_range(*args.range, write_s3=args.write_s3 or None, store_in_db=args.store_db or None)
+        print(json.dumps({k: v for k, v in res.items() if k != "results"}, indent=2))
+    else:
+        out = lambda_handler({}, None)
+        print(json.dumps(out, indent=2, ensure_ascii=False))
\ No newline at end of file
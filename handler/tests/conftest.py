@@ -0,0 +1,30 @@
+"""
+Shared fixtures: the handler module pointed at an in-process S3 stand-in (moto).
+
+    cd handler && python -m pytest -q tests
+"""
+
+import os, sys
+
+import pytest
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("EMIT_METRICS", "0")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+moto = pytest.importorskip("moto")
+
+
+@pytest.fixture
+def h(monkeypatch):
+    """handler with an empty DB_BUCKET, no backoff sleeps and no per-invocation caches."""
+    import handler
+
+    with moto.mock_aws():
+        handler.s3.create_bucket(Bucket=handler.DB_BUCKET)
+        monkeypatch.setattr(handler.time, "sleep", lambda _s: None)
+        handler._models_index_cache.clear()
+        yield handler
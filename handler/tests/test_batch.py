@@ -0,0 +1,56 @@
+"""run_batch: read-only jobs fan out over one DB download; writers share a worker per DB."""
+
+import os
+
+import pytest
+
+
+@pytest.fixture
+def batch(h, tmp_path, monkeypatch):
+    """run_batch over a stub compute_result; returns the logged `_download_db_once` calls."""
+    h.s3.put_object(Bucket=h.DB_BUCKET, Key=h.DB_KEY, Body=b"db")
+    log = tmp_path / "downloads.log"  # a file, so forked workers' calls are seen too
+    download_db_once = h._download_db_once
+
+    def logged(client, bucket, key, *args):
+        with open(log, "a") as f:
+            f.write(f"{os.getpid()} {key}\n")
+        return download_db_once(client, bucket, key, *args)
+
+    def compute_result(event, cfg=None):
+        h.download_db()
+        return {"ticker": h.TICKER, "db": h.DB_LOCAL, "pid": os.getpid()}
+
+    monkeypatch.setattr(h, "_download_db_once", logged)
+    monkeypatch.setattr(h, "compute_result", compute_result)
+    monkeypatch.setattr(h, "load_config_from_s3", lambda key=None: {})
+    monkeypatch.setattr(h, "_batch_db_local", lambda db_key: str(tmp_path / "batch" / db_key.replace("/", "_")))
+    monkeypatch.setattr(h, "_batch_db_etags", {})
+
+    def run(tickers):
+        out = h.run_batch([{"ticker": t} for t in tickers], as_of="2025-01-02", workers=len(tickers))
+        calls = log.read_text().split("\n")[:-1] if log.exists() else []
+        return out, [c.split() for c in calls]
+
+    return run
+
+
+def test_read_only_jobs_fan_out_over_one_download(h, batch):
+    out, calls = batch(["SPY", "QQQ", "IWM"])
+
+    assert out["failed"] == 0
+    results = [r["result"] for r in out["batch"]]
+    assert [r["ticker"] for r in results] == ["SPY", "QQQ", "IWM"]
+    assert len({r["pid"] for r in results}) == 3
+    assert calls == [[str(os.getpid()), h.DB_KEY]]  # only the parent downloaded, and no worker had to again
+
+
+def test_writers_sharing_a_db_run_in_one_worker(h, batch, monkeypatch):
+    monkeypatch.setattr(h, "STORE_IN_DB", True)
+
+    out, calls = batch(["SPY", "QQQ"])
+
+    assert out["failed"] == 0
+    pids = {r["result"]["pid"] for r in out["batch"]}
+    assert len(pids) == 1 and os.getpid() not in pids
+    assert {pid for pid, _key in calls} == {str(p) for p in pids}
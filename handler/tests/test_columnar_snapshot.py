@@ -0,0 +1,31 @@
+"""publish_columnar_snapshot: one manifest covers every model in the DB."""
+
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def db(h, tmp_path, monkeypatch):
+    monkeypatch.setattr(h, "DB_LOCAL", str(tmp_path / "tradespark.db"))
+    monkeypatch.setattr(h, "_db_etag", None)
+    src = tmp_path / "src.db"
+    with closing(sqlite3.connect(src)) as conn:
+        conn.execute("CREATE TABLE model_eval_summary (as_of_date_today TEXT, model_name TEXT, y1_pred REAL)")
+        conn.executemany("INSERT INTO model_eval_summary VALUES (?, ?, ?)",
+                         [(f"2025-01-{d:02d}", m, float(d)) for d in range(2, 30) for m in ("SPY_M1", "AAPL_M1")])
+        conn.commit()
+    h.s3.upload_file(str(src), h.DB_BUCKET, h.DB_KEY)
+
+
+def test_snapshot_covers_every_model_in_the_db(h, db):
+    manifest = h.publish_columnar_snapshot()
+
+    assert sorted(manifest["partitions"]) == ["AAPL_M1", "SPY_M1"]
+    hist = h.load_history_from_columnar(["AAPL_M1"], "2025-01-20", 30)
+    assert hist is not None
+    assert set(hist["model_name"]) == {"AAPL_M1"}
+    assert str(hist["as_of_date_today"].max())[:10] == "2025-01-19"
@@ -0,0 +1,41 @@
+"""compact_history_frame: lossless by default, every lossy step recorded."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def frame(h):
+    dates = pd.bdate_range("2025-01-02", periods=300)
+    rows = [{"as_of_date_today": d, "model_name": m, "extra": "x",
+             **{c: float(i) for i, c in enumerate(h.EXTRACT_METRIC_COLS)}}
+            for d in dates for m in ("M1", "M2")]
+    h._timings.clear()
+    return pd.DataFrame(rows)
+
+
+def test_default_keeps_every_date_at_float64(h, frame):
+    out = h.compact_history_frame(frame)
+
+    assert h.HISTORY_MAX_MB == 0  # no ceiling outside Lambda
+    assert len(out) == len(frame)
+    assert "extra" not in out.columns
+    assert out[h.EXTRACT_METRIC_COLS].dtypes.eq(np.float64).all()
+    assert "history_float32" not in h._timings and "history_dates_dropped" not in h._timings
+
+
+def test_ceiling_downcasts_then_trims_and_reports_it(h, frame):
+    out = h.compact_history_frame(frame, max_mb=0.02)
+
+    assert out[h.EXTRACT_METRIC_COLS].dtypes.eq(np.float32).all()
+    kept = out["as_of_date_today"].nunique()
+    assert kept < 300 and out["as_of_date_today"].max() == frame["as_of_date_today"].max()
+    assert h._timings["history_float32"] is True
+    assert h._timings["history_dates_dropped"] == 300 - kept
+
+
+@pytest.mark.parametrize("memory, expected", [("1024", 256.0), ("", 0.0)])
+def test_default_ceiling_follows_lambda_memory(h, monkeypatch, memory, expected):
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_MEMORY_SIZE", memory)
+    assert h._default_history_max_mb() == expected
@@ -0,0 +1,66 @@
+"""_put_db_if_match: single PUT and multipart uploads, both If-Match guarded."""
+
+import os
+
+import pytest
+
+
+@pytest.fixture
+def db(h, tmp_path, monkeypatch):
+    monkeypatch.setattr(h, "DB_LOCAL", str(tmp_path / "tradespark.db"))
+    monkeypatch.setattr(h, "DB_PART_MB", 5)
+
+    # moto ignores If-Match on CompleteMultipartUpload; enforce it the way S3 does
+    complete = h.s3.complete_multipart_upload
+
+    def guarded_complete(**kw):
+        current = h.s3.head_object(Bucket=kw["Bucket"], Key=kw["Key"])["ETag"]
+        if "IfMatch" in kw and kw["IfMatch"] != current:
+            raise h.ClientError({"Error": {"Code": "PreconditionFailed"}}, "CompleteMultipartUpload")
+        return complete(**kw)
+
+    monkeypatch.setattr(h.s3, "complete_multipart_upload", guarded_complete)
+    etag = h.s3.put_object(Bucket=h.DB_BUCKET, Key=h.DB_KEY, Body=b"v1")["ETag"]
+    return etag
+
+
+def _write_local(h, size):
+    data = os.urandom(size)
+    with open(h.DB_LOCAL, "wb") as f:
+        f.write(data)
+    return data
+
+
+def _remote(h):
+    return h.s3.get_object(Bucket=h.DB_BUCKET, Key=h.DB_KEY)["Body"].read()
+
+
+def test_small_db_is_one_guarded_put(h, db):
+    data = _write_local(h, 1024)
+    new_etag = h._put_db_if_match(db)
+    assert new_etag and new_etag != db
+    assert _remote(h) == data
+
+
+def test_large_db_goes_up_in_parts(h, db):
+    data = _write_local(h, 12 * 1024 * 1024)  # three 5 MB parts
+    new_etag = h._put_db_if_match(db)
+    assert new_etag.endswith('-3"')
+    assert _remote(h) == data
+
+
+@pytest.mark.parametrize("size", [1024, 12 * 1024 * 1024])
+def test_conflict_returns_none_and_keeps_remote(h, db, size):
+    h.s3.put_object(Bucket=h.DB_BUCKET, Key=h.DB_KEY, Body=b"v2")  # another writer
+    _write_local(h, size)
+    assert h._put_db_if_match(db) is None
+    assert _remote(h) == b"v2"
+    assert not h.s3.list_multipart_uploads(Bucket=h.DB_BUCKET).get("Uploads")
+
+
+def test_refuses_unguarded_upload(h, db, monkeypatch):
+    monkeypatch.setattr(h, "_supports_conditional_put", lambda: False)
+    _write_local(h, 1024)
+    with pytest.raises(RuntimeError, match="refusing an unguarded upload"):
+        h._put_db_if_match(db)
+    assert _remote(h) == b"v1"
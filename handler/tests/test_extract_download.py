@@ -0,0 +1,53 @@
+"""_download_fresh_extract: falls back to the full DB instead of filling /tmp."""
+
+import os
+
+import pytest
+
+
+@pytest.fixture
+def extract(h, tmp_path, monkeypatch):
+    monkeypatch.setattr(h, "DB_EXTRACT_LOCAL", str(tmp_path / f"tradespark.{h.TICKER}.tiers.db"))
+    monkeypatch.setattr(h, "_extract_etag", None)
+    db_etag = h.s3.put_object(Bucket=h.DB_BUCKET, Key=h.DB_KEY, Body=b"db")["ETag"]
+    h.s3.put_object(Bucket=h.DB_BUCKET, Key=h.DB_EXTRACT_KEY, Body=b"extract",
+                    Metadata={"source-etag": db_etag.strip('"'), "ticker": h.TICKER, "models": "M1,M2"})
+    h._timings.clear()
+    return h.DB_EXTRACT_LOCAL
+
+
+def test_downloads_a_fresh_extract(h, extract):
+    assert h._download_fresh_extract(["M1"]) == extract
+    with open(extract, "rb") as f:
+        assert f.read() == b"extract"
+    assert h._timings["extract_cache"] == "miss"
+
+
+def test_extract_for_another_ticker_is_not_used(h, extract):
+    head = h.s3.head_object(Bucket=h.DB_BUCKET, Key=h.DB_EXTRACT_KEY)
+    h.s3.put_object(Bucket=h.DB_BUCKET, Key=h.DB_EXTRACT_KEY, Body=b"extract",
+                    Metadata={**head["Metadata"], "ticker": "QQQ"})
+    assert h._download_fresh_extract(["M1"]) is None
+    assert not os.path.exists(extract)
+
+
+def test_extract_key_is_per_ticker(h):
+    assert h._tier_extract_key("db/tradespark.db", "AAPL") == "db/tradespark.AAPL.tiers.db"
+    assert h.DB_EXTRACT_KEY == f"db/tradespark.{h.TICKER}.tiers.db"
+
+
+def test_low_tmp_space_falls_back_to_full_db(h, extract, monkeypatch):
+    monkeypatch.setattr(h, "_tmp_free_mb", lambda path="/tmp": 100)
+    assert h._download_fresh_extract(["M1"]) is None
+    assert not os.path.exists(extract) and not os.path.exists(extract + ".part")
+
+
+def test_failed_transfer_falls_back_and_cleans_up(h, extract, monkeypatch):
+    def enospc(bucket, key, filename):
+        with open(filename, "wb") as f:
+            f.write(b"partial")
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(h.s3, "download_file", enospc)
+    assert h._download_fresh_extract(["M1"]) is None
+    assert not os.path.exists(extract + ".part")
@@ -0,0 +1,75 @@
+"""fetch_s3_json_many: key order, retries and exhaustion against moto S3."""
+
+import json
+import random
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def objects(h):
+    keys = [f"ml_out/2026-05-29/M{i:02d}.json" for i in range(24)]
+    for i, key in enumerate(keys):
+        h.s3.put_object(Bucket=h.DB_BUCKET, Key=key, Body=json.dumps({"i": i}))
+    return keys
+
+
+def _flaky_get(h, monkeypatch, failures, error=None):
+    """Make the first `failures[key]` GETs of a key fail; returns the per-key call counts."""
+    orig = h.s3.get_object
+    calls, lock = {}, threading.Lock()
+
+    def get_object(**kw):
+        with lock:
+            n = calls[kw["Key"]] = calls.get(kw["Key"], 0) + 1
+        time.sleep(random.random() / 200)  # finish out of order
+        if n <= failures.get(kw["Key"], 0):
+            raise error or h.ClientError({"Error": {"Code": "SlowDown"}}, "GetObject")
+        return orig(**kw)
+
+    monkeypatch.setattr(h.s3, "get_object", get_object)
+    return calls
+
+
+def test_results_follow_key_order(h, objects, monkeypatch):
+    _flaky_get(h, monkeypatch, {})
+    missing = "ml_out/2026-05-29/Nope.json"
+    keys = objects[:12] + [missing] + objects[12:]
+
+    results, stats = h.fetch_s3_json_many(keys, workers=8)
+
+    assert [r["i"] for r in results[:12] + results[13:]] == list(range(24))
+    assert isinstance(results[12], h.ClientError)
+    assert (stats["keys"], stats["failed"]) == (25, 1)
+
+
+def test_transient_errors_are_retried(h, objects, monkeypatch):
+    calls = _flaky_get(h, monkeypatch, {objects[3]: 2, objects[7]: 1})
+
+    results, stats = h.fetch_s3_json_many(objects, workers=4, retries=2)
+
+    assert stats["failed"] == 0
+    assert results[3] == {"i": 3} and results[7] == {"i": 7}
+    assert (calls[objects[3]], calls[objects[7]], calls[objects[0]]) == (3, 2, 1)
+
+
+def test_retries_exhaust_to_the_last_error(h, objects, monkeypatch):
+    calls = _flaky_get(h, monkeypatch, {objects[5]: 10}, error=ConnectionResetError("reset"))
+
+    results, stats = h.fetch_s3_json_many(objects, workers=4, retries=2)
+
+    assert isinstance(results[5], ConnectionResetError)
+    assert calls[objects[5]] == 3
+    assert stats["failed"] == 1 and results[6] == {"i": 6}
+
+
+def test_missing_and_corrupt_objects_fail_without_retry(h, objects, monkeypatch):
+    h.s3.put_object(Bucket=h.DB_BUCKET, Key="ml_out/bad.json", Body=b"{not json")
+    calls = _flaky_get(h, monkeypatch, {})
+
+    results, _ = h.fetch_s3_json_many(["ml_out/gone.json", "ml_out/bad.json"], workers=2, retries=3)
+
+    assert isinstance(results[0], h.ClientError) and isinstance(results[1], ValueError)
+    assert calls == {"ml_out/gone.json": 1, "ml_out/bad.json": 1}
@@ -0,0 +1,91 @@
+"""publish_latest_summary / refresh_latest_summary against moto S3."""
+
+import json
+
+import pytest
+
+
+def _put_summary(h, date, ticker="SPY", **extra):
+    key = f"{h._summary_prefix(ticker)}/{date}.json"
+    resp = h.s3.put_object(Bucket=h.DB_BUCKET, Key=key, Body=json.dumps({"date": date, **extra}))
+    return {"date": date, **extra}, resp["ETag"]
+
+
+def _get(h, key):
+    return json.loads(h.s3.get_object(Bucket=h.DB_BUCKET, Key=key)["Body"].read())
+
+
+def _exists(h, key):
+    return bool(h.s3.list_objects_v2(Bucket=h.DB_BUCKET, Prefix=key).get("KeyCount"))
+
+
+def test_pointer_written_after_dated_object_is_confirmed(h, monkeypatch):
+    doc, etag = _put_summary(h, "2026-05-29", long_signal="A")
+    calls = []
+    for name in ("head_object", "put_object"):
+        orig = getattr(h.s3, name)
+        monkeypatch.setattr(h.s3, name, lambda _o=orig, _n=name, **kw: calls.append((_n, kw["Key"])) or _o(**kw))
+
+    assert h.publish_latest_summary(doc, etag) is True
+
+    assert calls[0] == ("head_object", "summary_json/2026-05-29.json")
+    assert calls.index(("put_object", h._latest_summary_key())) < calls.index(("put_object", h._summary_manifest_key()))
+    assert h._latest_summary_key() == "tiers/latest/SPY.json"
+    assert _get(h, h._latest_summary_key()) == doc
+    manifest = _get(h, h._summary_manifest_key())
+    assert (manifest["date"], manifest["key"], manifest["etag"]) == ("2026-05-29", "summary_json/2026-05-29.json", etag)
+
+
+def test_missing_dated_object_leaves_pointer_alone(h):
+    with pytest.raises(h.ClientError):
+        h.publish_latest_summary({"date": "2026-05-29"})
+    assert not _exists(h, h._latest_summary_key())
+
+
+def test_etag_mismatch_raises_without_writing_pointer(h):
+    doc, etag = _put_summary(h, "2026-05-29", long_signal="A")
+    _put_summary(h, "2026-05-29", long_signal="B")  # replaced after our PUT
+
+    with pytest.raises(RuntimeError, match="changed under us"):
+        h.publish_latest_summary(doc, etag)
+    assert not _exists(h, h._latest_summary_key())
+    assert not _exists(h, h._summary_manifest_key())
+
+
+def test_older_date_does_not_overwrite_newer(h):
+    newer, etag = _put_summary(h, "2026-05-29", long_signal="A")
+    assert h.publish_latest_summary(newer, etag) is True
+    older, etag = _put_summary(h, "2026-05-20", long_signal="B")
+
+    assert h.publish_latest_summary(older, etag) is False
+    assert _get(h, h._latest_summary_key()) == newer
+    assert _get(h, h._summary_manifest_key())["date"] == "2026-05-29"
+
+
+def test_refuses_unguarded_pointer_write(h, monkeypatch):
+    doc, etag = _put_summary(h, "2026-05-29", long_signal="A")
+    monkeypatch.setattr(h, "_supports_conditional_put", lambda: False)
+
+    with pytest.raises(RuntimeError, match="refusing an unguarded write"):
+        h.publish_latest_summary(doc, etag)
+    assert not _exists(h, h._latest_summary_key())
+
+
+def test_refresh_picks_up_summaries_written_without_the_pointer(h):
+    doc, etag = _put_summary(h, "2026-05-27", ticker="AAPL")
+    h.publish_latest_summary(doc, etag, ticker="AAPL")
+    # e.g. `aws s3 sync` of the next two days: the pointer is now stale
+    _put_summary(h, "2026-05-28", ticker="AAPL")
+    _put_summary(h, "2026-05-29", ticker="AAPL", long_signal="S")
+    h.s3.put_object(Bucket=h.DB_BUCKET, Key="summary_json/AAPL/notes.json", Body=b"{}")
+
+    res = h.refresh_latest_summary("aapl")
+
+    assert res == {"ticker": "AAPL", "date": "2026-05-29", "updated": True}
+    assert _get(h, "tiers/latest/AAPL.json") == {"date": "2026-05-29", "long_signal": "S"}
+    assert not _exists(h, "tiers/latest/SPY.json")
+
+
+def test_refresh_event_with_no_summaries(h):
+    out = h._handle_event({"refresh_latest_summary": True, "tickers": ["QQQ"]})
+    assert out == {"ok": True, "result": [{"ticker": "QQQ", "date": None, "updated": False}]}
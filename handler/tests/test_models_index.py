@@ -0,0 +1,25 @@
+"""register_model_outputs: guarded read-modify-write of the model-output dates manifest."""
+
+import json
+
+import pytest
+
+
+def stored(h):
+    return json.loads(h.s3.get_object(Bucket=h.DB_BUCKET, Key=h._models_index_key())["Body"].read())
+
+
+def test_register_merges_into_the_stored_manifest(h):
+    assert h.register_model_outputs("2025-01-02", ["M2", "M1"]) is True
+    assert h.register_model_outputs("2025-01-02", ["M1"]) is False
+    assert h.register_model_outputs("2025-01-03", ["M1"]) is True
+
+    assert stored(h)["dates"] == {"2025-01-02": ["M1", "M2"], "2025-01-03": ["M1"]}
+
+
+def test_refuses_unguarded_write(h, monkeypatch):
+    monkeypatch.setattr(h, "_supports_conditional_put", lambda: False)
+
+    with pytest.raises(RuntimeError, match="refusing an unguarded write"):
+        h.register_model_outputs("2025-01-02", ["M1"])
+    assert "Contents" not in h.s3.list_objects_v2(Bucket=h.DB_BUCKET)
@@ -6,16 +6,38 @@ Environment variables required:
 - OPENAI_API_KEY: OpenAI API key
 - S3_BUCKET: S3 bucket name (or NEXT_PUBLIC_S3_BUCKET)
 - AWS_REGION: AWS region (default: us-east-1)
+
+Optional:
+- BRIEFING_WORKERS: modes generated concurrently (default: one per mode)
+- EMIT_METRICS: "1" (default) prints CloudWatch EMF metric lines
+- METRICS_NAMESPACE: EMF namespace (default: Predixa/NewsBriefing)
+- PROMPT_MAX_ARTICLES: distinct stories sent to the model (default: 15)
+- PROMPT_TOKEN_BUDGET: approximate token budget for the article list (default: 3000)
+- DEDUP_SIMILARITY: estimated Jaccard similarity that marks two articles as copies (default: 0.5)
+- MASSIVE_BASE_URL: news API base URL (default: https://api.massive.com)
+- NEWS_MAX_ARTICLES: articles fetched per run, across pages (default: 20)
+- NEWS_PAGE_SIZE: articles per page request (default: 20)
+- NEWS_FETCH_RETRIES: retries per request on errors, 429 and 5xx (default: 3)
+- NEWS_FETCH_TIMEOUT: seconds per request (default: 10)
+- NEWS_OVERLAP_MINUTES: how far before the newest cached article an incremental fetch starts (default: 30)
+- NEWS_FULL_REFRESH_MINUTES: warm containers refetch everything at least this often (default: 120)
 """
 
 import os
+import re
 import json
+import time
+import random
 import hashlib
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Any, Optional
+from urllib.parse import urljoin
 
 import boto3
 import requests
+from requests.adapters import HTTPAdapter
+from botocore.exceptions import ClientError
 from openai import OpenAI
 
 # Initialize AWS clients
@@ -37,32 +59,255 @@ openai_client = OpenAI(api_key=openai_api_key)
 BRIEFING_MODES = ['pro', 'simple', 'wsb']
 VALID_SENTIMENTS = ['bullish', 'bearish', 'mixed', 'neutral']
 
-
-def fetch_spy_news() -> List[Dict[str, Any]]:
-    """Fetch SPY news articles from Massive.com API"""
-    api_key = os.getenv('MASSIVE_API_KEY')
-    if not api_key:
-        raise ValueError('MASSIVE_API_KEY environment variable is required')
+# Briefings are two-stage: one shared analysis completion over the articles (facts,
+# themes, sentiment, article picks), then per-mode styling - pro is the analysis
+# itself, simple/wsb a small rewrite of its bullets. The rewrites and S3 writes of
+# the modes run concurrently; the OpenAI and S3 clients are thread-safe and shared.
+BRIEFING_WORKERS = int(os.getenv('BRIEFING_WORKERS', str(len(BRIEFING_MODES))))
+
+# Distinct stories sent to the model (and covered by the article hash), within an
+# approximate token budget for the article list
+PROMPT_ARTICLES = int(os.getenv('PROMPT_MAX_ARTICLES', '15'))
+PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', '3000'))
+
+# Syndicated copies: same normalized title, or MinHash-estimated Jaccard similarity
+# of title+description word shingles at or above DEDUP_SIMILARITY
+DEDUP_SIMILARITY = float(os.getenv('DEDUP_SIMILARITY', '0.5'))
+MINHASH_PERMUTATIONS = 64
+SHINGLE_WORDS = 3
+
+EMIT_METRICS = os.getenv('EMIT_METRICS', '1') == '1'
+METRICS_NAMESPACE = os.getenv('METRICS_NAMESPACE', 'Predixa/NewsBriefing')
+
+# Massive.com news feed
+MASSIVE_BASE_URL = os.getenv('MASSIVE_BASE_URL', 'https://api.massive.com')
+NEWS_MAX_ARTICLES = int(os.getenv('NEWS_MAX_ARTICLES', '20'))
+NEWS_PAGE_SIZE = int(os.getenv('NEWS_PAGE_SIZE', '20'))
+NEWS_FETCH_RETRIES = int(os.getenv('NEWS_FETCH_RETRIES', '3'))
+NEWS_FETCH_TIMEOUT = float(os.getenv('NEWS_FETCH_TIMEOUT', '10'))
+NEWS_OVERLAP_MINUTES = int(os.getenv('NEWS_OVERLAP_MINUTES', '30'))
+NEWS_FULL_REFRESH_MINUTES = int(os.getenv('NEWS_FULL_REFRESH_MINUTES', '120'))
+NEWS_MAX_BACKOFF = 8.0
+
+# Last latest-<mode>.json seen or written by this container: {mode: {'etag', 'metadata'}}.
+# Warm invocations revalidate it with a conditional GET (304 → no body transfer).
+_latest_cache: Dict[str, Dict[str, Any]] = {}
+
+
+class MassiveNewsClient:
+    """
+    Massive.com news feed client, kept at module level so its pooled session (and
+    the articles it last saw) survive warm invocations.
     
-    url = f'https://api.massive.com/v2/reference/news?ticker=SPY&limit=20&apiKey={api_key}'
+    - Bounded retries with jittered exponential backoff on connection errors,
+      timeouts, 429 and 5xx (Retry-After honoured, capped at NEWS_MAX_BACKOFF).
+    - Cursor pagination via the response's next_url, up to max_articles.
+    - Warm invocations only ask for articles published since overlap_minutes before
+      the newest one seen (published_utc.gte) and merge them into the cached list
+      by id. An article indexed later than that with an older timestamp is missed
+      until the next full fetch, which happens at least every full_refresh_minutes.
+    - Per-fetch latency stats in `last_stats`.
+    - The API key goes in the Authorization header, never the URL, so it cannot
+      leak into exception messages, logs or the Lambda response.
     
-    try:
-        response = requests.get(url, headers={'Accept': 'application/json'}, timeout=30)
-        response.raise_for_status()
-        raw_data = response.json()
+    base_url/session are injectable so the client can run against a local stand-in.
+    """
+    
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = MASSIVE_BASE_URL,
+        max_articles: int = NEWS_MAX_ARTICLES,
+        page_size: int = NEWS_PAGE_SIZE,
+        retries: int = NEWS_FETCH_RETRIES,
+        timeout: float = NEWS_FETCH_TIMEOUT,
+        overlap_minutes: int = NEWS_OVERLAP_MINUTES,
+        full_refresh_minutes: int = NEWS_FULL_REFRESH_MINUTES,
+        session: Optional[requests.Session] = None,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.max_articles = max_articles
+        self.page_size = page_size
+        self.retries = retries
+        self.timeout = timeout
+        self.overlap_minutes = overlap_minutes
+        self.full_refresh_minutes = full_refresh_minutes
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=0)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update({'Accept': 'application/json'})
+        self.session = session
+        self.last_stats: Dict[str, Any] = {}
+        self._cache: Dict[str, List[Dict[str, Any]]] = {}  # ticker -> raw items, newest first
+        self._full_at: Dict[str, float] = {}  # ticker -> time.monotonic() of the last full fetch
+        self._stats: Dict[str, Any] = {}
+    
+    def _get(self, url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """GET JSON with bounded, jittered retries"""
+        for attempt in range(self.retries + 1):
+            t0 = time.perf_counter()
+            retry_after = None
+            try:
+                response = self.session.get(
+                    url,
+                    params=params,
+                    headers={'Authorization': f'Bearer {self.api_key}'},
+                    timeout=self.timeout,
+                )
+                if response.status_code not in self.RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response.json()
+                error: Exception = requests.HTTPError(f'{response.status_code} from {self.base_url}', response=response)
+                retry_after = response.headers.get('Retry-After')
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            finally:
+                self._stats['latenciesMs'].append(round((time.perf_counter() - t0) * 1000.0, 1))
+            
+            if attempt == self.retries:
+                raise error
+            self._stats['retries'] += 1
+            delay = min(NEWS_MAX_BACKOFF, 0.25 * (2 ** attempt)) * (0.5 + random.random())
+            if retry_after and retry_after.isdigit():
+                delay = min(NEWS_MAX_BACKOFF, float(retry_after))
+            print(f'⚠️ News fetch attempt {attempt + 1} failed ({error}); retrying in {delay:.2f}s')
+            time.sleep(delay)
+        raise RuntimeError('unreachable')
+    
+    def _fetch_pages(self, ticker: str, since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Newest-first items for `ticker` (published at or after `since`, if given), up to max_articles"""
+        params: Optional[Dict[str, Any]] = {
+            'ticker': ticker,
+            'order': 'desc',
+            'sort': 'published_utc',
+            'limit': min(self.page_size, self.max_articles),
+        }
+        if since:
+            params['published_utc.gte'] = since
         
-        # Handle different response structures
-        articles = []
-        if isinstance(raw_data, list):
-            articles = raw_data
-        elif isinstance(raw_data, dict):
-            articles = (
-                raw_data.get('results') or
-                raw_data.get('data') or
-                raw_data.get('items') or
-                raw_data.get('news') or
-                []
-            )
+        url = f'{self.base_url}/v2/reference/news'
+        items: List[Dict[str, Any]] = []
+        while url and len(items) < self.max_articles:
+            raw_data = self._get(url, params)
+            self._stats['pages'] += 1
+            
+            # Handle different response structures
+            page = []
+            if isinstance(raw_data, list):
+                page = raw_data
+            elif isinstance(raw_data, dict):
+                page = (
+                    raw_data.get('results') or
+                    raw_data.get('data') or
+                    raw_data.get('items') or
+                    raw_data.get('news') or
+                    []
+                )
+            items.extend(page)
+            
+            # next_url carries the cursor and the rest of the query
+            next_url = raw_data.get('next_url') if isinstance(raw_data, dict) else None
+            if not page or not next_url:
+                break
+            url = urljoin(f'{self.base_url}/', next_url)
+            params = None
+        
+        return items[:self.max_articles]
+    
+    def fetch(self, ticker: str = 'SPY', full: bool = False) -> List[Dict[str, Any]]:
+        """
+        Newest max_articles raw feed items for `ticker`: incremental when this client
+        fetched everything within full_refresh_minutes, a full fetch otherwise or when `full`.
+        """
+        self._stats = {'retries': 0, 'pages': 0, 'latenciesMs': []}
+        t0 = time.perf_counter()
+        cached = self._cache.get(ticker, [])
+        since = None
+        full_age = time.monotonic() - self._full_at.get(ticker, float('-inf'))
+        if not full and cached and full_age < self.full_refresh_minutes * 60:
+            newest = parse_published(max(item_published(i) for i in cached))
+            if newest is not None:
+                since = (newest - timedelta(minutes=self.overlap_minutes)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        if since is None:
+            cached = []
+        
+        fresh = self._fetch_pages(ticker, since)
+        if since is None:
+            self._full_at[ticker] = time.monotonic()
+        
+        # Merge: fresh items replace cached copies of the same article
+        cached_keys = {item_key(i) for i in cached}
+        seen = set()
+        merged = []
+        for item in sorted(fresh + cached, key=item_published, reverse=True):
+            key = item_key(item)
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(item)
+        merged = merged[:self.max_articles]
+        self._cache[ticker] = merged
+        
+        latencies = sorted(self._stats['latenciesMs'])
+        self.last_stats = {
+            'incremental': bool(since),
+            'requests': len(latencies),
+            'retries': self._stats['retries'],
+            'pages': self._stats['pages'],
+            'newArticles': sum(1 for i in fresh if item_key(i) not in cached_keys),
+            'articles': len(merged),
+            'totalMs': round((time.perf_counter() - t0) * 1000.0, 1),
+            'p50Ms': latencies[len(latencies) // 2] if latencies else None,
+            'maxMs': latencies[-1] if latencies else None,
+        }
+        print(f"News fetch: {self.last_stats['newArticles']} new of {len(merged)} article(s), {self.last_stats['pages']} page(s), "
+              f"{self.last_stats['retries']} retries, {self.last_stats['totalMs']} ms"
+              + (' (incremental)' if since else ''))
+        return merged
+
+
+def item_published(item: Dict[str, Any]) -> str:
+    """Raw feed item's publish timestamp (ISO 8601 UTC strings sort chronologically)"""
+    return item.get('published_utc') or item.get('published_at') or ''
+
+
+def parse_published(value: str) -> Optional[datetime]:
+    """ISO 8601 publish timestamp as an aware UTC datetime; None when unparseable"""
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def item_key(item: Dict[str, Any]) -> str:
+    """Identity of a raw feed item across fetches"""
+    return item.get('id') or item.get('article_url') or item.get('url') or item.get('title') or ''
+
+
+_news_client: Optional[MassiveNewsClient] = None
+
+
+def get_news_client() -> MassiveNewsClient:
+    """The container's shared news client (created on first use)"""
+    global _news_client
+    if _news_client is None:
+        api_key = os.getenv('MASSIVE_API_KEY')
+        if not api_key:
+            raise ValueError('MASSIVE_API_KEY environment variable is required')
+        _news_client = MassiveNewsClient(api_key)
+    return _news_client
+
+
+def fetch_spy_news(full: bool = False) -> List[Dict[str, Any]]:
+    """Fetch SPY news articles from Massive.com API (incremental on warm containers unless `full`)"""
+    try:
+        articles = get_news_client().fetch('SPY', full=full)
         
         if not articles:
             print('Warning: No articles returned from API')
@@ -77,8 +322,11 @@ def fetch_spy_news() -> List[Dict[str, Any]]:
             else:
                 publisher_name = publisher.get('name', 'Unknown')
             
+            # Stable across fetches, so an article's id (and the article hash) does not
+            # change when newer articles push it down the feed
+            key = item_key(item) or f"{idx}-{item.get('published_utc', '')}"
             normalized.append({
-                'id': f"massive-{idx}-{item.get('published_utc', '')}",
+                'id': f'massive-{key}',
                 'publisherName': publisher_name,
                 'title': item.get('title', ''),
                 'description': item.get('description', ''),
@@ -100,174 +348,357 @@ def fetch_spy_news() -> List[Dict[str, Any]]:
 
 
 def generate_article_hash(articles: List[Dict[str, Any]]) -> str:
-    """Generate hash from article IDs and timestamps"""
+    """Generate hash over the articles the prompt is built from (IDs, timestamps, titles, URLs)"""
     if not articles:
         return ''
     
-    # Use first 5 articles for hash
     hash_input = '|'.join([
-        f"{a.get('id', '')}:{a.get('publishedUtc', '')}"
-        for a in articles[:5]
+        f"{a.get('id', '')}:{a.get('publishedUtc', '')}:{a.get('title', '')}:{a.get('url', '')}"
+        for a in articles[:PROMPT_ARTICLES]
     ])
     
     return hashlib.md5(hash_input.encode()).hexdigest()
 
 
-def get_mode_instructions(mode: str, articles_text: str) -> str:
-    """Get mode-specific prompt instructions"""
-    if mode == 'simple':
-        return f"""You are generating a daily SPY (S&P 500 ETF) market news briefing for Predixa, written in VERY SIMPLE language - explain like the reader is 5 years old.
+def normalize_title(title: str) -> str:
+    """Lowercase, punctuation-free, single-spaced title for exact-duplicate matching"""
+    return ' '.join(re.sub(r'[^a-z0-9 ]+', ' ', (title or '').lower()).split())
+
+
+def article_shingles(article: Dict[str, Any]) -> set:
+    """Word SHINGLE_WORDS-grams over the normalized title and description"""
+    words = normalize_title(f"{article.get('title', '')} {article.get('description', '')}").split()
+    if len(words) < SHINGLE_WORDS:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+_MINHASH_MASK = (1 << 61) - 1  # Mersenne prime modulus
+_MINHASH_SEEDS = [
+    (
+        int.from_bytes(hashlib.blake2b(f'a{i}'.encode(), digest_size=8).digest(), 'big') % _MINHASH_MASK | 1,
+        int.from_bytes(hashlib.blake2b(f'b{i}'.encode(), digest_size=8).digest(), 'big') % _MINHASH_MASK,
+    )
+    for i in range(MINHASH_PERMUTATIONS)
+]
+
+
+def minhash_signature(shingles: set) -> List[int]:
+    """MINHASH_PERMUTATIONS-slot MinHash signature (deterministic across runs)"""
+    if not shingles:
+        return []
+    hashes = [
+        int.from_bytes(hashlib.blake2b(sh.encode(), digest_size=8).digest(), 'big')
+        for sh in shingles
+    ]
+    return [min((a * h + b) % _MINHASH_MASK for h in hashes) for a, b in _MINHASH_SEEDS]
+
+
+def cluster_articles(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Collapse syndicated copies of the same story. Returns one representative per
+    cluster in feed order (the first copy seen, i.e. the newest), with
+    'publishers' (every distinct publisher carrying it) and 'clusterSize' added.
+    """
+    n = len(articles)
+    parent = list(range(n))
+    
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    def union(i: int, j: int) -> None:
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+    
+    # Exact: same normalized title
+    first_by_title: Dict[str, int] = {}
+    for i, article in enumerate(articles):
+        key = normalize_title(article.get('title', ''))
+        if not key:
+            continue
+        if key in first_by_title:
+            union(first_by_title[key], i)
+        else:
+            first_by_title[key] = i
+    
+    # Near: MinHash-estimated Jaccard over title+description shingles. A feed page is
+    # tens of articles, so comparing every pair is cheaper than LSH banding.
+    signatures = [minhash_signature(article_shingles(a)) for a in articles]
+    for i in range(n):
+        if not signatures[i]:
+            continue
+        for j in range(i + 1, n):
+            if not signatures[j] or find(i) == find(j):
+                continue
+            same = sum(1 for x, y in zip(signatures[i], signatures[j]) if x == y)
+            if same / MINHASH_PERMUTATIONS >= DEDUP_SIMILARITY:
+                union(i, j)
+    
+    clusters: Dict[int, List[int]] = {}
+    for i in range(n):
+        clusters.setdefault(find(i), []).append(i)
+    
+    representatives = []
+    for root in sorted(clusters):
+        members = clusters[root]
+        publishers = []
+        for i in members:
+            name = articles[i].get('publisherName') or 'Unknown'
+            if name not in publishers:
+                publishers.append(name)
+        representatives.append({
+            **articles[root],
+            'publishers': publishers,
+            'clusterSize': len(members),
+        })
+    return representatives
+
+
+def format_article_line(idx: int, article: Dict[str, Any]) -> str:
+    """One numbered line of the prompt's article list"""
+    publishers = article.get('publishers') or [article.get('publisherName', 'Unknown')]
+    return (
+        f"{idx + 1}. [{article.get('publishedUtc', '')[:19]} UTC] {', '.join(publishers)} – {article.get('title', '')}"
+        + (f": {article.get('description', '')}" if article.get('description') else '')
+    )
+
+
+def select_prompt_articles(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Cluster representatives for the prompt, in feed order: at most PROMPT_ARTICLES,
+    within PROMPT_TOKEN_BUDGET (estimated at 4 characters per token). The first story
+    is always kept; a later one that would overflow the budget keeps only its title.
+    """
+    representatives = cluster_articles(articles)
+    selected = []
+    used = 0
+    for article in representatives:
+        if len(selected) >= PROMPT_ARTICLES:
+            break
+        cost = len(format_article_line(len(selected), article)) // 4 + 1
+        if selected and used + cost > PROMPT_TOKEN_BUDGET:
+            article = {**article, 'description': ''}
+            cost = len(format_article_line(len(selected), article)) // 4 + 1
+            if used + cost > PROMPT_TOKEN_BUDGET:
+                break
+        selected.append(article)
+        used += cost
+    
+    if len(representatives) < len(articles):
+        print(f'Collapsed {len(articles)} articles into {len(representatives)} distinct stories')
+    print(f'Prompt uses {len(selected)} stories (~{used} tokens of {PROMPT_TOKEN_BUDGET})')
+    return selected
 
-STYLE REQUIREMENTS:
-- Use simple, everyday words (avoid financial jargon like "ETF", "volatility", "liquidity")
-- Explain complex concepts in plain language
-- Keep sentences short and easy to understand
-- Use analogies when helpful (e.g., "like a piggy bank for many companies")
-- Be friendly and approachable
+
+def get_analysis_instructions(articles_text: str) -> str:
+    """Prompt for the shared analysis pass (facts, themes, sentiment, article picks)"""
+    return f"""You are analyzing today's SPY (S&P 500 ETF) market news for Predixa, a trading analytics platform.
 
 Here are today's top SPY news articles:
 
 {articles_text}
 
-Please generate a simple daily briefing that:
-- Summarizes the key market-moving news in 3-6 short, simple bullet points (use plain language)
-- Identifies 2-6 main themes using simple words (e.g., "prices going up", "jobs", "taxes")
-- Assesses overall market sentiment (bullish, bearish, mixed, or neutral) based on the articles
-- Selects EXACTLY 10-15 most important articles (NOT 5). You MUST include at least 10 articles in top_articles array. Prioritize relevance and recency.
+Please analyze the articles and return:
+- facts: 3-6 short, factual bullet points summarizing the key market-moving news
+- themes: 2-6 main themes (one or two words each, e.g., "inflation", "labor market", "tariffs")
+- sentiment: overall market sentiment (bullish, bearish, mixed, or neutral) based on the articles
+- top_articles: the numbers of the 10-15 most important articles from the list above, most important first. You MUST include at least 10 numbers. Prioritize relevance and recency.
 
 IMPORTANT:
-- Use VERY SIMPLE language that anyone can understand
-- Avoid financial jargon - explain everything in plain terms
+- Be concise and factual
 - Do NOT provide explicit trading advice
 - Only use information from the articles provided
 - Output only valid JSON matching the required schema"""
-    
-    elif mode == 'wsb':
-        return f"""You are generating a daily SPY (S&P 500 ETF) market news briefing for Predixa in a fun, engaging WallStreetBets-inspired style.
+
+
+def get_analysis_system_message() -> str:
+    """System message for the shared analysis pass"""
+    schema = '{"facts": ["bullet 1", "bullet 2"], "themes": ["theme1", "theme2"], "sentiment": "bullish|bearish|mixed|neutral", "top_articles": [3, 1, 7, ...]}'
+    return f'You are a financial news analyst creating concise market briefings. Always output valid JSON matching this exact structure: {schema}'
+
+
+def get_mode_instructions(mode: str, analysis_text: str) -> str:
+    """Prompt to restyle the shared analysis for a non-pro mode"""
+    if mode == 'simple':
+        style = """You are rewriting a daily SPY (S&P 500 ETF) market news briefing for Predixa in VERY SIMPLE language - explain like the reader is 5 years old.
 
 STYLE REQUIREMENTS:
-- Use fun, energetic language with meme references and emojis (sparingly)
+- Use simple, everyday words (avoid financial jargon like "ETF", "volatility", "liquidity")
+- Explain complex concepts in plain language
+- Keep sentences short and easy to understand
+- Use analogies when helpful (e.g., "like a piggy bank for many companies")
+- Be friendly and approachable"""
+        themes = 'simple words (e.g., "prices going up", "jobs", "taxes")'
+    else:  # wsb
+        style = """You are rewriting a daily SPY (S&P 500 ETF) market news briefing for Predixa in a fun, engaging WallStreetBets-inspired style.
+
+STYLE REQUIREMENTS:
+- Use fun, energetic language with meme references and emojis (sparingly, 1-2 per bullet max)
 - Make it entertaining and engaging
 - Use terms like "stocks go brrr", "diamond hands", "tendies", "stonks" (playfully)
 - Add excitement and personality
 - NO profanity or inappropriate language
-- NO explicit financial advice
-- Keep it fun but informative
-
-Here are today's top SPY news articles:
-
-{articles_text}
-
-Please generate a fun daily briefing that:
-- Summarizes the key market-moving news in 3-6 short, energetic bullet points (with personality and occasional emojis)
-- Identifies 2-6 main themes using fun tags (e.g., "inflation 📈", "jobs 💼", "tariffs 🚫")
-- Assesses overall market sentiment (bullish, bearish, mixed, or neutral) based on the articles
-- Selects EXACTLY 10-15 most important articles (NOT 5). You MUST include at least 10 articles in top_articles array. Prioritize relevance and recency.
-
-IMPORTANT:
-- Make it fun and engaging with meme culture references
-- Use emojis sparingly (1-2 per bullet max)
-- NO profanity or inappropriate content
-- NO explicit trading advice
-- Only use information from the articles provided
-- Output only valid JSON matching the required schema"""
+- Keep it fun but informative"""
+        themes = 'fun tags (e.g., "inflation 📈", "jobs 💼", "tariffs 🚫")'
     
-    else:  # pro
-        return f"""You are generating a daily SPY (S&P 500 ETF) market news briefing for Predixa, a trading analytics platform.
+    return f"""{style}
 
-Here are today's top SPY news articles:
+Here is today's briefing:
 
-{articles_text}
+{analysis_text}
 
-Please generate a concise daily briefing that:
-- Summarizes the key market-moving news in 3-6 short bullet points
-- Identifies 2-6 main themes (one or two words each, e.g., "inflation", "labor market", "tariffs")
-- Assesses overall market sentiment (bullish, bearish, mixed, or neutral) based on the articles
-- Selects EXACTLY 10-15 most important articles (NOT 5). You MUST include at least 10 articles in top_articles array. Prioritize relevance and recency.
+Rewrite it in this style:
+- daily_brief: one rewritten bullet for each bullet above, same order and meaning
+- themes: the same themes as {themes}
 
 IMPORTANT:
-- Be concise and factual
+- Do not add facts that are not in the briefing
 - Do NOT provide explicit trading advice
-- Only use information from the articles provided
-- Output only valid JSON matching the required schema
-
-Return a JSON object with:
-- daily_brief: array of 3-6 short bullet point strings
-- themes: array of 2-6 one or two-word theme tags
-- sentiment: one of "bullish", "bearish", "mixed", or "neutral"
-- top_articles: array of EXACTLY 10-15 articles (NOT 5) with title, publisher, published_utc, and url fields. You MUST include at least 10 articles, prioritizing most relevant and recent. Do NOT limit to 5 articles."""
+- Output only valid JSON matching the required schema"""
 
 
 def get_system_message(mode: str) -> str:
-    """Get system message for OpenAI based on mode"""
-    base_schema = '{"daily_brief": ["bullet 1", "bullet 2"], "themes": ["theme1", "theme2"], "sentiment": "bullish|bearish|mixed|neutral", "top_articles": [{"title": "...", "publisher": "...", "published_utc": "...", "url": "..."}, ...]}'
+    """Get system message for the restyling call based on mode"""
+    schema = '{"daily_brief": ["bullet 1", "bullet 2"], "themes": ["theme1", "theme2"]}'
     
     if mode == 'simple':
-        return f'You are a friendly financial educator who explains market news in very simple terms that anyone can understand. Always output valid JSON matching this exact structure: {base_schema}'
-    elif mode == 'wsb':
-        return f'You are a fun, energetic market commentator who makes financial news entertaining with meme culture references and personality. NO profanity. Always output valid JSON matching this exact structure: {base_schema}'
+        return f'You are a friendly financial educator who explains market news in very simple terms that anyone can understand. Always output valid JSON matching this exact structure: {schema}'
     else:
-        return f'You are a financial news analyst creating concise market briefings. Always output valid JSON matching this exact structure: {base_schema}'
+        return f'You are a fun, energetic market commentator who makes financial news entertaining with meme culture references and personality. NO profanity. Always output valid JSON matching this exact structure: {schema}'
+
+
+def complete_json(system_message: str, prompt: str, max_tokens: int) -> Dict[str, Any]:
+    """One JSON-mode chat completion, parsed"""
+    completion = openai_client.chat.completions.create(
+        model='gpt-4o-mini',
+        messages=[
+            {'role': 'system', 'content': system_message},
+            {'role': 'user', 'content': prompt},
+        ],
+        response_format={'type': 'json_object'},
+        temperature=0.7,
+        max_tokens=max_tokens,
+    )
+    
+    content = completion.choices[0].message.content
+    if not content:
+        raise ValueError('OpenAI returned empty response')
+    
+    usage = getattr(completion, 'usage', None)
+    if usage is not None:
+        print(f'OpenAI usage: {usage.prompt_tokens} prompt + {usage.completion_tokens} completion tokens')
+    
+    return json.loads(content)
 
 
-def generate_briefing(articles: List[Dict[str, Any]], mode: str = 'pro') -> Dict[str, Any]:
-    """Generate briefing using OpenAI"""
+def normalize_briefing(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """Fix up daily_brief/themes/sentiment/top_articles to the briefing schema"""
+    if not isinstance(parsed.get('daily_brief'), list):
+        parsed['daily_brief'] = []
+    if not isinstance(parsed.get('themes'), list):
+        parsed['themes'] = []
+    if not isinstance(parsed.get('top_articles'), list):
+        parsed['top_articles'] = []
+    
+    # Ensure minimum items
+    if len(parsed['daily_brief']) < 3:
+        parsed['daily_brief'].extend([
+            'Market news update' for _ in range(3 - len(parsed['daily_brief']))
+        ])
+    if len(parsed['themes']) < 2:
+        parsed['themes'].extend(['market' for _ in range(2 - len(parsed['themes']))])
+    
+    # Validate sentiment
+    sentiment = parsed.get('sentiment', 'neutral')
+    if sentiment not in VALID_SENTIMENTS:
+        parsed['sentiment'] = 'neutral'
+    
+    return parsed
+
+
+def analyze_articles(articles: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Shared analysis pass: one completion over the article list, returned as a
+    pro-style briefing (daily_brief, themes, sentiment, top_articles). The article
+    picks come back as list numbers and are filled in from `articles`, so every
+    mode lists the same articles with exact titles and URLs. None on failure.
+    """
     if not articles:
-        return get_fallback_briefing('No articles available')
+        return None
     
-    # Take top 15 articles
-    top_articles = articles[:15]
+    # Take top articles
+    top_articles = articles[:PROMPT_ARTICLES]
     
     # Build articles text
     articles_text = '\n'.join([
-        f"{idx + 1}. [{article.get('publishedUtc', '')[:19]} UTC] {article.get('publisherName', 'Unknown')} – {article.get('title', '')}"
-        + (f": {article.get('description', '')}" if article.get('description') else '')
-        for idx, article in enumerate(top_articles)
+        format_article_line(idx, article) for idx, article in enumerate(top_articles)
     ])
     
-    prompt = get_mode_instructions(mode, articles_text)
-    system_message = get_system_message(mode)
+    try:
+        parsed = complete_json(get_analysis_system_message(), get_analysis_instructions(articles_text), 800)
+    except Exception as e:
+        print(f'Error analyzing articles: {e}')
+        return None
+    
+    picks = []
+    for n in parsed.get('top_articles') or []:
+        try:
+            idx = int(n) - 1
+        except (TypeError, ValueError):
+            continue
+        if 0 <= idx < len(top_articles) and idx not in picks:
+            picks.append(idx)
+    # At least 10 articles, topped up in feed order
+    for idx in range(len(top_articles)):
+        if len(picks) >= 10:
+            break
+        if idx not in picks:
+            picks.append(idx)
+    
+    return normalize_briefing({
+        'daily_brief': parsed.get('facts'),
+        'themes': parsed.get('themes'),
+        'sentiment': parsed.get('sentiment', 'neutral'),
+        'top_articles': [
+            {
+                'title': top_articles[idx].get('title', ''),
+                'publisher': top_articles[idx].get('publisherName', 'Unknown'),
+                'published_utc': top_articles[idx].get('publishedUtc', ''),
+                'url': top_articles[idx].get('url', ''),
+            }
+            for idx in picks[:15]
+        ],
+    })
+
+
+def generate_briefing(analysis: Optional[Dict[str, Any]], mode: str = 'pro') -> Dict[str, Any]:
+    """
+    Style the shared analysis for `mode`: pro is the analysis itself, simple/wsb are a
+    small rewrite of its bullets and themes. Sentiment and top_articles are shared.
+    """
+    if analysis is None:
+        return get_fallback_briefing('Article analysis unavailable')
+    
+    if mode == 'pro':
+        return json.loads(json.dumps(analysis))
+    
+    analysis_text = json.dumps({
+        'daily_brief': analysis['daily_brief'],
+        'themes': analysis['themes'],
+    }, ensure_ascii=False, indent=2)
     
     try:
-        completion = openai_client.chat.completions.create(
-            model='gpt-4o-mini',
-            messages=[
-                {'role': 'system', 'content': system_message},
-                {'role': 'user', 'content': prompt},
-            ],
-            response_format={'type': 'json_object'},
-            temperature=0.7,
-            max_tokens=2500,  # Increased for more articles
-        )
-        
-        content = completion.choices[0].message.content
-        if not content:
-            raise ValueError('OpenAI returned empty response')
-        
-        parsed = json.loads(content)
-        
-        # Validate and fix structure
-        if not isinstance(parsed.get('daily_brief'), list):
-            parsed['daily_brief'] = []
-        if not isinstance(parsed.get('themes'), list):
-            parsed['themes'] = []
-        if not isinstance(parsed.get('top_articles'), list):
-            parsed['top_articles'] = []
-        
-        # Ensure minimum items
-        if len(parsed['daily_brief']) < 3:
-            parsed['daily_brief'].extend([
-                'Market news update' for _ in range(3 - len(parsed['daily_brief']))
-            ])
-        if len(parsed['themes']) < 2:
-            parsed['themes'].extend(['market' for _ in range(2 - len(parsed['themes']))])
-        
-        # Validate sentiment
-        sentiment = parsed.get('sentiment', 'neutral')
-        if sentiment not in VALID_SENTIMENTS:
-            parsed['sentiment'] = 'neutral'
-        
-        return parsed
+        parsed = complete_json(get_system_message(mode), get_mode_instructions(mode, analysis_text), 800)
+        return normalize_briefing({
+            'daily_brief': parsed.get('daily_brief'),
+            'themes': parsed.get('themes'),
+            'sentiment': analysis['sentiment'],
+            'top_articles': json.loads(json.dumps(analysis['top_articles'])),
+        })
     
     except Exception as e:
         print(f'Error generating briefing: {e}')
@@ -287,6 +718,48 @@ def get_fallback_briefing(error_message: str) -> Dict[str, Any]:
     }
 
 
+def is_fallback_briefing(briefing: Dict[str, Any]) -> bool:
+    """True for the placeholder from get_fallback_briefing (never reused as a cache hit)"""
+    return briefing.get('daily_brief') == get_fallback_briefing('')['daily_brief']
+
+
+def load_latest_briefing(mode: str) -> Optional[Dict[str, Any]]:
+    """Read briefings/spy/latest-<mode>.json, revalidating this container's copy by ETag"""
+    key = f'briefings/spy/latest-{mode}.json'
+    cached = _latest_cache.get(mode)
+    kwargs = {'IfNoneMatch': cached['etag']} if cached else {}
+    try:
+        obj = s3_client.get_object(Bucket=s3_bucket, Key=key, **kwargs)
+    except ClientError as e:
+        code = str(e.response.get('Error', {}).get('Code', ''))
+        if cached and code in ('304', 'NotModified'):
+            return cached['metadata']
+        if code in ('404', 'NoSuchKey'):
+            return None
+        raise
+    
+    metadata = json.loads(obj['Body'].read())
+    _latest_cache[mode] = {'etag': obj.get('ETag'), 'metadata': metadata}
+    return metadata
+
+
+def emit_metrics(metrics: Dict[str, float], unit: str = 'Count') -> None:
+    """Print one CloudWatch Embedded Metric Format line"""
+    if not EMIT_METRICS or not metrics:
+        return
+    print(json.dumps({
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRICS_NAMESPACE,
+                'Dimensions': [[]],
+                'Metrics': [{'Name': name, 'Unit': unit} for name in metrics],
+            }],
+        },
+        **metrics,
+    }))
+
+
 def store_briefing_in_s3(
     briefing: Dict[str, Any],
     mode: str,
@@ -313,12 +786,13 @@ def store_briefing_in_s3(
     # Store latest version
     latest_key = f'briefings/spy/latest-{mode}.json'
     try:
-        s3_client.put_object(
+        put = s3_client.put_object(
             Bucket=s3_bucket,
             Key=latest_key,
             Body=json.dumps(metadata, ensure_ascii=False),
             ContentType='application/json',
         )
+        _latest_cache[mode] = {'etag': put.get('ETag'), 'metadata': metadata}
         stored_paths['latest'] = latest_key
         print(f'✅ Stored latest briefing: s3://{s3_bucket}/{latest_key}')
     except Exception as e:
@@ -341,6 +815,76 @@ def store_briefing_in_s3(
     return stored_paths
 
 
+def reusable_briefing(mode: str, article_hash: str) -> Optional[Dict[str, Any]]:
+    """Stored latest metadata for `mode` when it was built from the same articles (and is not a fallback)"""
+    try:
+        previous = load_latest_briefing(mode)
+    except Exception as e:
+        print(f'⚠️ Could not read latest {mode} briefing: {e}')
+        return None
+    
+    if (
+        previous
+        and article_hash
+        and previous.get('articleHash') == article_hash
+        and isinstance(previous.get('briefing'), dict)
+        and not is_fallback_briefing(previous['briefing'])
+    ):
+        return previous
+    return None
+
+
+def generate_and_store_mode(
+    articles: List[Dict[str, Any]],
+    mode: str,
+    article_hash: str,
+    date_str: str,
+    analysis: Optional[Dict[str, Any]],
+    previous: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Style one mode's briefing from the shared analysis and store it; never raises,
+    so one mode cannot sink the others.
+    
+    `previous` (from reusable_briefing) is reused instead of calling OpenAI. It is
+    still re-stored, so generatedAt (which readers check for freshness) and today's
+    dated copy stay current. A fallback (no analysis, or the rewrite failed) is
+    returned but never stored, so the last good briefing stays in place.
+    """
+    t0 = time.perf_counter()
+    cached = previous is not None
+    if cached:
+        print(f'ℹ️ Articles unchanged since {previous.get("generatedAt")}; reusing {mode} briefing')
+        briefing = previous['briefing']
+    else:
+        print(f'Generating {mode} briefing...')
+        try:
+            briefing = generate_briefing(analysis, mode)
+        except Exception as e:
+            print(f'❌ Error generating {mode} briefing: {e}')
+            briefing = get_fallback_briefing(str(e))
+    
+    stored_paths = {}
+    if is_fallback_briefing(briefing):
+        print(f'⚠️ Keeping the stored {mode} briefing instead of the fallback')
+    else:
+        try:
+            stored_paths = store_briefing_in_s3(
+                briefing, mode, articles, article_hash, date_str
+            )
+        except Exception as e:
+            print(f'❌ Error storing {mode} briefing: {e}')
+    
+    return {
+        'briefing': briefing,
+        'storedPaths': stored_paths,
+        'articlesCount': len(articles),
+        'articleHash': article_hash,
+        'cached': cached,
+        'elapsedMs': round((time.perf_counter() - t0) * 1000.0, 1),
+    }
+
+
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """Lambda entry point"""
     try:
@@ -356,45 +900,78 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if not modes:
             modes = BRIEFING_MODES
         
-        print(f'Generating briefings for modes: {modes}')
+        # force: refetch every article and regenerate even when they are unchanged
+        force = bool(event.get('force', False))
+        
+        print(f'Generating briefings for modes: {modes}' + (' (forced)' if force else ''))
         
         # Fetch news articles
-        articles = fetch_spy_news()
+        articles = fetch_spy_news(full=force)
+        news_stats = get_news_client().last_stats
+        emit_metrics({'NewsFetchMs': news_stats.get('totalMs') or 0.0}, unit='Milliseconds')
         if not articles:
             return {
                 'success': False,
                 'error': 'No articles available',
             }
         
-        article_hash = generate_article_hash(articles)
-        date_str = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        # Syndicated copies collapsed, within the prompt's article/token budget
+        prompt_articles = select_prompt_articles(articles)
         
-        results = {}
+        article_hash = generate_article_hash(prompt_articles)
+        date_str = datetime.now(timezone.utc).strftime('%Y-%m-%d')
         
-        # Generate briefing for each mode
-        for mode in modes:
-            print(f'Generating {mode} briefing...')
-            briefing = generate_briefing(articles, mode)
+        t0 = time.perf_counter()
+        workers = max(1, min(BRIEFING_WORKERS, len(modes)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Stored briefings built from these same articles are reused as is
+            previous = {mode: None for mode in modes}
+            if not force:
+                previous = dict(zip(modes, pool.map(
+                    lambda mode: reusable_briefing(mode, article_hash), modes
+                )))
             
-            # Store in S3
-            stored_paths = store_briefing_in_s3(
-                briefing, mode, articles, article_hash, date_str
-            )
+            # One shared analysis pass for the modes that need generating, retried
+            # once; without it those modes keep their stored briefings
+            analysis = None
+            analysis_failed = False
+            if any(previous[mode] is None for mode in modes):
+                print('Analyzing articles...')
+                analysis = analyze_articles(prompt_articles)
+                if analysis is None:
+                    print('⚠️ Analysis failed; retrying once...')
+                    analysis = analyze_articles(prompt_articles)
+                analysis_failed = analysis is None
             
-            results[mode] = {
-                'briefing': briefing,
-                'storedPaths': stored_paths,
-                'articlesCount': len(articles),
-                'articleHash': article_hash,
-            }
+            # Style and store every mode concurrently; each worker writes its mode
+            # to S3 as soon as its rewrite returns
+            outputs = pool.map(
+                lambda mode: generate_and_store_mode(
+                    articles, mode, article_hash, date_str, analysis, previous[mode]
+                ),
+                modes,
+            )
+            results = dict(zip(modes, outputs))
+        elapsed_ms = round((time.perf_counter() - t0) * 1000.0, 1)
+        hits = [m for m in modes if results[m]['cached']]
+        print(f'Generated {len(modes)} briefing(s) in {elapsed_ms} ms with {workers} worker(s), '
+              f'{len(hits)} reused from cache')
+        emit_metrics({'BriefingCacheHits': len(hits), 'BriefingCacheMisses': len(modes) - len(hits)})
         
-        return {
-            'success': True,
+        response = {
+            'success': not analysis_failed,
             'date': date_str,
             'articleHash': article_hash,
             'articlesCount': len(articles),
+            'storiesCount': len(prompt_articles),
+            'newsFetch': news_stats,
+            'elapsedMs': elapsed_ms,
+            'cacheHits': hits,
             'results': results,
         }
+        if analysis_failed:
+            response['error'] = 'Article analysis failed twice; stored briefings left unchanged'
+        return response
     
     except Exception as e:
         print(f'❌ Lambda error: {e}')
@@ -0,0 +1,75 @@
+"""
+Shared fixtures: handler.py loaded against moto S3, with OpenAI never called.
+
+    cd lambda/news-briefing && python -m pytest -q tests
+"""
+
+import importlib.util
+import os
+
+import pytest
+
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('S3_BUCKET', 'news-briefing-test')
+os.environ.setdefault('OPENAI_API_KEY', 'sk-test')
+os.environ.setdefault('EMIT_METRICS', '0')
+
+moto = pytest.importorskip('moto')
+pytest.importorskip('openai')
+
+HANDLER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'handler.py')
+
+
+def _load_handler():
+    # Loaded under its own name so it never shadows handler/handler.py in one session
+    spec = importlib.util.spec_from_file_location('news_briefing_handler', HANDLER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+_handler = _load_handler()
+
+
+@pytest.fixture
+def nb(monkeypatch):
+    """The news-briefing handler with an empty bucket, no backoff sleeps and cold caches."""
+    with moto.mock_aws():
+        _handler.s3_client.create_bucket(Bucket=_handler.s3_bucket)
+        monkeypatch.setattr(_handler.time, 'sleep', lambda _s: None)
+        monkeypatch.setattr(_handler, '_news_client', None)
+        _handler._latest_cache.clear()
+        yield _handler
+
+
+@pytest.fixture
+def pipeline(nb, monkeypatch):
+    """
+    lambda_handler with fixed articles and counted (fake) OpenAI passes; set
+    calls['generate_hook'] to run code inside each mode's generate_briefing.
+    """
+    calls = {'analyze': 0, 'generate': [], 'analysis': [], 'generate_hook': None}
+    articles = [{'id': f'a{i}', 'title': f'Distinct story {i} ' + 'word ' * i, 'description': '',
+                 'publisherName': 'Reuters', 'publishedUtc': f'2026-10-16T1{i}:00:00Z', 'url': f'u{i}'}
+                for i in range(3)]
+
+    def analyze(_articles):
+        calls['analyze'] += 1
+        return {'facts': []}
+
+    def generate(analysis, mode):
+        calls['generate'].append(mode)
+        calls['analysis'].append(analysis)
+        if calls['generate_hook']:
+            calls['generate_hook'](mode)
+        if analysis is None:  # as generate_briefing does
+            return nb.get_fallback_briefing('no analysis')
+        return {'daily_brief': ['a', 'b', 'c'], 'themes': [mode], 'sentiment': 'bullish', 'top_articles': []}
+
+    monkeypatch.setattr(nb, 'fetch_spy_news', lambda full=False: articles)
+    monkeypatch.setattr(nb, 'get_news_client', lambda: type('C', (), {'last_stats': {}})())
+    monkeypatch.setattr(nb, 'analyze_articles', analyze)
+    monkeypatch.setattr(nb, 'generate_briefing', generate)
+    return calls
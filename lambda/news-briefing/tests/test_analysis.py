@@ -0,0 +1,106 @@
+"""Shared analysis pass: one completion over the articles, styled per mode."""
+
+import json
+from typing import Any, Dict, List
+
+import pytest
+
+
+@pytest.fixture
+def completions(nb, monkeypatch):
+    """Fake complete_json: records each call, answers from `replies` by system message."""
+    calls: List[Dict[str, Any]] = []
+    replies = {
+        'analysis': {'facts': ['Fed held', 'Chips rallied', 'Oil slid'], 'themes': ['rates', 'chips'],
+                     'sentiment': 'mixed', 'top_articles': [3, 1, 3, 99, 'x']},
+        'rewrite': {'daily_brief': ['Rates stay put', 'Chips up', 'Oil down'], 'themes': ['fed', 'tech']},
+    }
+
+    def complete_json(system_message: str, prompt: str, max_tokens: int) -> Dict[str, Any]:
+        kind = 'analysis' if system_message == nb.get_analysis_system_message() else 'rewrite'
+        calls.append({'kind': kind, 'prompt': prompt})
+        return json.loads(json.dumps(replies[kind]))
+
+    monkeypatch.setattr(nb, 'complete_json', complete_json)
+    return calls
+
+
+def articles(n: int) -> List[Dict[str, Any]]:
+    return [{'id': f'a{i}', 'title': f'Title {i}', 'publisherName': f'Pub{i}',
+             'publishedUtc': f'2026-10-16T{i:02d}:00:00Z', 'url': f'https://news.test/{i}'}
+            for i in range(n)]
+
+
+def test_analysis_maps_picks_back_to_exact_articles(nb, completions):
+    analysis = nb.analyze_articles(articles(12))
+
+    assert [c['kind'] for c in completions] == ['analysis']
+    assert analysis['daily_brief'] == ['Fed held', 'Chips rallied', 'Oil slid']
+    assert analysis['sentiment'] == 'mixed'
+    # picks 3 and 1 first (duplicates and out-of-range dropped), topped up to 10 in feed order
+    assert [a['title'] for a in analysis['top_articles']][:4] == ['Title 2', 'Title 0', 'Title 1', 'Title 3']
+    assert len(analysis['top_articles']) == 10
+    assert analysis['top_articles'][0]['url'] == 'https://news.test/2'
+
+
+def test_modes_are_styled_from_one_analysis(nb, completions):
+    analysis = nb.analyze_articles(articles(12))
+
+    pro = nb.generate_briefing(analysis, 'pro')
+    simple = nb.generate_briefing(analysis, 'simple')
+
+    assert [c['kind'] for c in completions] == ['analysis', 'rewrite']
+    assert pro == analysis and pro is not analysis
+    assert simple['daily_brief'] == ['Rates stay put', 'Chips up', 'Oil down']
+    assert simple['sentiment'] == analysis['sentiment']
+    assert simple['top_articles'] == analysis['top_articles']
+    assert 'Fed held' in completions[1]['prompt']
+
+
+def test_failed_analysis_gives_every_mode_the_fallback(nb, monkeypatch):
+    def broken(*_args):
+        raise RuntimeError('timeout')
+
+    monkeypatch.setattr(nb, 'complete_json', broken)
+
+    assert nb.analyze_articles(articles(3)) is None
+    assert nb.is_fallback_briefing(nb.generate_briefing(None, 'wsb'))
+
+
+def test_handler_analyzes_once_per_run(nb, pipeline):
+    nb.lambda_handler({}, None)
+
+    assert pipeline['analyze'] == 1
+    assert len(pipeline['analysis']) == len(nb.BRIEFING_MODES)
+    assert all(a is pipeline['analysis'][0] for a in pipeline['analysis'])
+
+    nb.lambda_handler({}, None)  # every mode reused: no analysis pass at all
+    assert pipeline['analyze'] == 1
+
+
+def test_failed_analysis_is_retried_once(nb, pipeline, monkeypatch):
+    replies = [None, {'facts': []}]
+    monkeypatch.setattr(nb, 'analyze_articles', lambda _articles: replies.pop(0))
+
+    result = nb.lambda_handler({}, None)
+
+    assert replies == []
+    assert result['success'] is True
+    assert not any(nb.is_fallback_briefing(r['briefing']) for r in result['results'].values())
+
+
+def test_failed_analysis_keeps_the_stored_briefings(nb, pipeline, monkeypatch):
+    nb.lambda_handler({}, None)
+    key = 'briefings/spy/latest-pro.json'
+    before = nb.s3_client.get_object(Bucket=nb.s3_bucket, Key=key)['Body'].read()
+    attempts: List[Any] = []
+    monkeypatch.setattr(nb, 'analyze_articles', lambda a: attempts.append(a))
+
+    result = nb.lambda_handler({'force': True}, None)
+
+    assert len(attempts) == 2
+    assert result['success'] is False and 'analysis failed' in result['error']
+    for mode in nb.BRIEFING_MODES:
+        assert nb.is_fallback_briefing(result['results'][mode]['briefing'])
+        assert result['results'][mode]['storedPaths'] == {}
+    assert nb.s3_client.get_object(Bucket=nb.s3_bucket, Key=key)['Body'].read() == before
@@ -0,0 +1,33 @@
+"""lambda_handler styles and stores the briefing modes concurrently and independently."""
+
+import json
+import threading
+
+
+def test_modes_run_concurrently(nb, pipeline):
+    # Every mode must be inside generate_briefing at once for the barrier to open
+    barrier = threading.Barrier(len(nb.BRIEFING_MODES), timeout=5)
+    pipeline['generate_hook'] = lambda _mode: barrier.wait()
+
+    result = nb.lambda_handler({}, None)
+
+    assert result['success'] is True
+    assert sorted(pipeline['generate']) == sorted(nb.BRIEFING_MODES)
+    assert list(result['results']) == nb.BRIEFING_MODES
+
+
+def test_one_failing_mode_does_not_sink_the_others(nb, pipeline):
+    def fail_wsb(mode):
+        if mode == 'wsb':
+            raise RuntimeError('rate limited')
+
+    pipeline['generate_hook'] = fail_wsb
+
+    result = nb.lambda_handler({}, None)
+
+    assert result['success'] is True
+    assert nb.is_fallback_briefing(result['results']['wsb']['briefing'])
+    for mode in ('pro', 'simple'):
+        assert result['results'][mode]['briefing']['themes'] == [mode]
+        obj = nb.s3_client.get_object(Bucket=nb.s3_bucket, Key=f'briefings/spy/latest-{mode}.json')
+        assert json.loads(obj['Body'].read())['briefing']['themes'] == [mode]
@@ -0,0 +1,60 @@
+"""cluster_articles / select_prompt_articles: syndicated copies collapse to one story."""
+
+from typing import Any, Dict
+
+
+def article(n: int, title: str, description: str, publisher: str) -> Dict[str, Any]:
+    return {'id': f'a{n}', 'title': title, 'description': description, 'publisherName': publisher,
+            'publishedUtc': f'2026-10-16T{20 - n:02d}:00:00Z', 'url': f'https://news.test/{n}'}
+
+
+FED = ('The Federal Reserve held interest rates steady on Wednesday and signalled two cuts '
+       'later this year as inflation continued to cool across services and goods')
+CHIPS = 'Chipmakers rallied after a strong earnings report lifted semiconductor stocks to record highs'
+OIL = 'Oil prices slid as OPEC members agreed to raise output for a third straight month'
+
+
+def test_syndicated_copies_collapse_into_the_newest(nb):
+    articles = [
+        article(0, 'Fed holds rates steady, signals two cuts', FED, 'Reuters'),
+        article(1, 'Chip stocks surge to records', CHIPS, 'Bloomberg'),
+        article(2, 'FED HOLDS RATES STEADY -- SIGNALS TWO CUTS!', 'Wire copy.', 'Yahoo'),  # exact title
+        article(3, 'Fed keeps rates on hold, sees two cuts', FED + ' officials said', 'MarketWatch'),  # near
+        article(4, 'Oil slides on OPEC output hike', OIL, 'Reuters'),
+    ]
+
+    stories = nb.cluster_articles(articles)
+
+    assert [s['id'] for s in stories] == ['a0', 'a1', 'a4']
+    assert stories[0]['clusterSize'] == 3
+    assert stories[0]['publishers'] == ['Reuters', 'Yahoo', 'MarketWatch']
+    assert [s['clusterSize'] for s in stories[1:]] == [1, 1]
+    assert stories[0]['title'] == articles[0]['title']
+
+
+def test_distinct_stories_are_kept_apart(nb):
+    articles = [
+        article(0, 'Chip stocks surge to records', CHIPS, 'Bloomberg'),
+        article(1, 'Oil slides on OPEC output hike', OIL, 'Reuters'),
+        article(2, 'Fed holds rates steady', FED, 'Reuters'),
+        article(3, '', '', 'Unknown'),  # empty articles never match each other
+        article(4, '', '', 'Unknown'),
+    ]
+
+    stories = nb.cluster_articles(articles)
+
+    assert [s['id'] for s in stories] == ['a0', 'a1', 'a2', 'a3', 'a4']
+    assert all(s['clusterSize'] == 1 for s in stories)
+
+
+def test_prompt_lists_each_story_once_with_every_publisher(nb):
+    articles = [
+        article(0, 'Fed holds rates steady, signals two cuts', FED, 'Reuters'),
+        article(1, 'Fed holds rates steady, signals two cuts', FED, 'CNBC'),
+        article(2, 'Chip stocks surge to records', CHIPS, 'Bloomberg'),
+    ]
+
+    selected = nb.select_prompt_articles(articles)
+
+    assert [s['id'] for s in selected] == ['a0', 'a2']
+    assert nb.format_article_line(0, selected[0]).startswith('1. [2026-10-16T20:00:00 UTC] Reuters, CNBC – Fed holds')
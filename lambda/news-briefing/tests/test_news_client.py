@@ -0,0 +1,145 @@
+"""MassiveNewsClient against an injected session: pagination, retries, incremental merge."""
+
+import json
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+BASE_URL = 'https://news.test'
+
+
+def item(n: int, published: str, **extra) -> Dict[str, Any]:
+    return {'id': f'id{n}', 'title': f'Story {n}', 'published_utc': published, **extra}
+
+
+def response(status: int, body: Any = None, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = json.dumps(body if body is not None else {}).encode('utf-8')
+    resp.headers.update(headers or {})
+    return resp
+
+
+class FakeSession:
+    """Replays queued responses and records every request."""
+
+    def __init__(self, responses: List[Any]):
+        self.responses = list(responses)
+        self.requests: List[Dict[str, Any]] = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.requests.append({'url': url, 'params': dict(params or {}), 'headers': dict(headers or {})})
+        nxt = self.responses.pop(0)
+        if isinstance(nxt, Exception):
+            raise nxt
+        return nxt
+
+    def query(self, i: int) -> Dict[str, Any]:
+        """Query of the i-th request, from params or the URL itself (next_url pages)"""
+        req = self.requests[i]
+        return {**{k: v[0] for k, v in parse_qs(urlparse(req['url']).query).items()}, **req['params']}
+
+
+def client(nb, session: FakeSession, **kwargs):
+    defaults = dict(base_url=BASE_URL, max_articles=5, page_size=2, retries=2, session=session)
+    return nb.MassiveNewsClient('secret-key', **{**defaults, **kwargs})
+
+
+def test_follows_next_url_up_to_max_articles(nb):
+    session = FakeSession([
+        response(200, {'results': [item(5, '2026-10-16T15:00:00Z'), item(4, '2026-10-16T14:00:00Z')],
+                       'next_url': f'{BASE_URL}/v2/reference/news?cursor=p2'}),
+        response(200, {'results': [item(3, '2026-10-16T13:00:00Z'), item(2, '2026-10-16T12:00:00Z')],
+                       'next_url': '/v2/reference/news?cursor=p3'}),
+        response(200, {'results': [item(1, '2026-10-16T11:00:00Z'), item(0, '2026-10-16T10:00:00Z')],
+                       'next_url': '/v2/reference/news?cursor=p4'}),
+    ])
+
+    items = client(nb, session).fetch('SPY')
+
+    assert [i['id'] for i in items] == ['id5', 'id4', 'id3', 'id2', 'id1']
+    assert len(session.requests) == 3
+    assert session.query(0)['ticker'] == 'SPY' and session.query(0)['limit'] == 2
+    assert session.requests[1]['url'] == f'{BASE_URL}/v2/reference/news?cursor=p2'
+    assert session.requests[2]['url'] == f'{BASE_URL}/v2/reference/news?cursor=p3'
+    assert session.requests[1]['params'] == {}  # the cursor URL carries the query
+
+
+def test_api_key_only_in_the_authorization_header(nb):
+    session = FakeSession([response(200, {'results': [item(1, '2026-10-16T11:00:00Z')]})])
+
+    client(nb, session).fetch('SPY')
+
+    req = session.requests[0]
+    assert req['headers']['Authorization'] == 'Bearer secret-key'
+    assert 'secret-key' not in req['url'] and 'secret-key' not in json.dumps(req['params'])
+
+
+@pytest.mark.parametrize('failure', [
+    response(429, headers={'Retry-After': '1'}),
+    response(503),
+    requests.ConnectionError('connection reset'),
+])
+def test_transient_failures_are_retried(nb, failure):
+    session = FakeSession([failure, response(200, {'results': [item(1, '2026-10-16T11:00:00Z')]})])
+    news = client(nb, session)
+
+    items = news.fetch('SPY')
+
+    assert [i['id'] for i in items] == ['id1']
+    assert news.last_stats['retries'] == 1 and news.last_stats['requests'] == 2
+
+
+def test_exhausted_retries_raise_without_the_key(nb):
+    session = FakeSession([response(502), response(502), response(502)])
+
+    with pytest.raises(requests.HTTPError) as exc:
+        client(nb, session).fetch('SPY')
+
+    assert len(session.requests) == 3
+    assert 'secret-key' not in str(exc.value)
+
+
+def test_client_errors_are_not_retried(nb):
+    session = FakeSession([response(403)])
+
+    with pytest.raises(requests.HTTPError):
+        client(nb, session).fetch('SPY')
+    assert len(session.requests) == 1
+
+
+def test_incremental_fetch_overlaps_and_merges_by_id(nb):
+    session = FakeSession([
+        response(200, {'results': [item(2, '2026-10-16T12:00:00Z'), item(1, '2026-10-16T11:00:00Z')]}),
+        # id2 re-sent with an edit, id3 is new, id0 was indexed late with an older timestamp
+        response(200, {'results': [item(3, '2026-10-16T12:10:00Z'), item(2, '2026-10-16T12:00:00Z', title='Edited'),
+                                   item(0, '2026-10-16T11:50:00Z')]}),
+    ])
+    news = client(nb, session, overlap_minutes=30)
+    news.fetch('SPY')
+
+    items = news.fetch('SPY')
+
+    assert session.query(1)['published_utc.gte'] == '2026-10-16T11:30:00Z'
+    assert [i['id'] for i in items] == ['id3', 'id2', 'id0', 'id1']
+    assert items[1]['title'] == 'Edited'
+    assert news.last_stats['incremental'] is True
+    assert news.last_stats['newArticles'] == 2
+
+
+def test_full_fetch_when_forced_or_stale(nb, monkeypatch):
+    page = {'results': [item(1, '2026-10-16T11:00:00Z')]}
+    session = FakeSession([response(200, page), response(200, page), response(200, page)])
+    news = client(nb, session, full_refresh_minutes=120)
+    news.fetch('SPY')
+
+    news.fetch('SPY', full=True)
+    assert 'published_utc.gte' not in session.query(1)
+
+    later = nb.time.monotonic() + 121 * 60
+    monkeypatch.setattr(nb.time, 'monotonic', lambda: later)
+    news.fetch('SPY')
+    assert 'published_utc.gte' not in session.query(2)
+    assert news.last_stats['incremental'] is False
@@ -0,0 +1,85 @@
+"""reusable_briefing and the handler's cache path: hit, miss and force."""
+
+import json
+from typing import Any, Dict, List
+
+import pytest
+
+BRIEFING = {'daily_brief': ['a', 'b', 'c'], 'themes': ['x'], 'sentiment': 'bullish', 'top_articles': []}
+
+
+def stored(nb, mode: str) -> Dict[str, Any]:
+    obj = nb.s3_client.get_object(Bucket=nb.s3_bucket, Key=f'briefings/spy/latest-{mode}.json')
+    return json.loads(obj['Body'].read())
+
+
+def test_hit_on_same_hash(nb):
+    nb.store_briefing_in_s3(BRIEFING, 'pro', [{}], 'h1')
+
+    assert nb.reusable_briefing('pro', 'h1')['briefing'] == BRIEFING
+
+
+def test_hit_revalidates_with_if_none_match(nb, monkeypatch):
+    nb.store_briefing_in_s3(BRIEFING, 'pro', [{}], 'h1')
+    seen: List[Dict[str, Any]] = []
+    get_object = nb.s3_client.get_object
+    monkeypatch.setattr(nb.s3_client, 'get_object', lambda **kw: seen.append(kw) or get_object(**kw))
+
+    assert nb.reusable_briefing('pro', 'h1') is not None
+    assert seen[0]['IfNoneMatch'] == nb._latest_cache['pro']['etag']
+
+
+@pytest.mark.parametrize('case', ['changed-hash', 'missing', 'fallback', 'empty-hash'])
+def test_miss(nb, case):
+    if case == 'changed-hash':
+        nb.store_briefing_in_s3(BRIEFING, 'pro', [{}], 'h1')
+    elif case == 'fallback':
+        nb.store_briefing_in_s3(nb.get_fallback_briefing('boom'), 'pro', [{}], 'h2')
+    elif case == 'empty-hash':
+        nb.store_briefing_in_s3(BRIEFING, 'pro', [{}], '')
+
+    assert nb.reusable_briefing('pro', '' if case == 'empty-hash' else 'h2') is None
+
+
+def test_unreadable_latest_is_a_miss(nb, monkeypatch):
+    def broken(**_kw):
+        raise nb.ClientError({'Error': {'Code': 'AccessDenied'}}, 'GetObject')
+
+    monkeypatch.setattr(nb.s3_client, 'get_object', broken)
+    assert nb.reusable_briefing('pro', 'h1') is None
+
+
+def test_second_run_reuses_every_mode(nb, pipeline):
+    first = nb.lambda_handler({}, None)
+    generated_at = stored(nb, 'pro')['generatedAt']
+
+    second = nb.lambda_handler({}, None)
+
+    assert first['cacheHits'] == [] and sorted(pipeline['generate']) == sorted(nb.BRIEFING_MODES)
+    assert second['cacheHits'] == nb.BRIEFING_MODES
+    assert pipeline['analyze'] == 1 and len(pipeline['generate']) == len(nb.BRIEFING_MODES)
+    assert stored(nb, 'pro')['generatedAt'] >= generated_at  # re-stored, so still fresh
+    assert second['results']['pro']['briefing']['themes'] == ['pro']
+
+
+def test_force_regenerates_despite_a_hit(nb, pipeline):
+    nb.lambda_handler({}, None)
+
+    forced = nb.lambda_handler({'force': True, 'modes': ['pro']}, None)
+
+    assert forced['cacheHits'] == []
+    assert pipeline['analyze'] == 2
+    assert pipeline['generate'].count('pro') == 2
+
+
+def test_hash_ignores_feed_position(nb, monkeypatch):
+    feed = [{'id': f'n{i}', 'title': f'Story {i}', 'published_utc': f'2026-10-16T1{i}:00:00Z',
+             'article_url': f'https://news.test/{i}'} for i in range(3)]
+    monkeypatch.setattr(nb, 'get_news_client', lambda: type('C', (), {'fetch': lambda self, t, full=False: feed})())
+    before = nb.fetch_spy_news()
+
+    feed.insert(0, {'id': 'n9', 'title': 'Breaking', 'published_utc': '2026-10-16T19:00:00Z'})
+    after = nb.fetch_spy_news()
+
+    assert [a['id'] for a in after[1:]] == [a['id'] for a in before] == ['massive-n0', 'massive-n1', 'massive-n2']
+    assert nb.generate_article_hash(after[1:]) == nb.generate_article_hash(before)
@@ -3,6 +3,7 @@ import axios from 'axios'
 
 import { config } from '@/lib/server/config'
 import { logger } from '@/lib/server/logger'
+import { fetchTierHistory } from '@/lib/server/summary-json'
 
 // Force dynamic rendering - prevents Next.js from caching this route
 export const dynamic = 'force-dynamic'
@@ -112,56 +113,8 @@ export async function GET() {
     // Fetch tier data from S3 using OHLC dates as source of truth
     // This ensures we always fetch tier data for the exact same dates as OHLC data,
     // preventing timezone-related date mismatches
-    const tierDataMap = new Map<string, any>()
-
-    // Use OHLC dates to fetch tier data (ensures perfect date matching)
-    for (const ohlc of ohlcData) {
-      const dateStr = ohlc.date
-      
-      // Skip if we already fetched this date
-      if (tierDataMap.has(dateStr)) {
-        continue
-      }
-      
-      try {
-        const url = `https://s3.amazonaws.com/${BUCKET}/summary_json/${dateStr}.json`
-        
-        const response = await axios.get(url, {
-          headers: {
-            'Cache-Control': 'no-cache',
-            'Pragma': 'no-cache'
-          },
-          timeout: 5000
-        })
-
-        const s3Data = response.data
-        
-        tierDataMap.set(dateStr, {
-          date: dateStr,
-          long_tier: s3Data.long_signal || s3Data.long_tier || s3Data.longTier || 'N/A',
-          short_tier: s3Data.short_signal || s3Data.short_tier || s3Data.shortTier || 'N/A'
-        })
-      } catch (error: any) {
-        // Skip days where tier data doesn't exist
-        if (error.response?.status === 404) {
-          logger.debug({ date: dateStr }, 'Tier data not found for date')
-          // Set N/A for missing tier data
-          tierDataMap.set(dateStr, {
-            date: dateStr,
-            long_tier: 'N/A',
-            short_tier: 'N/A'
-          })
-        } else {
-          logger.warn({ date: dateStr, error: error.message }, 'Error fetching tier data for date')
-          // Set N/A on error
-          tierDataMap.set(dateStr, {
-            date: dateStr,
-            long_tier: 'N/A',
-            short_tier: 'N/A'
-          })
-        }
-      }
-    }
+    // Timeline first; only dates missing from it hit summary_json/<date>.json
+    const tierDataMap = await fetchTierHistory(BUCKET, ohlcData.map((ohlc) => ohlc.date), 20)
 
     // Combine OHLC and tier data by date
     const combinedData = ohlcData.map(ohlc => {
@@ -1,8 +1,8 @@
 import { NextResponse } from 'next/server'
-import axios from 'axios'
 
 import { config } from '@/lib/server/config'
 import { logger } from '@/lib/server/logger'
+import { fetchTierHistory } from '@/lib/server/summary-json'
 
 // Force dynamic rendering - prevents Next.js from caching this route
 export const dynamic = 'force-dynamic'
@@ -50,38 +50,10 @@ function getLast10TradingDays(): string[] {
 export async function GET() {
   try {
     const tradingDays = getLast10TradingDays()
-    const tierData = []
-
-    // Fetch tier data for each trading day from S3
-    for (const dateStr of tradingDays) {
-      try {
-        const url = `https://s3.amazonaws.com/${BUCKET}/summary_json/${dateStr}.json`
-        
-        const response = await axios.get(url, {
-          headers: {
-            'Cache-Control': 'no-cache',
-            'Pragma': 'no-cache'
-          },
-          timeout: 5000 // 5 second timeout per request
-        })
-
-        const s3Data = response.data
-        
-        tierData.push({
-          date: dateStr,
-          long_tier: s3Data.long_signal || s3Data.long_tier || s3Data.longTier || 'N/A',
-          short_tier: s3Data.short_signal || s3Data.short_tier || s3Data.shortTier || 'N/A'
-        })
-      } catch (error: any) {
-        // Skip days where tier data doesn't exist
-        if (error.response?.status === 404) {
-          logger.debug({ date: dateStr }, 'Tier data not found for date')
-          continue
-        }
-        // Log other errors but continue
-        logger.warn({ date: dateStr, error: error.message }, 'Error fetching tier data for date')
-      }
-    }
+    // Timeline first; only dates missing from it hit summary_json/<date>.json.
+    // Days without tier data are skipped.
+    const tiers = await fetchTierHistory(BUCKET, tradingDays, 20)
+    const tierData = tradingDays.flatMap((dateStr) => tiers.get(dateStr) ?? [])
 
     return NextResponse.json({
       data: tierData,
@@ -27,7 +27,10 @@ describe('/api/tiers/daily', () => {
   })
 
   it('returns live data when S3 responds successfully', async () => {
-    // Mock today's data (first call)
+    // No latest.json pointer yet (first call) - route walks back by date
+    mockedAxiosGet.mockRejectedValueOnce(new Error('latest pointer missing'))
+
+    // Mock today's data (second call)
     mockedAxiosGet.mockResolvedValueOnce({
       data: {
         long_signal: 'S',
@@ -37,7 +40,7 @@ describe('/api/tiers/daily', () => {
       },
     })
     
-    // Mock previous day's data (second call) - route tries to fetch this but handles failure gracefully
+    // Mock previous day's data (third call) - route tries to fetch this but handles failure gracefully
     mockedAxiosGet.mockResolvedValueOnce({
       data: {
         long_signal: 'A',
@@ -58,6 +61,7 @@ describe('/api/tiers/daily', () => {
 
   it('falls back to the most recent available summary when today is missing', async () => {
     mockedAxiosGet
+      .mockRejectedValueOnce(new Error('latest pointer missing'))
       .mockRejectedValueOnce(new Error('today missing'))
       .mockResolvedValueOnce({
         data: {
@@ -0,0 +1,154 @@
+jest.mock('axios', () => {
+  const get = jest.fn()
+  return {
+    __esModule: true,
+    default: { get },
+  }
+})
+
+jest.mock('@/lib/server/logger', () => ({
+  logger: { debug: jest.fn(), warn: jest.fn(), error: jest.fn() },
+}))
+
+const mockedAxiosGet = (require('axios').default.get as jest.Mock)
+
+import { fetchLatestSummary, fetchTierHistory } from '@/lib/server/summary-json'
+
+function notFound(): Error {
+  return Object.assign(new Error('Request failed with status code 404'), { response: { status: 404 } })
+}
+
+/** Serve `objects` by S3 key; everything else 404s. */
+function serve(objects: Record<string, unknown>) {
+  mockedAxiosGet.mockImplementation(async (url: string) => {
+    const key = new URL(url).pathname.slice(1)
+    if (key in objects) return { data: objects[key] }
+    throw notFound()
+  })
+}
+
+describe('fetchLatestSummary', () => {
+  beforeEach(() => {
+    mockedAxiosGet.mockReset()
+  })
+
+  it('resolves the newest summary from latest.json in one request', async () => {
+    serve({
+      'tiers/latest/SPY.json': { date: '2026-05-29', long_signal: 'S' },
+    })
+
+    const latest = await fetchLatestSummary('test-bucket', '2026-05-29')
+
+    expect(latest.date).toBe('2026-05-29')
+    expect(latest.data.long_signal).toBe('S')
+    expect(mockedAxiosGet).toHaveBeenCalledTimes(1)
+  })
+
+  it('probes only the days after an older pointer', async () => {
+    serve({
+      'tiers/latest/SPY.json': { date: '2026-05-29', long_signal: 'S' },
+    })
+
+    const latest = await fetchLatestSummary('test-bucket', '2026-06-01')
+
+    expect(latest.date).toBe('2026-05-29')
+    expect(latest.data.long_signal).toBe('S')
+    // pointer, then 06-01, 05-31, 05-30
+    expect(mockedAxiosGet).toHaveBeenCalledTimes(4)
+  })
+
+  it('prefers a dated summary newer than the pointer', async () => {
+    serve({
+      'tiers/latest/SPY.json': { date: '2026-05-28', long_signal: 'S' },
+      'summary_json/2026-05-28.json': { long_signal: 'S' },
+      'summary_json/2026-05-29.json': { long_signal: 'D' },
+    })
+
+    const latest = await fetchLatestSummary('test-bucket', '2026-05-30')
+
+    expect(latest.date).toBe('2026-05-29')
+    expect(latest.data.long_signal).toBe('D')
+  })
+
+  it('reads the per-ticker pointer for non-SPY tickers', async () => {
+    serve({
+      'tiers/latest/QQQ.json': { date: '2026-05-29', long_signal: 'A' },
+    })
+
+    const latest = await fetchLatestSummary('test-bucket', '2026-05-29', 'QQQ')
+
+    expect(latest.date).toBe('2026-05-29')
+    expect(mockedAxiosGet.mock.calls[0][0]).toContain('/tiers/latest/QQQ.json')
+  })
+
+  it('walks back by date when the pointer is missing', async () => {
+    serve({
+      'summary_json/2026-05-29.json': { long_signal: 'B' },
+    })
+
+    const latest = await fetchLatestSummary('test-bucket', '2026-06-01')
+
+    expect(latest.date).toBe('2026-05-29')
+    expect(latest.data.long_signal).toBe('B')
+    // pointer, then 06-01, 05-31, 05-30, 05-29
+    expect(mockedAxiosGet).toHaveBeenCalledTimes(5)
+  })
+
+  it('ignores a pointer newer than the requested date', async () => {
+    serve({
+      'tiers/latest/SPY.json': { date: '2026-06-02', long_signal: 'S' },
+      'summary_json/2026-05-29.json': { long_signal: 'C' },
+    })
+
+    const latest = await fetchLatestSummary('test-bucket', '2026-05-29')
+
+    expect(latest.date).toBe('2026-05-29')
+    expect(latest.data.long_signal).toBe('C')
+  })
+
+  it('ignores a stale pointer outside the lookback window', async () => {
+    serve({
+      'tiers/latest/SPY.json': { date: '2026-05-01', long_signal: 'S' },
+    })
+
+    await expect(fetchLatestSummary('test-bucket', '2026-06-01')).rejects.toThrow('404')
+    expect(mockedAxiosGet).toHaveBeenCalledTimes(11)
+  })
+})
+
+describe('fetchTierHistory', () => {
+  beforeEach(() => {
+    mockedAxiosGet.mockReset()
+  })
+
+  it('reads covered dates from the timeline and falls back per date', async () => {
+    serve({
+      'tiers/timeline/SPY/20d.json': {
+        entries: [{ date: '2026-05-28', long_tier: 'A', short_tier: 'C' }],
+      },
+      'summary_json/2026-05-29.json': { long_signal: 'B', short_signal: 'D' },
+    })
+
+    const tiers = await fetchTierHistory('test-bucket', ['2026-05-27', '2026-05-28', '2026-05-29'], 20)
+
+    expect(tiers.get('2026-05-28')).toEqual({ date: '2026-05-28', long_tier: 'A', short_tier: 'C' })
+    expect(tiers.get('2026-05-29')).toEqual({ date: '2026-05-29', long_tier: 'B', short_tier: 'D' })
+    expect(tiers.has('2026-05-27')).toBe(false)
+    // timeline, then 05-27 and 05-29
+    expect(mockedAxiosGet).toHaveBeenCalledTimes(3)
+    for (const [url] of mockedAxiosGet.mock.calls) {
+      expect(url).toMatch(/^https:\/\/test-bucket\.s3\.amazonaws\.com\//)
+    }
+  })
+
+  it('fetches every date when the timeline is missing', async () => {
+    serve({
+      'summary_json/2026-05-29.json': { long_tier: 'S', short_tier: 'A' },
+    })
+
+    const tiers = await fetchTierHistory('test-bucket', ['2026-05-28', '2026-05-29'], 40)
+
+    expect([...tiers.keys()]).toEqual(['2026-05-29'])
+    expect(mockedAxiosGet.mock.calls[0][0]).toContain('/tiers/timeline/SPY/40d.json')
+  })
+})
@@ -1,6 +1,7 @@
 import axios from 'axios'
 
-import { summaryJsonKey, tickerBucket } from '@/lib/tickers'
+import { logger } from '@/lib/server/logger'
+import { summaryJsonKey, summaryLatestKey, tickerBucket, tiersTimelineKey } from '@/lib/tickers'
 
 const MAX_LOOKBACK_DAYS = 10
 
@@ -40,17 +41,49 @@ export async function fetchSummaryForDate(
   return response.data as Record<string, unknown>
 }
 
-/** Walk back up to MAX_LOOKBACK_DAYS to find the newest available summary_json file. */
+/**
+ * The tier builder's latest.json pointer when it names a date within the lookback
+ * window ending at `startDate`; null when it is missing, unreadable or out of range.
+ */
+async function fetchLatestPointer(
+  bucket: string,
+  startDate: string,
+  ticker: string
+): Promise<{ date: string; data: Record<string, unknown> } | null> {
+  const dataBucket = tickerBucket(ticker, bucket)
+  try {
+    const response = await axios.get(`https://${dataBucket}.s3.amazonaws.com/${summaryLatestKey(ticker)}`, {
+      headers: fetchHeaders,
+      timeout: 5000,
+    })
+    const data = response.data as Record<string, unknown>
+    const date = typeof data?.date === 'string' ? data.date : null
+    if (!date || date > startDate || date <= subtractDaysFromDate(startDate, MAX_LOOKBACK_DAYS)) return null
+    return { date, data }
+  } catch {
+    return null
+  }
+}
+
+/**
+ * Newest available summary_json file. The latest.json pointer answers in one GET when it
+ * names `startDate` itself; otherwise the dated files are probed from `startDate` back to
+ * the pointer's date (a pointer can lag: its write is best-effort and synced summaries do
+ * not move it), then on up to MAX_LOOKBACK_DAYS.
+ */
 export async function fetchLatestSummary(
   bucket: string,
   startDate?: string,
   ticker = 'SPY'
 ): Promise<{ date: string; data: Record<string, unknown> }> {
   const firstDate = startDate ?? etDateString(0)
-  let lastError: unknown
+  const latest = await fetchLatestPointer(bucket, firstDate, ticker)
+  if (latest?.date === firstDate) return latest
 
+  let lastError: unknown
   for (let offset = 0; offset < MAX_LOOKBACK_DAYS; offset++) {
     const date = subtractDaysFromDate(firstDate, offset)
+    if (latest?.date === date) return latest
     try {
       const data = await fetchSummaryForDate(bucket, date, ticker)
       return { date, data }
@@ -79,3 +112,88 @@ export async function fetchPreviousSummary(
   }
   return null
 }
+
+export interface TiersTimelineEntry {
+  date: string
+  long_tier: string
+  short_tier: string
+  long_score?: number
+  short_score?: number
+  long_pct?: number | null
+  short_pct?: number | null
+}
+
+/**
+ * One GET for the tier builder's rolled-up timeline, keyed by date; null when it is
+ * missing or unreadable so callers can fall back to per-date summary_json fetches.
+ */
+export async function fetchTiersTimeline(
+  bucket: string,
+  window: 20 | 40 | 250,
+  ticker = 'SPY'
+): Promise<Map<string, TiersTimelineEntry> | null> {
+  const dataBucket = tickerBucket(ticker, bucket)
+  try {
+    const response = await axios.get(`https://${dataBucket}.s3.amazonaws.com/${tiersTimelineKey(ticker, window)}`, {
+      headers: fetchHeaders,
+      timeout: 5000,
+    })
+    const entries = (response.data as { entries?: TiersTimelineEntry[] })?.entries ?? []
+    return new Map(entries.map((e) => [e.date, e]))
+  } catch {
+    return null
+  }
+}
+
+export interface TierHistoryEntry {
+  date: string
+  long_tier: string
+  short_tier: string
+}
+
+/**
+ * Long/short tiers for each of `dates`: read from the rolled-up timeline when it has the
+ * date, otherwise from that day's summary_json file. Dates with no readable tier data are
+ * left out of the map.
+ */
+export async function fetchTierHistory(
+  bucket: string,
+  dates: string[],
+  window: 20 | 40 | 250,
+  ticker = 'SPY'
+): Promise<Map<string, TierHistoryEntry>> {
+  const dataBucket = tickerBucket(ticker, bucket)
+  const timeline = await fetchTiersTimeline(bucket, window, ticker)
+  const tiers = new Map<string, TierHistoryEntry>()
+
+  for (const date of dates) {
+    if (tiers.has(date)) continue
+
+    const entry = timeline?.get(date)
+    if (entry) {
+      tiers.set(date, { date, long_tier: entry.long_tier || 'N/A', short_tier: entry.short_tier || 'N/A' })
+      continue
+    }
+
+    try {
+      const response = await axios.get(summaryUrl(dataBucket, ticker, date), {
+        headers: fetchHeaders,
+        timeout: 5000,
+      })
+      const data = response.data as Record<string, any>
+      tiers.set(date, {
+        date,
+        long_tier: data.long_signal || data.long_tier || data.longTier || 'N/A',
+        short_tier: data.short_signal || data.short_tier || data.shortTier || 'N/A',
+      })
+    } catch (error: any) {
+      if (error.response?.status === 404) {
+        logger.debug({ date }, 'Tier data not found for date')
+      } else {
+        logger.warn({ date, error: error.message }, 'Error fetching tier data for date')
+      }
+    }
+  }
+
+  return tiers
+}
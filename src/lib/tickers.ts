@@ -34,6 +34,22 @@ export function summaryJsonKey(ticker: string, date: string): string {
   return `summary_json/${ticker}/${date}.json`
 }
 
+/**
+ * Copy of the newest summary_json document, written by the tier builder after the dated object.
+ * Summaries mirrored with `aws s3 sync` do not move it; readers only trust it within the lookback.
+ */
+export function summaryLatestKey(ticker: string): string {
+  return `tiers/latest/${normalizeTicker(ticker)}.json`
+}
+
+/**
+ * Rolled-up tiers timeline (newest `window` rated days) written by the tier builder.
+ * Lives outside summary_json/ so the DB pre-sync only ever sees dated files there.
+ */
+export function tiersTimelineKey(ticker: string, window: 20 | 40 | 250): string {
+  return `tiers/timeline/${normalizeTicker(ticker)}/${window}d.json`
+}
+
 /** Product Model2 / y2y3 chart JSON key. */
 export function model2ChartKey(ticker: string): string {
   if (ticker === 'SPY') return 'model2_y2y3/chart/latest.json'